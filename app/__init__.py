@@ -1,8 +1,8 @@
 
 from flask import Flask, g, render_template, send_from_directory, request
 import os
-from config import DB_USERNAME, DB_PASSWORD, DB_NAME, DB_HOST, DB_PORT, JWT_SECRET_KEY, FRONTEND_URL
-from psycopg2 import pool
+from config import DB_USERNAME, DB_PASSWORD, DB_NAME, DB_HOST, DB_PORT, JWT_SECRET_KEY, FRONTEND_URL, SESSION_BACKEND, SESSION_TTL_SECONDS, OTP_CHALLENGE_MODE, OTP_STORE_BACKEND, JSON_PROVIDER, TRUSTED_PROXY_HOPS, DB_POOL_MAX_CONNECTIONS, DB_POOL_TIMEOUT_SECONDS
+from .utils.blocking_pool import BlockingConnectionPool
 from .utils.error_handlers import register_error_handlers
 from flask_cors import CORS
 from flask_jwt_extended import (
@@ -13,11 +13,23 @@ from flask_session import Session
 from datetime import timedelta
 from dotenv import load_dotenv
 from app.db_init import initialize_db
+from app.utils.sweeper import start_sweeper
 
 db_pool = None
 
+# Cross-origin headers for the Google Sign-In popup (API responses and the SPA page)
+COOP_HEADERS = {
+    "Cross-Origin-Opener-Policy": "same-origin-allow-popups",
+    "Cross-Origin-Embedder-Policy": "unsafe-none"
+}
 
-def create_app(test_config=None):
+
+def create_app(test_config=None, start_workers=True):
+    """
+    Build the Flask app. start_workers=False skips every background thread
+    (sweeper, LISTEN thread, payment inbox worker), for scripts that only
+    need the app context and pool.
+    """
     
    
     #initialize the database (create tables if not exist)
@@ -40,7 +52,10 @@ def create_app(test_config=None):
     app.config["SESSION_COOKIE_SECURE"] = False 
     app.config["SESSION_TYPE"] = "filesystem" 
 
-    Session(app)
+    # Behind nginx: take the client address / scheme from the forwarded headers
+    if TRUSTED_PROXY_HOPS:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS, x_proto=TRUSTED_PROXY_HOPS)
     
     # JWT CONFIGURATION
     app.config["JWT_SECRET_KEY"] = JWT_SECRET_KEY
@@ -62,6 +77,10 @@ def create_app(test_config=None):
     
     # Initialize JWT Manager
     jwt = JWTManager(app)
+
+    # orjson responses; raw_json() passes Postgres-built JSON through untouched
+    from .utils.json_provider import init_json_provider
+    init_json_provider(app, JSON_PROVIDER)
     
     
     # =====================
@@ -69,29 +88,55 @@ def create_app(test_config=None):
     # =====================
 
     #Initialize connection pool ONCE
+    # Threaded: request threads (gthread workers), the payment inbox worker and
+    # the sweeper check connections out concurrently; checkouts wait for a free
+    # connection rather than failing when all are in use
     global db_pool
     if db_pool is None:
-        db_pool = pool.SimpleConnectionPool(
-            1, 10,  # min/max connections
+        db_pool = BlockingConnectionPool(
+            1, DB_POOL_MAX_CONNECTIONS,  # min/max connections
             user=DB_USERNAME,
             password=DB_PASSWORD,
             host=DB_HOST,
             port=DB_PORT,
-            database=DB_NAME
+            database=DB_NAME,
+            timeout=DB_POOL_TIMEOUT_SECONDS
         )
 
-    # Open connection for this request
-    @app.before_request
-    def get_db_connection():
-        if "db_conn" not in g:
-            g.db_conn = db_pool.getconn()
+    # g.db_conn is checked out on first access, only by requests that query
+    from .utils.lazy_db import LazyDbGlobals, checkout_stats, db_conn_held_seconds, release_db_conn
+    app.app_ctx_globals_class = LazyDbGlobals
+
+    @app.teardown_request
+    def count_db_checkout(exception):
+        checkout_stats.record(db_conn_held_seconds())
 
     # Close connection after request
     @app.teardown_appcontext
     def close_db_connection(exception):
-        conn = g.pop("db_conn", None)
-        if conn is not None:
-            db_pool.putconn(conn)
+        release_db_conn()
+
+    # =====================
+    #  SESSIONS
+    # =====================
+    if SESSION_BACKEND == "filesystem":
+        Session(app)
+    else:
+        from .utils.session_store import init_session_store
+        init_session_store(app, SESSION_BACKEND, SESSION_TTL_SECONDS)
+
+    # Replay/attempt store for stateless OTP challenge tokens
+    if OTP_CHALLENGE_MODE == "token":
+        from .utils.otp_challenge import init_otp_challenges
+        init_otp_challenges(OTP_STORE_BACKEND)
+
+    # OTP send limits per student, phone and IP
+    from .utils.rate_limit import init_rate_limits
+    init_rate_limits(OTP_STORE_BACKEND)
+
+    # Expired sessions / OTP challenges / rate limit windows
+    if start_workers:
+        start_sweeper(app)
             
     
     # =====================
@@ -158,17 +203,34 @@ def create_app(test_config=None):
             
         return send_from_directory(abs_template_folder, "index.html")
 
-    from .admin.authentication.controller import init_oauth
-    init_oauth(app)
+    # Build assets and the SPA fallback are answered before Flask (no session, no DB checkout)
+    from .utils.static_assets import init_static_assets
+    init_static_assets(app, os.path.abspath(os.path.join(app.root_path, app.template_folder)), "serve_react",
+                       html_headers=COOP_HEADERS)
+
+    # Google OAuth (authlib) is registered on the first admin login; see get_google
 
 
     @app.after_request
     def set_coop_headers(response):
         # Needed for Google Sign-In popup to communicate via postMessage
-        response.headers["Cross-Origin-Opener-Policy"] = "same-origin-allow-popups"
-        response.headers["Cross-Origin-Embedder-Policy"] = "unsafe-none"
+        response.headers.update(COOP_HEADERS)
         return response
 
     register_error_handlers(app)
 
+    # Fee / schedule invalidation and tracking status updates from other workers
+    # (LISTEN/NOTIFY); importing the subscribers registers their channels before
+    # the listener connects
+    from .utils import fee_registry, schedule, status_channel  # noqa: F401
+    from .utils.pg_listener import start_listener
+    if start_workers:
+        start_listener(app)
+
+    # Background processing of queued Maya webhooks (ingestion mode)
+    from config import MAYA_WEBHOOK_ASYNC
+    if MAYA_WEBHOOK_ASYNC and start_workers:
+        from .user.payment.inbox import start_inbox_worker
+        start_inbox_worker(app)
+
     return app
\ No newline at end of file
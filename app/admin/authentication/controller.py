@@ -2,21 +2,21 @@
 from . import authentication_admin_bp
 from flask import jsonify, request, current_app, redirect, url_for, session
 from flask_jwt_extended import create_access_token, set_access_cookies, jwt_required, get_jwt_identity
-from authlib.integrations.flask_client import OAuth
 from config import GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, FRONTEND_URL
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 from ..settings.models import Admin
 import secrets
+import threading
 
 # =========================
-# OAuth setup (will be initialized in create_app)
+# OAuth setup (registered on first use; authlib is only imported then)
 # =========================
 oauth = None
 google = None
+_oauth_lock = threading.Lock()
 
 def init_oauth(app):
     global oauth, google
+    from authlib.integrations.flask_client import OAuth
     oauth = OAuth(app)
     google = oauth.register(
     name='google',
@@ -37,6 +37,15 @@ def init_oauth(app):
 )
 
 
+def get_google():
+    """The registered Google OAuth client, set up on the first admin login."""
+    if google is None:
+        with _oauth_lock:
+            if google is None:
+                init_oauth(current_app._get_current_object())
+    return google
+
+
 # =========================
 # OAuth Redirect Flow
 # =========================
@@ -48,7 +57,7 @@ def initiate_google_login():
     session['oauth_state'] = state
     session['oauth_nonce'] = nonce
     redirect_uri = url_for("authentication_admin.google_oauth_callback", _external=True)
-    return google.authorize_redirect(
+    return get_google().authorize_redirect(
         redirect_uri,
         state=state,
         nonce=nonce  # send nonce to Google
@@ -66,8 +75,9 @@ def google_oauth_callback():
             frontend_error_url = f"{FRONTEND_URL}/admin/login?error=invalid_state"
             return redirect(frontend_error_url)
 
-        token = google.authorize_access_token()
-        user_info = google.parse_id_token(token, nonce=nonce)  # pass nonce here
+        google_client = get_google()
+        token = google_client.authorize_access_token()
+        user_info = google_client.parse_id_token(token, nonce=nonce)  # pass nonce here
 
 
     
@@ -2,6 +2,7 @@ from . import dashboard_bp
 from flask import jsonify
 from flask_jwt_extended import unset_jwt_cookies, jwt_required
 from app.utils.decorator import jwt_required_with_role
+from app.utils.lazy_db import checkout_stats
 from .models import DashboardModel
 
 
@@ -27,6 +28,15 @@ def admin_dashboard():
    except Exception as e:
        return jsonify({"error": str(e)}), 500
 
+@dashboard_bp.route("/api/admin/metrics/db-checkouts", methods=["GET"])
+@jwt_required()
+def db_checkout_metrics():
+   """
+   Requests served by this worker with and without a DB pool checkout, and
+   how long those that checked one out held it on average.
+   """
+   return jsonify(checkout_stats.snapshot()), 200
+
 @dashboard_bp.route("/api/admin/logout", methods=["POST"])
 @jwt_required()
 def admin_logout():
@@ -2,6 +2,7 @@ from . import document_management_bp
 from flask import jsonify, g, request
 import psycopg2
 from flask_jwt_extended import jwt_required
+from app.admin.transactions.models import TransactionsModel
 
 @document_management_bp.route('/get-documents', methods=['GET'])
 @jwt_required()
@@ -190,12 +191,19 @@ def edit_document(doc_id):
         requirements = data.get("requirements", [])
         requires_payment_first = data.get("requires_payment_first", False)
 
+        # A new cost reprices every paid line of this document, so those rollup days change
+        cursor.execute("SELECT cost IS DISTINCT FROM %s::numeric FROM documents WHERE doc_id = %s FOR UPDATE;", (cost, doc_id))
+        cost_row = cursor.fetchone()
+        revenue_days = TransactionsModel.document_revenue_days(cursor, doc_id) if cost_row and cost_row[0] else []
+
         # update the main document info
         cursor.execute("""
             UPDATE documents
             SET doc_name = %s, description = %s, cost = %s, requires_payment_first = %s
             WHERE doc_id = %s;
         """, (doc_name, description, cost, requires_payment_first, doc_id))
+        for day in revenue_days:
+            TransactionsModel.refresh_revenue_day(cursor, day=day)
 
         # clear old requirements
         cursor.execute("DELETE FROM document_requirements WHERE doc_id = %s;", (doc_id,))
@@ -241,8 +249,13 @@ def delete_document(doc_id):
         # First, remove any linked requirements in document_requirements
         cursor.execute("DELETE FROM document_requirements WHERE doc_id = %s;", (doc_id,))
 
+        # Paid lines of this document stop counting once it is gone
+        revenue_days = TransactionsModel.document_revenue_days(cursor, doc_id)
+
         # Then remove the document itself
         cursor.execute("DELETE FROM documents WHERE doc_id = %s;", (doc_id,))
+        for day in revenue_days:
+            TransactionsModel.refresh_revenue_day(cursor, day=day)
 
         conn.commit()
         return jsonify({"message": f"Document {doc_id} deleted successfully"}), 200
@@ -1,30 +1,35 @@
 from flask import g
 from app import db_pool
+from app.utils.json_provider import raw_json
 
 class LoggingModel:
     @staticmethod
     def get_all_logs():
-        """Fetch all logs with their details."""
+        """
+        Fetch all logs with their details, as one JSON array built by
+        Postgres (see raw_json).
+        """
         conn = db_pool.getconn()
         cur = conn.cursor()
         try:
             cur.execute("""
-                SELECT log_id, admin_id, action, details, timestamp, request_id
+                SELECT COALESCE(
+                    json_agg(
+                        json_build_object(
+                            'log_id', log_id,
+                            'admin_id', admin_id,
+                            'action', action,
+                            'details', details,
+                            'timestamp', to_char(timestamp, 'YYYY-MM-DD HH24:MI:SS'),
+                            'request_id', request_id
+                        )
+                        ORDER BY timestamp DESC
+                    ),
+                    '[]'::json
+                )::text
                 FROM logs
-                ORDER BY timestamp DESC
             """)
-            logs = cur.fetchall()
-            return [
-                {
-                    "log_id": log[0],
-                    "admin_id": log[1],
-                    "action": log[2],
-                    "details": log[3],
-                    "timestamp": log[4].strftime("%Y-%m-%d %H:%M:%S") if log[4] else None,
-                    "request_id": log[5]
-                }
-                for log in logs
-            ]
+            return raw_json(cur.fetchone()[0])
         finally:
             cur.close()
             db_pool.putconn(conn)
@@ -4,6 +4,10 @@ from flask import jsonify, request, g, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.utils.decorator import jwt_required_with_role
 from .models import ManageRequestModel
+from app.utils.export import export_response, ExportLimitReached
+from app.utils.json_provider import raw_json_response
+from config import ADMIN_REQUESTS_DB_JSON
+from datetime import datetime
 
 
 def send_whatsapp_status_update(phone, full_name, request_id, status_update):
@@ -38,6 +42,21 @@ def send_whatsapp_status_update(phone, full_name, request_id, status_update):
     return {"status": "success"}
 
 
+def request_page_response(**filters):
+    """
+    One page of the admin request list. With ADMIN_REQUESTS_DB_JSON the body
+    is the JSON text Postgres built, sent as-is; otherwise (or if that query
+    fails) the page is assembled in Python and jsonified.
+    """
+    if ADMIN_REQUESTS_DB_JSON:
+        page_json = ManageRequestModel.fetch_requests_json(**filters)
+        if page_json is not None:
+            return raw_json_response(page_json)
+
+    result = ManageRequestModel.fetch_requests(**filters)
+    return jsonify({"requests": result["requests"], "total": result["total"]}), 200
+
+
 @manage_request_bp.route("/api/admin/requests", methods=["GET"])
 @jwt_required()
 def get_requests():
@@ -57,7 +76,7 @@ def get_requests():
         if has_others_docs is not None:
             has_others_docs_filter = has_others_docs.lower() in ('true', '1', 'yes')
         
-        result = ManageRequestModel.fetch_requests(
+        return request_page_response(
             page=page, 
             limit=limit, 
             search=search,
@@ -65,12 +84,48 @@ def get_requests():
             requester_type=requester_type,
             has_others_docs=has_others_docs_filter
         )
-        return jsonify({"requests": result["requests"], "total": result["total"]}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 
+@manage_request_bp.route("/api/admin/requests/export", methods=["GET"])
+@jwt_required()
+def export_requests():
+    """
+    Stream every request matching the list filters as CSV (default) or XLSX.
+    """
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        search = request.args.get('search')
+        college_code = request.args.get('college_code')
+        requester_type = request.args.get('requester_type')
+        has_others_docs = request.args.get('has_others_docs')
+
+        # Parse has_others_docs parameter
+        has_others_docs_filter = None
+        if has_others_docs is not None:
+            has_others_docs_filter = has_others_docs.lower() in ('true', '1', 'yes')
+
+        query, params, header = ManageRequestModel.build_export_query(
+            search=search,
+            college_code=college_code,
+            requester_type=requester_type,
+            has_others_docs=has_others_docs_filter
+        )
+        filename = f"requests_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        response = export_response(export_format, query, params, header, filename)
+        if response is None:
+            return jsonify({"error": f"Unsupported export format: {export_format}"}), 400
+        return response
+    except ExportLimitReached:
+        response = jsonify({"error": "Too many exports are running; try again shortly"})
+        response.headers["Retry-After"] = "30"
+        return response, 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @manage_request_bp.route("/api/admin/requests/<request_id>/status", methods=["PUT"])
 @jwt_required()
 def update_request_status(request_id):
@@ -160,7 +215,7 @@ def get_my_requests():
         
         admin_id = get_jwt_identity()
 
-        result = ManageRequestModel.fetch_requests(
+        return request_page_response(
             page=page, 
             limit=limit, 
             search=search, 
@@ -169,7 +224,6 @@ def get_my_requests():
             requester_type=requester_type,
             has_others_docs=has_others_docs_filter
         )
-        return jsonify({"requests": result["requests"], "total": result["total"]}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -231,10 +285,7 @@ def manual_assign_requests():
         request_ids = data.get("request_ids", [])
         admin_id = data.get("admin_id", get_jwt_identity())
         assigner_admin_id = get_jwt_identity()
-        assigned_count = 0
-        for req_id in request_ids:
-            if ManageRequestModel.assign_request_to_admin(req_id, admin_id, assigner_admin_id):
-                assigned_count += 1
+        assigned_count = ManageRequestModel.assign_requests_to_admin(request_ids, admin_id, assigner_admin_id)
         return jsonify({"message": f"Manually assigned {assigned_count} requests"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -250,63 +301,26 @@ def get_unassigned_requests():
     Get unassigned requests for manual assignment with filtering and search.
     """
     try:
-        conn = g.db_conn
-        cur = conn.cursor()
-        
-        # Get query parameters
+        page = int(request.args.get('page', 1))
+        limit = int(request.args.get('limit', 50))
         search = request.args.get('search')
         college_code = request.args.get('college_code')
         requester_type = request.args.get('requester_type')
-        
-        # Build the base query
-        query = """
-            SELECT r.request_id, r.full_name, r.requested_at, r.college_code
-            FROM requests r
-            WHERE r.status = 'PENDING'
-            AND r.request_id NOT IN (SELECT request_id FROM request_assignments)
-        """
-        params = []
-        
 
-        # Add search condition
-        if search:
-            query += " AND (r.full_name ILIKE %s OR r.student_id ILIKE %s OR r.email ILIKE %s OR r.contact_number ILIKE %s OR r.request_id ILIKE %s)"
-            search_param = f"%{search}%"
-            params.extend([search_param] * 5)
-        
-        # Add college_code filter
-        if college_code and college_code != 'all':
-            query += " AND r.college_code = %s"
-            params.append(college_code)
-        
-        query += " ORDER BY r.requested_at ASC LIMIT 50"
-        
-        cur.execute(query, params)
-        unassigned = cur.fetchall()
-        
-        # Get auth letter IDs to determine requester type
-        cur.execute("SELECT id FROM auth_letters")
-        auth_letter_ids = {row[0] for row in cur.fetchall()}
-        
-        requests = []
-        for req in unassigned:
-            requester_type_val = "Outsider" if req[0] in auth_letter_ids else "Student"
-            
-            # Apply requester_type filter after getting auth letter data
-            if requester_type and requester_type != 'all':
-                if requester_type != requester_type_val:
-                    continue
-                    
-            requests.append({
-                "request_id": req[0],
-                "full_name": req[1],
-                "requested_at": req[2].strftime("%Y-%m-%d %H:%M:%S") if req[2] else None,
-                "college_code": req[3],
-                "requester_type": requester_type_val
-            })
-        
-        cur.close()
-        return jsonify({"requests": requests}), 200
+        result = ManageRequestModel.get_unassigned_requests(
+            page=page,
+            limit=limit,
+            search=search,
+            college_code=college_code,
+            requester_type=requester_type
+        )
+        # total stops at UNASSIGNED_COUNT_CAP (total_is_capped); has_more drives paging
+        return jsonify({
+            "requests": result["requests"],
+            "total": result["total"],
+            "total_is_capped": result["total_is_capped"],
+            "has_more": result["has_more"]
+        }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -323,12 +337,13 @@ def get_unassigned_requests_filters():
         
         # Get unique college codes
         cur.execute("""
-            SELECT DISTINCT college_code
-            FROM requests
-            WHERE status = 'PENDING'
-            AND request_id NOT IN (SELECT request_id FROM request_assignments)
-            AND college_code IS NOT NULL
-            ORDER BY college_code
+            SELECT DISTINCT r.college_code
+            FROM requests r
+            WHERE r.status = 'PENDING'
+            AND r.is_assigned = FALSE
+            AND NOT EXISTS (SELECT 1 FROM request_assignments ra WHERE ra.request_id = r.request_id)
+            AND r.college_code IS NOT NULL
+            ORDER BY r.college_code
         """)
         college_codes = [row[0] for row in cur.fetchall()]
         
@@ -371,18 +386,11 @@ def get_admins_progress():
             SELECT a.email,
                    a.profile_picture,
                    COALESCE(asp.value::int, 10) as max_requests,
-                   COALESCE(prog.total, 0) as total,
-                   COALESCE(prog.completed, 0) as completed
+                   COALESCE(w.assigned, 0) as total,
+                   COALESCE(w.released, 0) as completed
             FROM admins a
             LEFT JOIN admin_settings asp ON a.email = asp.admin_id AND asp.key = 'max_requests'
-            LEFT JOIN (
-                SELECT ra.admin_id,
-                       COUNT(*) as total,
-                       COUNT(CASE WHEN r.status = 'RELEASED' THEN 1 END) as completed
-                FROM request_assignments ra
-                LEFT JOIN requests r ON ra.request_id = r.request_id
-                GROUP BY ra.admin_id
-            ) prog ON a.email = prog.admin_id
+            LEFT JOIN admin_workload w ON a.email = w.admin_id
             ORDER BY a.email
         """)
 
@@ -480,7 +488,12 @@ def get_single_request(request_id):
     try:
         request_data = ManageRequestModel.get_request_by_id(request_id)
         if request_data:
-            return jsonify(request_data), 200
+            response = jsonify(request_data)
+            # Surface which path served the detail (cache / query / fallback) and how long it took
+            timing = g.get("request_detail_timing")
+            if timing:
+                response.headers["Server-Timing"] = f'detail;desc="{timing["source"]}";dur={timing["ms"]:.1f}'
+            return response, 200
         else:
             return jsonify({"error": "Request not found"}), 404
     except Exception as e:
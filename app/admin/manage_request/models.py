@@ -1,9 +1,226 @@
-from flask import g
+from flask import g, current_app
 from collections import defaultdict
 from psycopg2 import extras
+from werkzeug.http import http_date
+from app.utils.cache import TTLCache
+from app.utils.json_provider import raw_json
+from app.utils.prepared_statements import execute_prepared
+from app.utils.status_channel import publish_status
+from app.utils.pg_listener import subscribe
+from app.admin.transactions.models import TransactionsModel
+import copy
+import time
+
+# Per-request detail cache for get_request_by_id. Every write path that touches
+# a request sends a NOTIFY on REQUEST_CACHE_CHANNEL in its own transaction
+# (notify_request_change) and drops this worker's entry after committing; the
+# TTL only covers a listener that is reconnecting.
+request_detail_cache = TTLCache(ttl_seconds=30, max_entries=512)
+
+REQUEST_CACHE_CHANNEL = "request_changed"
+
+# get_unassigned_requests counts matches only up to this many
+UNASSIGNED_COUNT_CAP = 1000
 
 class ManageRequestModel:
 
+    @staticmethod
+    def notify_request_change(cur, request_ids):
+        """
+        Queue a NOTIFY for one request id or a list of them in the writer's
+        transaction; every worker's listener drops their cached details on commit.
+        """
+        if isinstance(request_ids, str):
+            request_ids = [request_ids]
+        cur.execute(
+            "SELECT pg_notify(%s, request_id) FROM unnest(%s::text[]) AS request_id",
+            (REQUEST_CACHE_CHANNEL, [str(rid) for rid in request_ids])
+        )
+
+    @staticmethod
+    def invalidate_request_cache(request_id):
+        """Drop this worker's cached detail view of a request after its write has been committed."""
+        request_detail_cache.invalidate(request_id)
+
+
+    @staticmethod
+    def request_filters(search=None, admin_id=None, college_code=None, requester_type=None, has_others_docs=None):
+        """
+        WHERE clause shared by fetch_requests and the request export, over
+        requests r LEFT JOIN request_assignments ra. Returns (where_sql, params).
+        """
+        params = []
+        where_clauses = []
+
+        if admin_id:
+            where_clauses.append("ra.admin_id = %s")
+            params.append(admin_id)
+
+        if search:
+            where_clauses.append("""
+                (
+                    r.full_name ILIKE %s OR
+                    r.student_id ILIKE %s OR
+                    r.email ILIKE %s OR
+                    r.contact_number ILIKE %s OR
+                    CAST(r.request_id AS TEXT) ILIKE %s
+                )
+            """)
+            search_param = f"%{search}%"
+            params.extend([search_param] * 5)
+
+        if college_code:
+            where_clauses.append("r.college_code = %s")
+            params.append(college_code)
+
+        if requester_type == "outsider":
+            where_clauses.append("EXISTS (SELECT 1 FROM auth_letters WHERE id = r.request_id)")
+        elif requester_type == "student":
+            where_clauses.append("NOT EXISTS (SELECT 1 FROM auth_letters WHERE id = r.request_id)")
+
+        if has_others_docs is not None:
+            clause = "EXISTS" if has_others_docs else "NOT EXISTS"
+            where_clauses.append(f"""
+                {clause} (
+                    SELECT 1 FROM others_docs od
+                    WHERE od.request_id = r.request_id
+                )
+            """)
+
+        where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+        return where_sql, params
+
+    @staticmethod
+    def build_export_query(search=None, admin_id=None, college_code=None, requester_type=None, has_others_docs=None):
+        """
+        Flat one-row-per-request query for CSV/XLSX export, using the same
+        filters as fetch_requests. Returns (sql, params, header).
+        """
+        where_sql, params = ManageRequestModel.request_filters(
+            search, admin_id, college_code, requester_type, has_others_docs
+        )
+        query = f"""
+            SELECT
+                r.request_id,
+                r.student_id,
+                r.full_name,
+                r.contact_number,
+                r.email,
+                r.preferred_contact,
+                r.status,
+                to_char(r.requested_at, 'YYYY-MM-DD HH24:MI:SS'),
+                r.remarks,
+                r.total_cost,
+                r.payment_status,
+                ra.admin_id,
+                docs.documents
+            FROM requests r
+            LEFT JOIN request_assignments ra ON r.request_id = ra.request_id
+            LEFT JOIN LATERAL (
+                SELECT string_agg(d.doc_name || ' x' || rd.quantity, '; ' ORDER BY d.doc_name) AS documents
+                FROM request_documents rd
+                JOIN documents d ON d.doc_id = rd.doc_id
+                WHERE rd.request_id = r.request_id
+            ) docs ON TRUE
+            {where_sql}
+            ORDER BY r.requested_at DESC, r.request_id DESC
+        """
+        header = [
+            "request_id", "student_id", "full_name", "contact_number", "email",
+            "preferred_contact", "status", "requested_at", "remarks", "total_cost",
+            "payment_status", "assigned_admin_id", "documents"
+        ]
+        return query, params, header
+
+    @staticmethod
+    def request_page_ctes(where_sql):
+        """
+        WITH clause for one page of the admin request list: request_data
+        (LIMIT %s OFFSET %s, after the filter params), documents_data,
+        requirements_data, files_data and recent_logs.
+        """
+        return f"""
+            WITH request_data AS (
+                SELECT
+                    r.request_id,
+                    r.student_id,
+                    r.full_name,
+                    r.contact_number,
+                    r.email,
+                    r.preferred_contact,
+                    r.status,
+                    r.requested_at,
+                    r.remarks,
+                    r.total_cost,
+                    r.payment_status,
+                    ra.admin_id AS assigned_admin_id,
+                    a.profile_picture AS assigned_admin_profile_picture
+                FROM requests r
+                LEFT JOIN request_assignments ra ON r.request_id = ra.request_id
+                LEFT JOIN admins a ON ra.admin_id = a.email
+                {where_sql}
+                ORDER BY r.requested_at DESC
+                LIMIT %s OFFSET %s
+            ),
+
+            documents_data AS (
+                SELECT
+                    rd.request_id,
+                    json_agg(
+                        json_build_object(
+                            'doc_id', rd.doc_id,
+                            'name', d.doc_name,
+                            'quantity', rd.quantity,
+                            'cost', d.cost,
+                            'is_done', rd.is_done
+                        )
+                        ORDER BY d.doc_name
+                    ) AS documents
+                FROM request_documents rd
+                JOIN documents d ON d.doc_id = rd.doc_id
+                WHERE rd.request_id IN (SELECT request_id FROM request_data)
+                GROUP BY rd.request_id
+            ),
+
+            requirements_data AS (
+                SELECT
+                    rd.request_id,
+                    json_agg(DISTINCT req.requirement_name) AS requirements
+                FROM request_documents rd
+                JOIN document_requirements dr ON dr.doc_id = rd.doc_id
+                JOIN requirements req ON req.req_id = dr.req_id
+                WHERE rd.request_id IN (SELECT request_id FROM request_data)
+                GROUP BY rd.request_id
+            ),
+
+            files_data AS (
+                SELECT
+                    rrl.request_id,
+                    json_agg(
+                        json_build_object(
+                            'requirement', req.requirement_name,
+                            'file_path', rrl.file_path
+                        )
+                        ORDER BY rrl.uploaded_at
+                    ) AS uploaded_files
+                FROM request_requirements_links rrl
+                JOIN requirements req ON req.req_id = rrl.requirement_id
+                WHERE rrl.request_id IN (SELECT request_id FROM request_data)
+                GROUP BY rrl.request_id
+            ),
+
+            recent_logs AS (
+                SELECT DISTINCT ON (request_id)
+                    request_id,
+                    admin_id,
+                    action,
+                    details,
+                    timestamp
+                FROM logs
+                WHERE request_id IN (SELECT request_id FROM request_data)
+                ORDER BY request_id, timestamp DESC
+            )
+        """
 
     @staticmethod
     def fetch_requests(
@@ -24,136 +241,21 @@ class ManageRequestModel:
 
         try:
             offset = (page - 1) * limit
-            params = []
-            where_clauses = []
-
-            if admin_id:
-                where_clauses.append("ra.admin_id = %s")
-                params.append(admin_id)
-
-            if search:
-                where_clauses.append("""
-                    (
-                        r.full_name ILIKE %s OR
-                        r.student_id ILIKE %s OR
-                        r.email ILIKE %s OR
-                        r.contact_number ILIKE %s OR
-                        CAST(r.request_id AS TEXT) ILIKE %s
-                    )
-                """)
-                search_param = f"%{search}%"
-                params.extend([search_param] * 5)
-
-            if college_code:
-                where_clauses.append("r.college_code = %s")
-                params.append(college_code)
-
-            if requester_type == "outsider":
-                where_clauses.append("EXISTS (SELECT 1 FROM auth_letters WHERE id = r.request_id)")
-            elif requester_type == "student":
-                where_clauses.append("NOT EXISTS (SELECT 1 FROM auth_letters WHERE id = r.request_id)")
-
-            if has_others_docs is not None:
-                clause = "EXISTS" if has_others_docs else "NOT EXISTS"
-                where_clauses.append(f"""
-                    {clause} (
-                        SELECT 1 FROM others_docs od
-                        WHERE od.request_id = r.request_id
-                    )
-                """)
-
-            where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+            where_sql, params = ManageRequestModel.request_filters(
+                search, admin_id, college_code, requester_type, has_others_docs
+            )
 
             # ----------------------------
             # MAIN QUERY
             # ----------------------------
             cur.execute(f"""
-                WITH request_data AS (
-                    SELECT
-                        r.request_id,
-                        r.student_id,
-                        r.full_name,
-                        r.contact_number,
-                        r.email,
-                        r.preferred_contact,
-                        r.status,
-                        r.requested_at,
-                        r.remarks,
-                        r.total_cost,
-                        r.payment_status,
-                        ra.admin_id AS assigned_admin_id,
-                        a.profile_picture AS assigned_admin_profile_picture
-                    FROM requests r
-                    LEFT JOIN request_assignments ra ON r.request_id = ra.request_id
-                    LEFT JOIN admins a ON ra.admin_id = a.email
-                    {where_sql}
-                    ORDER BY r.requested_at DESC
-                    LIMIT %s OFFSET %s
-                ),
-
-                documents_data AS (
-                    SELECT
-                        rd.request_id,
-                        json_agg(
-                            json_build_object(
-                                'doc_id', rd.doc_id,
-                                'name', d.doc_name,
-                                'quantity', rd.quantity,
-                                'cost', d.cost,
-                                'is_done', rd.is_done
-                            )
-                            ORDER BY d.doc_name
-                        ) AS documents
-                    FROM request_documents rd
-                    JOIN documents d ON d.doc_id = rd.doc_id
-                    WHERE rd.request_id IN (SELECT request_id FROM request_data)
-                    GROUP BY rd.request_id
-                ),
-
-                requirements_data AS (
-                    SELECT
-                        rd.request_id,
-                        json_agg(DISTINCT req.requirement_name) AS requirements
-                    FROM request_documents rd
-                    JOIN document_requirements dr ON dr.doc_id = rd.doc_id
-                    JOIN requirements req ON req.req_id = dr.req_id
-                    WHERE rd.request_id IN (SELECT request_id FROM request_data)
-                    GROUP BY rd.request_id
-                ),
-
-                files_data AS (
-                    SELECT
-                        rrl.request_id,
-                        json_agg(
-                            json_build_object(
-                                'requirement', req.requirement_name,
-                                'file_path', rrl.file_path
-                            )
-                            ORDER BY rrl.uploaded_at
-                        ) AS uploaded_files
-                    FROM request_requirements_links rrl
-                    JOIN requirements req ON req.req_id = rrl.requirement_id
-                    WHERE rrl.request_id IN (SELECT request_id FROM request_data)
-                    GROUP BY rrl.request_id
-                ),
-
-                recent_logs AS (
-                    SELECT DISTINCT ON (request_id)
-                        request_id,
-                        admin_id,
-                        action,
-                        details,
-                        timestamp
-                    FROM logs
-                    WHERE request_id IN (SELECT request_id FROM request_data)
-                    ORDER BY request_id, timestamp DESC
-                )
+                {ManageRequestModel.request_page_ctes(where_sql)}
 
                 SELECT
                     rd.*,
-                    COALESCE(d.documents, '[]'::json) AS documents,
-                    COALESCE(req.requirements, '[]'::json) AS requirements,
-                    COALESCE(f.uploaded_files, '[]'::json) AS uploaded_files,
+                    COALESCE(d.documents, '[]'::json)::text AS documents,
+                    COALESCE(req.requirements, '[]'::json)::text AS requirements,
+                    COALESCE(f.uploaded_files, '[]'::json)::text AS uploaded_files,
                     l.admin_id AS log_admin_id,
                     l.action AS log_action,
                     l.details AS log_details,
@@ -210,9 +312,10 @@ class ManageRequestModel:
                     "payment_status": r["payment_status"],
                     "assigned_admin_id": r["assigned_admin_id"],
                     "assigned_admin_profile_picture": r["assigned_admin_profile_picture"],
-                    "documents": r["documents"],
-                    "requirements": r["requirements"],
-                    "uploaded_files": r["uploaded_files"],
+                    # Aggregated in Postgres; passed through without decoding
+                    "documents": raw_json(r["documents"]),
+                    "requirements": raw_json(r["requirements"]),
+                    "uploaded_files": raw_json(r["uploaded_files"]),
                     "recent_log": recent_log
                 })
 
@@ -226,6 +329,96 @@ class ManageRequestModel:
         finally:
             cur.close()
             
+    @staticmethod
+    def fetch_requests_json(
+        page=1,
+        limit=20,
+        search=None,
+        admin_id=None,
+        college_code=None,
+        requester_type=None,
+        has_others_docs=None
+    ):
+        """
+        Same page as fetch_requests, but the whole {"requests": [...], "total": n}
+        document is built by Postgres in one json_build_object and returned as
+        JSON text, ready to be sent as the response body.
+
+        Returns None on error so the caller can fall back to fetch_requests.
+        """
+        conn = g.db_conn
+        cur = conn.cursor()
+
+        try:
+            offset = (page - 1) * limit
+            where_sql, params = ManageRequestModel.request_filters(
+                search, admin_id, college_code, requester_type, has_others_docs
+            )
+
+            # Field formats match fetch_requests + jsonify: timestamps via
+            # to_char, total_cost (numeric) as a string
+            cur.execute(f"""
+                {ManageRequestModel.request_page_ctes(where_sql)},
+
+                page_rows AS (
+                    SELECT
+                        rd.requested_at,
+                        json_build_object(
+                            'request_id', rd.request_id,
+                            'student_id', rd.student_id,
+                            'full_name', rd.full_name,
+                            'contact_number', rd.contact_number,
+                            'email', rd.email,
+                            'preferred_contact', rd.preferred_contact,
+                            'status', rd.status,
+                            'requested_at', to_char(rd.requested_at, 'YYYY-MM-DD HH24:MI:SS'),
+                            'remarks', rd.remarks,
+                            'total_cost', rd.total_cost::text,
+                            'payment_status', rd.payment_status,
+                            'assigned_admin_id', rd.assigned_admin_id,
+                            'assigned_admin_profile_picture', rd.assigned_admin_profile_picture,
+                            'documents', COALESCE(d.documents, '[]'::json),
+                            'requirements', COALESCE(req.requirements, '[]'::json),
+                            'uploaded_files', COALESCE(f.uploaded_files, '[]'::json),
+                            'recent_log', CASE WHEN l.admin_id IS NOT NULL THEN
+                                json_build_object(
+                                    'admin_id', l.admin_id,
+                                    'action', l.action,
+                                    'details', l.details,
+                                    'timestamp', to_char(l.timestamp, 'YYYY-MM-DD HH24:MI:SS')
+                                )
+                            END
+                        ) AS request
+                    FROM request_data rd
+                    LEFT JOIN documents_data d ON rd.request_id = d.request_id
+                    LEFT JOIN requirements_data req ON rd.request_id = req.request_id
+                    LEFT JOIN files_data f ON rd.request_id = f.request_id
+                    LEFT JOIN recent_logs l ON rd.request_id = l.request_id
+                )
+
+                SELECT json_build_object(
+                    'requests', COALESCE(
+                        (SELECT json_agg(p.request ORDER BY p.requested_at DESC) FROM page_rows p),
+                        '[]'::json
+                    ),
+                    'total', (
+                        SELECT COUNT(*)
+                        FROM requests r
+                        LEFT JOIN request_assignments ra ON r.request_id = ra.request_id
+                        {where_sql}
+                    )
+                )::text
+            """, params + [limit, offset] + params)
+
+            return cur.fetchone()[0]
+
+        except Exception as e:
+            conn.rollback()
+            print(f"Error in fetch_requests_json: {e}")
+            return None
+        finally:
+            cur.close()
+
     @staticmethod
     def fetch_requests_original(page=1, limit=20, search=None, admin_id=None, college_code=None, requester_type=None, has_others_docs=None):
         """
@@ -416,17 +609,32 @@ class ManageRequestModel:
                     SET status = %s
                     WHERE request_id = %s
                 """, (new_status, request_id))
+            rows_updated = cur.rowcount
 
-            if cur.rowcount > 0 and admin_id:
+            if rows_updated > 0 and payment_status is not None:
+                # Payment state changed; keep the revenue rollup for that day exact
+                TransactionsModel.refresh_revenue_day(cur, request_id)
+
+            if rows_updated > 0:
+                # Wake tracking pages waiting on this request (delivered on commit)
+                publish_status(cur, request_id)
+
+            if rows_updated > 0 and admin_id:
                 # Log the status change
                 cur.execute("""
                     INSERT INTO logs (admin_id, action, details, request_id)
                     VALUES (%s, %s, %s, %s)
                 """, (admin_id, 'Status Change', f'Changed status of request {request_id} to {new_status}', request_id))
+                # Other workers drop their cached details when this commits
+                ManageRequestModel.notify_request_change(cur, request_id)
                 conn.commit()
+                ManageRequestModel.invalidate_request_cache(request_id)
                 return True
-            elif cur.rowcount > 0:
+            elif rows_updated > 0:
+                # Other workers drop their cached details when this commits
+                ManageRequestModel.notify_request_change(cur, request_id)
                 conn.commit()
+                ManageRequestModel.invalidate_request_cache(request_id)
                 return True
             return False
         finally:
@@ -458,43 +666,100 @@ class ManageRequestModel:
         finally:
             cur.close()
 
+    @staticmethod
+    def lock_admin_assignments(cur, admin_id):
+        """
+        Take a transaction-scoped advisory lock on an admin's assignment slots.
+        Capacity checks and inserts made under this lock cannot interleave with
+        another transaction assigning to the same admin. Released on commit/rollback.
+        """
+        cur.execute(
+            "SELECT pg_advisory_xact_lock(hashtext(%s))",
+            (f"request_assignments:{admin_id}",)
+        )
+
     @staticmethod
     def assign_request_to_admin(request_id, admin_id, assigner_admin_id):
         """Assign a request to an admin, respecting max_requests limit."""
+        return ManageRequestModel.assign_requests_to_admin([request_id], admin_id, assigner_admin_id) > 0
+
+    @staticmethod
+    def assign_requests_to_admin(request_ids, admin_id, assigner_admin_id):
+        """
+        Assign a batch of requests to an admin in a single transaction.
+        Capacity is checked once under the admin's advisory lock, so concurrent
+        manual assigns cannot push the admin past max_requests.
+
+        Returns:
+            int: Number of requests newly assigned to the admin.
+        """
+        request_ids = list(dict.fromkeys(rid for rid in request_ids if rid))
+        if not request_ids:
+            return 0
+
         conn = g.db_conn
         cur = conn.cursor()
         try:
-            # Check if the admin is already at max capacity
-            cur.execute("""
-                SELECT COUNT(*)
-                FROM request_assignments
-                WHERE admin_id = %s
-            """, (admin_id,))
-            current_assigned = cur.fetchone()[0]
+            ManageRequestModel.lock_admin_assignments(cur, admin_id)
 
-            # Get max_requests for the admin
-            max_requests = ManageRequestModel.get_admin_max_requests(admin_id)
+            # Current load (maintained counter) and limit in one round trip
+            cur.execute("""
+                SELECT
+                    COALESCE((SELECT assigned FROM admin_workload WHERE admin_id = %s), 0),
+                    COALESCE(
+                        (SELECT value::int FROM admin_settings WHERE admin_id = %s AND key = 'max_requests'),
+                        10
+                    )
+            """, (admin_id, admin_id))
+            current_assigned, max_requests = cur.fetchone()
 
-            if current_assigned >= max_requests:
+            available = max_requests - current_assigned
+            if available <= 0:
                 print(f"Admin {admin_id} is already at max capacity ({max_requests})")
-                return False  # Cannot assign more
+                conn.rollback()
+                return 0  # Cannot assign more
 
+            # Keep only existing requests not already held by this admin, in the given order
             cur.execute("""
+                SELECT r.request_id, ra.admin_id
+                FROM requests r
+                LEFT JOIN request_assignments ra ON r.request_id = ra.request_id
+                WHERE r.request_id = ANY(%s)
+            """, (request_ids,))
+            current_owner = {row[0]: row[1] for row in cur.fetchall()}
+            to_assign = [
+                rid for rid in request_ids
+                if rid in current_owner and current_owner[rid] != admin_id
+            ][:available]
+
+            if not to_assign:
+                conn.rollback()
+                return 0
+
+            extras.execute_values(cur, """
                 INSERT INTO request_assignments (request_id, admin_id)
-                VALUES (%s, %s)
+                VALUES %s
                 ON CONFLICT (request_id) DO UPDATE SET admin_id = EXCLUDED.admin_id, assigned_at = NOW()
-            """, (request_id, admin_id))
-            # Log the assignment
-            cur.execute("""
+            """, [(rid, admin_id) for rid in to_assign])
+
+            # Log the assignments
+            extras.execute_values(cur, """
                 INSERT INTO logs (admin_id, action, details, request_id)
-                VALUES (%s, %s, %s, %s)
-            """, (assigner_admin_id, 'Request Assignment', f'Assigned request {request_id} to admin {admin_id}', request_id))
+                VALUES %s
+            """, [
+                (assigner_admin_id, 'Request Assignment', f'Assigned request {rid} to admin {admin_id}', rid)
+                for rid in to_assign
+            ])
+            # Other workers drop their cached details when this commits
+            ManageRequestModel.notify_request_change(cur, to_assign)
             conn.commit()
-            return True
+            for rid in to_assign:
+                ManageRequestModel.invalidate_request_cache(rid)
+            return len(to_assign)
         except Exception as e:
             conn.rollback()
-            print(f"Error assigning request {request_id} to admin {admin_id}: {e}")
-            return False
+            print(f"Error assigning requests {request_ids} to admin {admin_id}: {e}")
+            return 0
         finally:
             cur.close()
 
@@ -504,18 +769,23 @@ class ManageRequestModel:
         conn = g.db_conn
         cur = conn.cursor()
         try:
+            # Lock every eligible admin's slots (in email order to avoid deadlocks)
+            # so manual assigns running concurrently cannot overshoot capacity
+            cur.execute("""
+                SELECT pg_advisory_xact_lock(hashtext('request_assignments:' || a.email))
+                FROM (
+                    SELECT email FROM admins WHERE role != 'none' ORDER BY email
+                ) a
+            """)
+
             # Get all admins with their current load and max_requests
             cur.execute("""
                 SELECT a.email,
                        COALESCE(asp.value::int, 10) as max_requests,
-                       COALESCE(assigned.count, 0) as current_assigned
+                       COALESCE(w.assigned, 0) as current_assigned
                 FROM admins a
                 LEFT JOIN admin_settings asp ON a.email = asp.admin_id AND asp.key = 'max_requests'
-                LEFT JOIN (
-                    SELECT admin_id, COUNT(*) as count
-                    FROM request_assignments
-                    GROUP BY admin_id
-                ) assigned ON a.email = assigned.admin_id
+                LEFT JOIN admin_workload w ON a.email = w.admin_id
                 WHERE a.role != 'none'
                 ORDER BY a.email
             """)
@@ -534,11 +804,12 @@ class ManageRequestModel:
 
             # Get the next N unassigned PENDING requests
             cur.execute("""
-                SELECT request_id
-                FROM requests
-                WHERE status = 'PENDING'
-                AND request_id NOT IN (SELECT request_id FROM request_assignments)
-                ORDER BY requested_at ASC
+                SELECT r.request_id
+                FROM requests r
+                WHERE r.status = 'PENDING'
+                AND r.is_assigned = FALSE
+                AND NOT EXISTS (SELECT 1 FROM request_assignments ra WHERE ra.request_id = r.request_id)
+                ORDER BY r.requested_at ASC, r.request_id ASC
                 LIMIT %s
             """, (n,))
             unassigned_requests = cur.fetchall()
@@ -577,7 +848,11 @@ class ManageRequestModel:
                 # Remove admins with no capacity left
                 admin_capacities = [(aid, av) for aid, av in admin_capacities if av > 0]
 
+            # Other workers drop their cached details when this commits
+            ManageRequestModel.notify_request_change(cur, [row[0] for row in unassigned_requests[:assigned_count]])
             conn.commit()
+            for row in unassigned_requests[:assigned_count]:
+                ManageRequestModel.invalidate_request_cache(row[0])
             return assigned_count
         except Exception as e:
             conn.rollback()
@@ -588,6 +863,85 @@ class ManageRequestModel:
 
 
 
+    @staticmethod
+    def get_unassigned_requests(page=1, limit=50, search=None, college_code=None, requester_type=None):
+        """
+        Paginated unassigned PENDING requests for manual assignment.
+        Requester type is resolved in SQL with an EXISTS probe on the
+        auth_letters primary key, so filtering happens before LIMIT/OFFSET.
+        Returns has_more for paging and a total capped at UNASSIGNED_COUNT_CAP,
+        with total_is_capped set when more requests match than that.
+        """
+        conn = g.db_conn
+        cur = conn.cursor()
+        try:
+            page = max(1, page)
+            offset = (page - 1) * limit
+            params = []
+            where_clauses = [
+                "r.status = 'PENDING'",
+                "r.is_assigned = FALSE",
+                "NOT EXISTS (SELECT 1 FROM request_assignments ra WHERE ra.request_id = r.request_id)"
+            ]
+
+            if search:
+                where_clauses.append("(r.full_name ILIKE %s OR r.student_id ILIKE %s OR r.email ILIKE %s OR r.contact_number ILIKE %s OR r.request_id ILIKE %s)")
+                search_param = f"%{search}%"
+                params.extend([search_param] * 5)
+
+            if college_code and college_code != 'all':
+                where_clauses.append("r.college_code = %s")
+                params.append(college_code)
+
+            requester_type = (requester_type or "").lower()
+            if requester_type == "outsider":
+                where_clauses.append("EXISTS (SELECT 1 FROM auth_letters al WHERE al.id = r.request_id)")
+            elif requester_type == "student":
+                where_clauses.append("NOT EXISTS (SELECT 1 FROM auth_letters al WHERE al.id = r.request_id)")
+
+            where_sql = " AND ".join(where_clauses)
+
+            # One extra row tells whether another page exists, so the index-ordered
+            # LIMIT can stop early instead of visiting every match for a window count
+            cur.execute(f"""
+                SELECT r.request_id, r.full_name, r.requested_at, r.college_code,
+                       EXISTS (SELECT 1 FROM auth_letters al WHERE al.id = r.request_id) AS is_outsider
+                FROM requests r
+                WHERE {where_sql}
+                ORDER BY r.requested_at ASC, r.request_id ASC
+                LIMIT %s OFFSET %s
+            """, params + [limit + 1, offset])
+            rows = cur.fetchall()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            # Bounded count: exact up to UNASSIGNED_COUNT_CAP; one row past it marks the cap
+            cur.execute(f"""
+                SELECT COUNT(*) FROM (
+                    SELECT 1 FROM requests r
+                    WHERE {where_sql}
+                    LIMIT %s
+                ) capped
+            """, params + [UNASSIGNED_COUNT_CAP + 1])
+            total = cur.fetchone()[0]
+            total_is_capped = total > UNASSIGNED_COUNT_CAP
+            total = min(total, UNASSIGNED_COUNT_CAP)
+
+            requests = [
+                {
+                    "request_id": row[0],
+                    "full_name": row[1],
+                    "requested_at": row[2].strftime("%Y-%m-%d %H:%M:%S") if row[2] else None,
+                    "college_code": row[3],
+                    "requester_type": "Outsider" if row[4] else "Student"
+                }
+                for row in rows
+            ]
+
+            return {"requests": requests, "total": total, "total_is_capped": total_is_capped, "has_more": has_more}
+        finally:
+            cur.close()
+
     @staticmethod
     def get_assigned_requests_for_admin(admin_id):
         """Get all requests assigned to an admin with completion status."""
@@ -622,22 +976,13 @@ class ManageRequestModel:
         conn = g.db_conn
         cur = conn.cursor()
         try:
-            # Total assigned
             cur.execute("""
-                SELECT COUNT(*)
-                FROM request_assignments
+                SELECT assigned, doc_ready
+                FROM admin_workload
                 WHERE admin_id = %s
             """, (admin_id,))
-            total_assigned = cur.fetchone()[0]
-
-            # Completed (DOC-READY)
-            cur.execute("""
-                SELECT COUNT(*)
-                FROM requests r
-                JOIN request_assignments ra ON r.request_id = ra.request_id
-                WHERE ra.admin_id = %s AND r.status = 'DOC-READY'
-            """, (admin_id,))
-            completed = cur.fetchone()[0]
+            row = cur.fetchone()
+            total_assigned, completed = row if row else (0, 0)
 
             return {"completed": completed, "total": total_assigned}
         finally:
@@ -684,8 +1029,7 @@ class ManageRequestModel:
     @staticmethod
     def delete_request(request_id, admin_id):
         """Delete a request and all associated data, and log the deletion."""
-        from supabase import create_client, Client
-        from config import SUPABASE_URL, SUPABASE_ANON_KEY
+        from app.services.supabase_file_service import get_supabase_client
 
         conn = g.db_conn
         cur = conn.cursor()
@@ -700,7 +1044,7 @@ class ManageRequestModel:
 
             # Delete files from Supabase
             if files:
-                supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+                supabase = get_supabase_client()
                 file_paths_to_delete = []
                 for file_row in files:
                     file_path = file_row[0]
@@ -715,6 +1059,9 @@ class ManageRequestModel:
                         print(f"Error deleting files from Supabase: {e}")
                         # Continue with DB deletion even if Supabase fails
 
+            # Day whose revenue rollup loses this request, read before it is gone
+            revenue_day = TransactionsModel.revenue_day(cur, request_id)
+
             # Log the deletion
             cur.execute("""
                 INSERT INTO logs (admin_id, action, details, request_id)
@@ -744,9 +1091,14 @@ class ManageRequestModel:
                 DELETE FROM requests
                 WHERE request_id = %s
             """, (request_id,))
+            deleted = cur.rowcount
 
+            TransactionsModel.refresh_revenue_day(cur, day=revenue_day)
+            # Other workers drop their cached details when this commits
+            ManageRequestModel.notify_request_change(cur, request_id)
             conn.commit()
-            return cur.rowcount > 0  # Return True if at least one row was deleted
+            ManageRequestModel.invalidate_request_cache(request_id)
+            return deleted > 0  # Return True if at least one row was deleted
         except Exception as e:
             conn.rollback()
             print(f"Error deleting request {request_id}: {e}")
@@ -777,6 +1129,7 @@ class ManageRequestModel:
                 SET status = 'REJECTED'
                 WHERE request_id = %s
             """, (request_id,))
+            publish_status(cur, request_id)
             
             # Log the action
             cur.execute("""
@@ -784,7 +1137,10 @@ class ManageRequestModel:
                 VALUES (%s, 'Request Changes', %s, %s)
             """, (admin_id, f'Requested changes for {request_id}. Status set to REJECTED.', request_id))
             
+            # Other workers drop their cached details when this commits
+            ManageRequestModel.notify_request_change(cur, request_id)
             conn.commit()
+            ManageRequestModel.invalidate_request_cache(request_id)
             return True
         except Exception as e:
             conn.rollback()
@@ -802,7 +1158,7 @@ class ManageRequestModel:
         conn = g.db_conn
         cur = conn.cursor()
         try:
-            cur.execute("SELECT value FROM admin_settings WHERE admin_id = %s AND key = 'max_requests'", (admin_id,))
+            execute_prepared(cur, "admin_max_requests", (admin_id,))
             row = cur.fetchone()
             return int(row[0]) if row else 10
         finally:
@@ -863,9 +1219,20 @@ class ManageRequestModel:
     @staticmethod
     def get_request_by_id(request_id):
         """
-        OPTIMIZED: Fetch a single request by ID with all details using JSON aggregation.
-        Fully aligned with current PostgreSQL schema.
+        OPTIMIZED: Fetch a single request by ID with all details, recent log and
+        changes in one JSON-aggregated query. Results are served from
+        request_detail_cache until a write invalidates them.
+        Timing of the path taken is left on g.request_detail_timing.
         """
+        started = time.perf_counter()
+        cached = request_detail_cache.get(request_id)
+        # Taken before the query so a write committed meanwhile keeps its result out of the cache
+        cache_generation = request_detail_cache.generation
+        if cached is not None:
+            g.request_detail_timing = {"source": "cache", "ms": (time.perf_counter() - started) * 1000}
+            # Deep copy: callers may edit the nested document / requirement lists
+            return copy.deepcopy(cached)
+
         conn = g.db_conn
         cur = conn.cursor(cursor_factory=extras.RealDictCursor)
 
@@ -983,6 +1350,44 @@ class ManageRequestModel:
                     FROM others_docs od
                     WHERE od.request_id = %s
                     GROUP BY od.request_id
+                ),
+
+                recent_log_data AS (
+                    SELECT
+                        l.request_id,
+                        json_build_object(
+                            'admin_id', l.admin_id,
+                            'action', l.action,
+                            'details', l.details,
+                            'timestamp', to_char(l.timestamp, 'YYYY-MM-DD HH24:MI:SS')
+                        ) AS recent_log
+                    FROM logs l
+                    WHERE l.request_id = %s
+                    ORDER BY l.timestamp DESC
+                    LIMIT 1
+                ),
+
+                changes_data AS (
+                    SELECT
+                        c.request_id,
+                        json_agg(
+                            json_build_object(
+                                'change_id', c.change_id,
+                                'admin_id', c.admin_id,
+                                'requirement_id', c.requirement_id,
+                                'requirement_name', COALESCE(r.requirement_name, 'Unknown Requirement'),
+                                'remarks', c.remarks,
+                                'file_link', c.file_link,
+                                'status', c.status,
+                                'created_at', to_char(c.created_at, 'YYYY-MM-DD HH24:MI:SS'),
+                                'updated_at', to_char(c.updated_at, 'YYYY-MM-DD HH24:MI:SS')
+                            )
+                            ORDER BY c.created_at DESC
+                        ) AS changes
+                    FROM changes c
+                    LEFT JOIN requirements r ON c.requirement_id = r.req_id
+                    WHERE c.request_id = %s
+                    GROUP BY c.request_id
                 )
 
                 SELECT
@@ -993,14 +1398,18 @@ class ManageRequestModel:
                     COALESCE(req.requirements, '[]'::json) AS requirements,
                     COALESCE(req.all_requirements, '[]'::json) AS all_requirements,
                     COALESCE(files.uploaded_files, '[]'::json) AS uploaded_files,
-                    COALESCE(others.others_documents, '[]'::json) AS others_documents
+                    COALESCE(others.others_documents, '[]'::json) AS others_documents,
+                    logs.recent_log,
+                    COALESCE(chg.changes, '[]'::json) AS changes
                 FROM request_base rb
                 LEFT JOIN auth_letter_data auth ON auth.request_id = rb.request_id
                 LEFT JOIN documents_data doc ON doc.request_id = rb.request_id
                 LEFT JOIN requirements_data req ON req.request_id = rb.request_id
                 LEFT JOIN uploaded_files_data files ON files.request_id = rb.request_id
                 LEFT JOIN others_docs_data others ON others.request_id = rb.request_id
-            """, (request_id,) * 6)
+                LEFT JOIN recent_log_data logs ON logs.request_id = rb.request_id
+                LEFT JOIN changes_data chg ON chg.request_id = rb.request_id
+            """, (request_id,) * 8)
 
             result = cur.fetchone()
             if not result:
@@ -1011,17 +1420,24 @@ class ManageRequestModel:
             # Normalize datetime
             if request_data.get("requested_at"):
                 request_data["requested_at"] = request_data["requested_at"].strftime("%Y-%m-%d %H:%M:%S")
+            # HTTP-date, the form the request view pages have always displayed
+            if request_data.get("payment_date"):
+                request_data["payment_date"] = http_date(request_data["payment_date"])
 
-            # Attach logs & changes
-            recent_logs = ManageRequestModel.get_recent_logs_for_request(request_id, limit=1)
-            request_data["recent_log"] = recent_logs[0] if recent_logs else None
-            request_data["changes"] = ManageRequestModel.get_request_changes(request_id)
-
-            return request_data
+            request_detail_cache.set(request_id, request_data, generation=cache_generation)
+            g.request_detail_timing = {"source": "query", "ms": (time.perf_counter() - started) * 1000}
+            return copy.deepcopy(request_data)
 
         except Exception as e:
-            print(f"Error in optimized get_request_by_id: {e}")
-            return ManageRequestModel.get_request_by_id_original(request_id)
+            conn.rollback()
+            request_data = ManageRequestModel.get_request_by_id_original(request_id)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            g.request_detail_timing = {"source": "fallback", "ms": elapsed_ms}
+            current_app.logger.warning(
+                f"get_request_by_id fell back to get_request_by_id_original for {request_id} "
+                f"({elapsed_ms:.1f} ms): {e}"
+            )
+            return request_data
 
         finally:
             cur.close()
@@ -1059,7 +1475,7 @@ class ManageRequestModel:
                 "payment_status": req[10],
                 "college_code": req[11],
                 "pickup_option": req[12],
-                "payment_date": req[13],
+                "payment_date": http_date(req[13]) if req[13] else None,
                 "payment_reference": req[14],
                 "payment_type": req[15]
             }
@@ -1202,7 +1618,10 @@ class ManageRequestModel:
                 """, (admin_id, 'Document Status Toggled', 
                       f'Toggled document {doc_id} completion status to {"completed" if new_status else "not completed"} for request {request_id}', 
                       request_id))
+                # Other workers drop their cached details when this commits
+                ManageRequestModel.notify_request_change(cur, request_id)
                 conn.commit()
+                ManageRequestModel.invalidate_request_cache(request_id)
                 return True, new_status
             else:
                 return False, "Failed to update document status"
@@ -1248,7 +1667,10 @@ class ManageRequestModel:
                 """, (admin_id, 'Others Document Status Toggled', 
                       f'Toggled others document {doc_id} completion status to {"completed" if new_status else "not completed"} for request {request_id}', 
                       request_id))
+                # Other workers drop their cached details when this commits
+                ManageRequestModel.notify_request_change(cur, request_id)
                 conn.commit()
+                ManageRequestModel.invalidate_request_cache(request_id)
                 return True, new_status
             else:
                 return False, "Failed to update others document status"
@@ -1258,3 +1680,11 @@ class ManageRequestModel:
             return False, str(e)
         finally:
             cur.close()
+
+
+def _on_request_cache_notify(payload):
+    request_detail_cache.invalidate(payload)
+
+
+# Anything may have changed while the shared listener was not connected
+subscribe(REQUEST_CACHE_CHANNEL, _on_request_cache_notify, on_reconnect=request_detail_cache.clear)
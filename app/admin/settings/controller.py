@@ -3,12 +3,16 @@
 from . import settings_bp
 from flask import jsonify, request, current_app
 from app.utils.decorator import jwt_required_with_role
-from .models import Admin, OpenRequestRestriction, Fee, AvailableDates
+from .models import Admin, OpenRequestRestriction, Fee, AvailableDates, WEEKDAY_NAMES
 from flask_jwt_extended import jwt_required
+from datetime import datetime
 import json
 
 role = "admin"
 
+# Largest start_date..end_date span accepted by the bulk date endpoint
+MAX_BULK_RANGE_DAYS = 731
+
 @settings_bp.route("/api/admin/admins", methods=["GET"])
 @jwt_required()
 def get_admins():
@@ -231,22 +235,50 @@ def delete_available_date(date):
 @settings_bp.route("/api/admin/available-dates/bulk", methods=["POST"])
 @jwt_required()
 def bulk_update_dates():
-    """Bulk update availability for multiple dates."""
+    """
+    Bulk update availability for multiple dates.
+    Accepts a "dates" array and/or a "start_date"/"end_date" range with an
+    optional "weekdays" filter (e.g. ["Saturday", "Sunday"]).
+    """
     data = request.get_json(silent=True) or {}
     dates = data.get("dates", [])
+    start_date = data.get("start_date")
+    end_date = data.get("end_date")
+    weekdays = data.get("weekdays")
     is_available = data.get("is_available")
     reason = data.get("reason", "")
 
-    if not dates or is_available is None:
-        return jsonify({"error": "dates array and is_available are required"}), 400
+    if is_available is None or (not dates and not (start_date and end_date)):
+        return jsonify({"error": "dates array or start_date/end_date range, and is_available are required"}), 400
+
+    if not isinstance(dates, list):
+        return jsonify({"error": "dates must be an array"}), 400
 
-    if not isinstance(dates, list) or len(dates) == 0:
-        return jsonify({"error": "dates must be a non-empty array"}), 400
+    if start_date or end_date:
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d").date()
+            end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            return jsonify({"error": "start_date and end_date must be YYYY-MM-DD"}), 400
+        if end < start:
+            return jsonify({"error": "end_date must not be before start_date"}), 400
+        if (end - start).days > MAX_BULK_RANGE_DAYS:
+            return jsonify({"error": f"Date range cannot exceed {MAX_BULK_RANGE_DAYS} days"}), 400
+
+    if weekdays is not None:
+        if not isinstance(weekdays, list) or any(day not in WEEKDAY_NAMES for day in weekdays):
+            return jsonify({"error": f"weekdays must be an array of: {', '.join(WEEKDAY_NAMES)}"}), 400
 
     try:
-        if AvailableDates.bulk_update(dates, is_available, reason):
-            current_app.logger.info(f"Bulk updated {len(dates)} dates to {is_available}")
-            return jsonify({"message": f"Successfully updated {len(dates)} dates"}), 200
+        counts = AvailableDates.bulk_update(dates, is_available, reason, start_date, end_date, weekdays)
+        if counts is not None:
+            total = counts["inserted"] + counts["updated"]
+            current_app.logger.info(f"Bulk updated {total} dates to {is_available} ({counts['inserted']} inserted, {counts['updated']} updated)")
+            return jsonify({
+                "message": f"Successfully updated {total} dates",
+                "inserted": counts["inserted"],
+                "updated": counts["updated"]
+            }), 200
         else:
             return jsonify({"error": "Failed to bulk update dates"}), 500
     except Exception as e:
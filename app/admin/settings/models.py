@@ -2,6 +2,9 @@
 from flask import g
 from app import db_pool
 import json
+from app.utils.prepared_statements import execute_prepared
+from app.utils.schedule import invalidate_schedule, notify_schedule_change
+from app.utils.fee_registry import get_fee, invalidate_fees, notify_fee_change
 
 class OpenRequestRestriction:
     @staticmethod
@@ -10,7 +13,7 @@ class OpenRequestRestriction:
         conn = g.db_conn
         cur = conn.cursor()
         try:
-            cur.execute("SELECT start_time, end_time, available_days, announcement FROM open_request_restriction WHERE id = 1")
+            execute_prepared(cur, "restriction_settings")
             row = cur.fetchone()
             if row:
                 # Handle available_days properly - it's stored as JSONB but may need parsing
@@ -51,7 +54,10 @@ class OpenRequestRestriction:
                     available_days = EXCLUDED.available_days,
                     announcement = EXCLUDED.announcement
             """, (start_time, end_time, json.dumps(available_days), announcement))
+            # Other workers drop their cached schedule when this commits
+            notify_schedule_change(cur)
             conn.commit()
+            invalidate_schedule()
             return True
         except Exception as e:
             conn.rollback()
@@ -135,15 +141,8 @@ class Admin:
 class Fee:
     @staticmethod
     def get_value(key):
-        """Fetch fee value by key."""
-        conn = g.db_conn
-        cur = conn.cursor()
-        try:
-            cur.execute("SELECT value FROM fee WHERE key = %s", (key,))
-            row = cur.fetchone()
-            return row[0] if row else 0.0
-        finally:
-            cur.close()
+        """Fetch fee value by key from the in-process fee registry."""
+        return get_fee(key)
 
     @staticmethod
     def update_value(key, value):
@@ -155,7 +154,10 @@ class Fee:
                 INSERT INTO fee (key, value) VALUES (%s, %s)
                 ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
             """, (key, value))
+            # Other workers drop their cached fees when this commits
+            notify_fee_change(cur, key)
             conn.commit()
+            invalidate_fees()
             return True
         except Exception as e:
             conn.rollback()
@@ -164,6 +166,8 @@ class Fee:
         finally:
             cur.close()
 
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
 class AvailableDates:
     @staticmethod
     def get_all():
@@ -238,7 +242,10 @@ class AvailableDates:
                     reason = EXCLUDED.reason,
                     updated_at = CURRENT_TIMESTAMP
             """, (date_str, is_available, reason))
+            # Other workers drop their cached schedule when this commits
+            notify_schedule_change(cur)
             conn.commit()
+            invalidate_schedule()
             return True
         except Exception as e:
             conn.rollback()
@@ -254,8 +261,12 @@ class AvailableDates:
         cur = conn.cursor()
         try:
             cur.execute("DELETE FROM available_dates WHERE date = %s", (date_str,))
+            deleted = cur.rowcount
+            # Other workers drop their cached schedule when this commits
+            notify_schedule_change(cur)
             conn.commit()
-            return cur.rowcount > 0
+            invalidate_schedule()
+            return deleted > 0
         except Exception as e:
             conn.rollback()
             print(f"Error deleting available date for {date_str}: {e}")
@@ -264,26 +275,52 @@ class AvailableDates:
             cur.close()
 
     @staticmethod
-    def bulk_update(date_list, is_available, reason=""):
-        """Bulk update availability for multiple dates."""
+    def bulk_update(date_list, is_available, reason="", start_date=None, end_date=None, weekdays=None):
+        """
+        Bulk update availability for a set of dates in a single statement.
+
+        Dates come from date_list and/or the start_date..end_date range, which
+        is expanded on the server and optionally limited to the given weekday
+        names (e.g. ["Saturday", "Sunday"]).
+
+        Returns:
+            dict: {"inserted": int, "updated": int}, or None on failure.
+        """
+        weekday_numbers = None
+        if weekdays:
+            # ISO day numbers, Monday = 1 ... Sunday = 7
+            weekday_numbers = [WEEKDAY_NAMES.index(day) + 1 for day in weekdays]
+
         conn = g.db_conn
         cur = conn.cursor()
         try:
-            for date_str in date_list:
-                cur.execute("""
-                    INSERT INTO available_dates (date, is_available, reason)
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT (date) DO UPDATE SET
-                        is_available = EXCLUDED.is_available,
-                        reason = EXCLUDED.reason,
-                        updated_at = CURRENT_TIMESTAMP
-                """, (date_str, is_available, reason))
+            cur.execute("""
+                WITH target_dates AS (
+                    SELECT d AS date FROM unnest(%s::date[]) AS d
+                    UNION
+                    SELECT d::date FROM generate_series(%s::date, %s::date, INTERVAL '1 day') AS d
+                    WHERE %s::int[] IS NULL OR EXTRACT(ISODOW FROM d)::int = ANY(%s::int[])
+                )
+                INSERT INTO available_dates (date, is_available, reason)
+                SELECT date, %s, %s FROM target_dates
+                ON CONFLICT (date) DO UPDATE SET
+                    is_available = EXCLUDED.is_available,
+                    reason = EXCLUDED.reason,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING (xmax = 0) AS inserted
+            """, (list(date_list or []), start_date, end_date, weekday_numbers, weekday_numbers, is_available, reason))
+            rows = cur.fetchall()
+            # Other workers drop their cached schedule when this commits
+            notify_schedule_change(cur)
             conn.commit()
-            return True
+            invalidate_schedule()
+
+            inserted = sum(1 for row in rows if row[0])
+            return {"inserted": inserted, "updated": len(rows) - inserted}
         except Exception as e:
             conn.rollback()
             print(f"Error bulk updating available dates: {e}")
-            return False
+            return None
         finally:
             cur.close()
 
@@ -293,9 +330,7 @@ class AvailableDates:
         conn = g.db_conn
         cur = conn.cursor()
         try:
-            cur.execute("""
-                SELECT is_available FROM available_dates WHERE date = %s
-            """, (date_str,))
+            execute_prepared(cur, "date_availability", (date_str,))
             row = cur.fetchone()
             
             if row:
@@ -4,6 +4,8 @@ from app.utils.decorator import jwt_required_with_role
 from flask_jwt_extended import get_jwt_identity
 from .models import TransactionsModel
 from flask_jwt_extended import jwt_required
+from app.utils.export import export_response, ExportLimitReached
+from datetime import datetime
 
 @transactions_bp.route("/api/admin/transactions", methods=["GET"])
 @jwt_required()
@@ -15,14 +17,17 @@ def get_transactions():
 		end_date = request.args.get('end_date')
 		search = request.args.get('search')
 		sort = request.args.get('sort', 'desc')
+		# Opaque keyset cursor from a previous page's next_cursor; overrides page
+		cursor = request.args.get('cursor')
 
 		result = TransactionsModel.get_transactions(
-				page=page, limit=limit, start_date=start_date, end_date=end_date, search=search, sort=sort
+				page=page, limit=limit, start_date=start_date, end_date=end_date, search=search, sort=sort, cursor=cursor
 		)
 		return jsonify({
 				'transactions': result['transactions'], 
 				'total': result['total'], 
-				'total_pages': result['total_pages']
+				'total_pages': result['total_pages'],
+				'next_cursor': result.get('next_cursor')
 		}), 200
 	except Exception as e:
 		return jsonify({'error': str(e)}), 500
@@ -41,3 +46,30 @@ def get_summary():
 		return jsonify(result), 200
 	except Exception as e:
 		return jsonify({'error': str(e)}), 500
+
+
+@transactions_bp.route('/api/admin/transactions/export', methods=['GET'])
+@jwt_required()
+def export_transactions():
+	try:
+		# streams every transaction matching the list filters as csv (default) or xlsx
+		export_format = request.args.get('format', 'csv').lower()
+		start_date = request.args.get('start_date')
+		end_date = request.args.get('end_date')
+		search = request.args.get('search')
+		sort = request.args.get('sort', 'desc')
+
+		query, params, header = TransactionsModel.build_export_query(
+				start_date=start_date, end_date=end_date, search=search, sort=sort
+		)
+		filename = f"transactions_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+		response = export_response(export_format, query, params, header, filename)
+		if response is None:
+			return jsonify({'error': f'Unsupported export format: {export_format}'}), 400
+		return response
+	except ExportLimitReached:
+		response = jsonify({'error': 'Too many exports are running; try again shortly'})
+		response.headers['Retry-After'] = '30'
+		return response, 503
+	except Exception as e:
+		return jsonify({'error': str(e)}), 500
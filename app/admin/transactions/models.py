@@ -1,63 +1,186 @@
 from flask import current_app
 from app import db_pool
+from config import USE_REVENUE_ROLLUP
+import re
+
+DATE_ONLY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
 
 
 class TransactionsModel:
+  # Fully paid, or partially paid (at least one paid document), over requests r
+  PAID_CONDITION = """(r.payment_status = TRUE OR EXISTS (
+        SELECT 1 FROM request_documents rd
+        WHERE rd.request_id = r.request_id AND rd.payment_status = TRUE
+      ))"""
+
   @staticmethod
-  def get_transactions(page=1, limit=20, start_date=None, end_date=None, search=None, sort='desc'):
-    conn = db_pool.getconn()
-    cur = conn.cursor()
-    try:
-      base_query = """
-        SELECT 
-            r.request_id, 
-            r.student_id, 
-            r.full_name, 
-            r.total_cost, 
-            r.payment_status, 
-            r.payment_date, 
-            r.admin_fee_amount,
-            (SELECT MAX(payment_date) FROM request_documents WHERE request_id = r.request_id AND payment_status = TRUE) as latest_doc_date,
-            (SELECT SUM(d.cost * rd.quantity) 
-             FROM request_documents rd 
-             JOIN documents d ON rd.doc_id = d.doc_id 
-             WHERE rd.request_id = r.request_id AND rd.payment_status = TRUE) as paid_docs_cost
+  def transaction_filters(start_date=None, end_date=None, search=None):
+    """AND-ed filter SQL over requests r, shared by every transactions query. Returns (sql, params)."""
+    filters = ""
+    params = []
+    if start_date:
+      filters += " AND r.requested_at >= %s"
+      params.append(start_date)
+    if end_date:
+      filters += " AND r.requested_at <= %s"
+      params.append(end_date)
+    if search:
+      # Search by request id, student id or full_name
+      filters += " AND (CAST(r.request_id AS TEXT) ILIKE %s OR r.student_id ILIKE %s OR r.full_name ILIKE %s)"
+      search_term = f"%{search}%"
+      params.extend([search_term, search_term, search_term])
+    return filters, params
+
+  @staticmethod
+  def transactions_cte(start_date=None, end_date=None, search=None):
+    """
+    CTEs shared by the transactions summary and export (whole filtered set):
+      base      - requests matching the filters
+      paid_docs - their paid documents, aggregated once per request
+      txns      - fully or partially paid requests with the aggregates joined
+    Returns (sql, params).
+    """
+    filters, params = TransactionsModel.transaction_filters(start_date, end_date, search)
+
+    cte = f"""
+      WITH base AS (
+        SELECT r.request_id, r.student_id, r.full_name, r.payment_status,
+               r.payment_date, r.admin_fee_amount, r.requested_at
         FROM requests r
-        WHERE TRUE
-      """
+        WHERE TRUE{filters}
+      ),
+      paid_docs AS (
+        SELECT rd.request_id,
+               MAX(rd.payment_date) AS latest_doc_date,
+               SUM(d.cost * rd.quantity) AS paid_docs_cost
+        FROM request_documents rd
+        JOIN base b ON b.request_id = rd.request_id
+        JOIN documents d ON d.doc_id = rd.doc_id
+        WHERE rd.payment_status = TRUE
+        GROUP BY rd.request_id
+      ),
+      txns AS MATERIALIZED (
+        SELECT b.*, pd.latest_doc_date, pd.paid_docs_cost
+        FROM base b
+        LEFT JOIN paid_docs pd ON pd.request_id = b.request_id
+        -- Include partial payments: either fully paid or has paid documents
+        WHERE b.payment_status = TRUE OR pd.request_id IS NOT NULL
+      )
+    """
+    return cte, params
 
-      params = []
-      if start_date:
-        base_query += " AND r.requested_at >= %s"
-        params.append(start_date)
-      if end_date:
-        base_query += " AND r.requested_at <= %s"
-        params.append(end_date)
-      
-      # Include partial payments: either fully paid or has paid documents
-      base_query += " AND (r.payment_status = TRUE OR EXISTS (SELECT 1 FROM request_documents rd WHERE rd.request_id = r.request_id AND rd.payment_status = TRUE))"
-
-      if search:
-        # Search by request id, student id or full_name
-        base_query += " AND (CAST(r.request_id AS TEXT) ILIKE %s OR r.student_id ILIKE %s OR r.full_name ILIKE %s)"
-        search_term = f"%{search}%"
-        params.extend([search_term, search_term, search_term])
-
-      sort_order = 'DESC' if sort == 'desc' else 'ASC'
-      count_query = f"SELECT COUNT(*) FROM ({base_query}) as q"
-      cur.execute(count_query, tuple(params))
-      total = cur.fetchone()[0]
+  @staticmethod
+  def build_transactions_query(page=1, limit=20, start_date=None, end_date=None, search=None, sort='desc', cursor=None):
+    """
+    One statement for a transactions page and the total count. Paging is
+    keyset on (requested_at, request_id) when a cursor is given, OFFSET otherwise.
 
-      total_pages = (total + limit - 1) // limit if limit > 0 else 1
+    The page walks requests in (requested_at, request_id) index order with the
+    keyset predicate and LIMIT applied there, so only the page's rows get their
+    paid documents aggregated. The total is a separate plain COUNT.
+    Returns (sql, params).
+    """
+    filters, filter_params = TransactionsModel.transaction_filters(start_date, end_date, search)
+    sort_order = 'DESC' if sort == 'desc' else 'ASC'
+
+    keyset = ""
+    keyset_params = []
+    offset = (page - 1) * limit
+    if cursor:
+      cursor_at, cursor_id = cursor
+      keyset = f" AND (r.requested_at, r.request_id) {'<' if sort_order == 'DESC' else '>'} (%s::timestamp, %s)"
+      keyset_params = [cursor_at, cursor_id]
+      offset = 0
 
-      offset = (page - 1) * limit
-      paginated_query = f"{base_query} ORDER BY r.requested_at {sort_order} LIMIT %s OFFSET %s"
-      params.extend([limit, offset])
-      cur.execute(paginated_query, tuple(params))
+    query = f"""
+      WITH page AS (
+        SELECT r.request_id, r.student_id, r.full_name, r.payment_status,
+               r.payment_date, r.admin_fee_amount, r.requested_at
+        FROM requests r
+        WHERE {TransactionsModel.PAID_CONDITION}{filters}{keyset}
+        ORDER BY r.requested_at {sort_order}, r.request_id {sort_order}
+        LIMIT %s OFFSET %s
+      )
+      SELECT c.total, p.request_id, p.student_id, p.full_name, p.payment_status,
+             p.payment_date, p.admin_fee_amount, pd.latest_doc_date, pd.paid_docs_cost, p.requested_at
+      FROM (
+        SELECT COUNT(*) AS total FROM requests r
+        WHERE {TransactionsModel.PAID_CONDITION}{filters}
+      ) c
+      LEFT JOIN (
+        page p
+        LEFT JOIN LATERAL (
+          SELECT MAX(rd.payment_date) AS latest_doc_date,
+                 SUM(d.cost * rd.quantity) AS paid_docs_cost
+          FROM request_documents rd
+          JOIN documents d ON d.doc_id = rd.doc_id
+          WHERE rd.request_id = p.request_id AND rd.payment_status = TRUE
+        ) pd ON TRUE
+      ) ON TRUE
+      ORDER BY p.requested_at {sort_order}, p.request_id {sort_order}
+    """
+    params = filter_params + keyset_params + [limit, offset] + filter_params
+    return query, params
+
+  @staticmethod
+  def build_export_query(start_date=None, end_date=None, search=None, sort='desc'):
+    """
+    Every transaction matching the get_transactions filters, in list order,
+    for CSV/XLSX export. Returns (sql, params, header).
+    """
+    cte, params = TransactionsModel.transactions_cte(start_date, end_date, search)
+    sort_order = 'DESC' if sort == 'desc' else 'ASC'
+    query = f"""
+      {cte}
+      SELECT
+        t.request_id,
+        t.student_id,
+        t.full_name,
+        COALESCE(t.paid_docs_cost, 0) + COALESCE(t.admin_fee_amount, 0) AS amount,
+        COALESCE(t.payment_status, FALSE) AS paid,
+        to_char(CASE WHEN t.payment_status THEN t.payment_date ELSE t.latest_doc_date END, 'YYYY-MM-DD"T"HH24:MI:SS') AS payment_date,
+        COALESCE(t.admin_fee_amount, 0) AS admin_fee,
+        NOT COALESCE(t.payment_status, FALSE) AS is_partial
+      FROM txns t
+      ORDER BY t.requested_at {sort_order}, t.request_id {sort_order}
+    """
+    header = ["request_id", "student_id", "full_name", "amount", "paid", "payment_date", "admin_fee", "is_partial"]
+    return query, params, header
+
+  @staticmethod
+  def encode_cursor(requested_at, request_id):
+    return f"{requested_at.isoformat()}|{request_id}"
+
+  @staticmethod
+  def decode_cursor(cursor):
+    """Split an encoded cursor into (requested_at, request_id); None if malformed."""
+    if not cursor or "|" not in cursor:
+      return None
+    requested_at, request_id = cursor.split("|", 1)
+    return requested_at, request_id
+
+  @staticmethod
+  def get_transactions(page=1, limit=20, start_date=None, end_date=None, search=None, sort='desc', cursor=None):
+    conn = db_pool.getconn()
+    cur = conn.cursor()
+    try:
+      query, params = TransactionsModel.build_transactions_query(
+        page, limit, start_date, end_date, search, sort, TransactionsModel.decode_cursor(cursor)
+      )
+      cur.execute(query, tuple(params))
       rows = cur.fetchall()
 
+      total = rows[0][0] if rows else 0
+      total_pages = (total + limit - 1) // limit if limit > 0 else 1
+
       results = []
+      last_row = None
       for row in rows:
+        if row[1] is None:
+          # Count-only row: the page itself is empty
+          continue
+        last_row = row
+
         # Determine payment date: if main status is true, use main date, else use latest doc date
         payment_date = row[5]
         latest_doc_date = row[7]
@@ -69,10 +192,10 @@ class TransactionsModel:
         total_paid = paid_docs_cost + admin_fee
 
         results.append({
-          'transaction_id': row[0],
-          'request_id': row[0],
-          'student_id': row[1],
-          'full_name': row[2],
+          'transaction_id': row[1],
+          'request_id': row[1],
+          'student_id': row[2],
+          'full_name': row[3],
           'amount': total_paid,
           'paid': bool(row[4]),
           'payment_date': final_payment_date.isoformat() if final_payment_date else None,
@@ -80,10 +203,15 @@ class TransactionsModel:
           'is_partial': not bool(row[4])
         })
 
+      next_cursor = None
+      if last_row is not None and len(results) == limit and last_row[9] is not None:
+        next_cursor = TransactionsModel.encode_cursor(last_row[9], last_row[1])
+
       return {
         'transactions': results,
         'total': total,
-        'total_pages': total_pages
+        'total_pages': total_pages,
+        'next_cursor': next_cursor
       }
     except Exception as e:
       current_app.logger.error(f"Error fetching transactions: {e}")
@@ -101,50 +229,23 @@ class TransactionsModel:
     conn = db_pool.getconn()
     cur = conn.cursor()
     try:
-      base_query = """
-        FROM requests r
-        WHERE TRUE
-      """
-      params = []
-      
-      if start_date:
-        base_query += " AND r.requested_at >= %s"
-        params.append(start_date)
-      if end_date:
-        base_query += " AND r.requested_at <= %s"
-        params.append(end_date)
-      if search:
-        base_query += " AND (CAST(r.request_id AS TEXT) ILIKE %s OR r.student_id ILIKE %s OR r.full_name ILIKE %s)"
-        search_term = f"%{search}%"
-        params.extend([search_term, search_term, search_term])
-
-      # Total Amount (Paid only - Full + Partial)
-      query_paid = f"""
-        SELECT COALESCE(SUM(
-            (SELECT COALESCE(SUM(d.cost * rd.quantity), 0) 
-             FROM request_documents rd 
-             JOIN documents d ON rd.doc_id = d.doc_id 
-             WHERE rd.request_id = r.request_id AND rd.payment_status = TRUE)
-            + COALESCE(r.admin_fee_amount, 0)
-        ), 0)
-        {base_query} 
-        AND (r.payment_status = TRUE OR EXISTS (SELECT 1 FROM request_documents rd WHERE rd.request_id = r.request_id AND rd.payment_status = TRUE))
-      """
-      cur.execute(query_paid, tuple(params))
-      total_amount = cur.fetchone()[0]
-
-      # Total Transactions (Count of all matching filters)
-      query_count = f"SELECT COUNT(*) {base_query}"
-      cur.execute(query_count, tuple(params))
-      total_count = cur.fetchone()[0]
-
-      # Total Paid Requests (Full + Partial)
-      query_paid_count = f"""
-        SELECT COUNT(*) {base_query} 
-        AND (r.payment_status = TRUE OR EXISTS (SELECT 1 FROM request_documents rd WHERE rd.request_id = r.request_id AND rd.payment_status = TRUE))
-      """
-      cur.execute(query_paid_count, tuple(params))
-      total_paid = cur.fetchone()[0]
+      if TransactionsModel.can_use_revenue_rollup(start_date, end_date, search):
+        return TransactionsModel.get_summary_from_rollup(cur, start_date, end_date)
+
+      cte, params = TransactionsModel.transactions_cte(start_date, end_date, search)
+      # Total Amount (Paid only - Full + Partial), Total Transactions (all matching
+      # filters) and Total Paid Requests (Full + Partial) in one pass over base
+      cur.execute(f"""
+        {cte}
+        SELECT
+          COALESCE(SUM(COALESCE(pd.paid_docs_cost, 0) + COALESCE(b.admin_fee_amount, 0))
+            FILTER (WHERE b.payment_status = TRUE OR pd.request_id IS NOT NULL), 0),
+          COUNT(*),
+          COUNT(*) FILTER (WHERE b.payment_status = TRUE OR pd.request_id IS NOT NULL)
+        FROM base b
+        LEFT JOIN paid_docs pd ON pd.request_id = b.request_id
+      """, tuple(params))
+      total_amount, total_count, total_paid = cur.fetchone()
 
       return {
         'total_amount_completed': float(total_amount),
@@ -153,4 +254,139 @@ class TransactionsModel:
       }
     finally:
       cur.close()
-      db_pool.putconn(conn)
\ No newline at end of file
+      db_pool.putconn(conn)
+
+  @staticmethod
+  def can_use_revenue_rollup(start_date, end_date, search):
+    """The daily_revenue rollup answers whole-day ranges without a search term."""
+    if not USE_REVENUE_ROLLUP or search:
+      return False
+    return all(value is None or DATE_ONLY.match(value) for value in (start_date, end_date))
+
+  @staticmethod
+  def get_summary_from_rollup(cur, start_date=None, end_date=None):
+    """
+    Summary for a date range from daily_revenue. The live filter is
+    requested_at <= end_date, i.e. up to midnight of the end date, so the
+    rollup covers [start_date, end_date) and requests stamped exactly at
+    end_date midnight are added from the requests table.
+    """
+    rollup_filters = ""
+    rollup_params = []
+    count_filters = ""
+    count_params = []
+    if start_date:
+      rollup_filters += " AND day >= %s::date"
+      rollup_params.append(start_date)
+      count_filters += " AND r.requested_at >= %s"
+      count_params.append(start_date)
+    if end_date:
+      rollup_filters += " AND day < %s::date"
+      rollup_params.append(end_date)
+      count_filters += " AND r.requested_at <= %s"
+      count_params.append(end_date)
+
+    edge_query = "SELECT 0::numeric AS paid_amount, 0 AS paid_requests"
+    edge_params = []
+    if end_date:
+      edge_query = """
+        SELECT
+          COALESCE(SUM(COALESCE(pd.paid_docs_cost, 0) + COALESCE(r.admin_fee_amount, 0)), 0) AS paid_amount,
+          COUNT(*) AS paid_requests
+        FROM requests r
+        LEFT JOIN LATERAL (
+          SELECT SUM(d.cost * rd.quantity) AS paid_docs_cost, COUNT(*) AS paid_docs
+          FROM request_documents rd
+          JOIN documents d ON d.doc_id = rd.doc_id
+          WHERE rd.request_id = r.request_id AND rd.payment_status = TRUE
+        ) pd ON TRUE
+        WHERE r.requested_at = %s::date::timestamp
+          AND (r.payment_status = TRUE OR pd.paid_docs > 0)
+      """
+      edge_params.append(end_date)
+      if start_date:
+        edge_query += " AND r.requested_at >= %s"
+        edge_params.append(start_date)
+
+    cur.execute(f"""
+      SELECT
+        rollup.paid_amount + edge.paid_amount,
+        counted.total,
+        rollup.paid_requests + edge.paid_requests
+      FROM (
+        SELECT COALESCE(SUM(paid_amount), 0) AS paid_amount, COALESCE(SUM(paid_requests), 0) AS paid_requests
+        FROM daily_revenue
+        WHERE TRUE{rollup_filters}
+      ) rollup,
+      ({edge_query}) edge,
+      (SELECT COUNT(*) AS total FROM requests r WHERE TRUE{count_filters}) counted
+    """, tuple(rollup_params + edge_params + count_params))
+    total_amount, total_count, total_paid = cur.fetchone()
+
+    return {
+      'total_amount_completed': float(total_amount),
+      'total_transactions': total_count,
+      'total_paid': int(total_paid)
+    }
+
+  @staticmethod
+  def revenue_day(cur, request_id):
+    """The daily_revenue day a request counts towards (the day it was made), or None."""
+    cur.execute("SELECT requested_at::date FROM requests WHERE request_id = %s", (request_id,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+  @staticmethod
+  def document_revenue_days(cur, doc_id):
+    """
+    daily_revenue days whose paid totals include doc_id. Paid documents are
+    priced at the document's current cost, so editing or deleting it changes
+    those days. Empty while USE_REVENUE_ROLLUP is off.
+    """
+    if not USE_REVENUE_ROLLUP:
+      return []
+    cur.execute("""
+      SELECT DISTINCT r.requested_at::date
+      FROM request_documents rd
+      JOIN requests r ON r.request_id = rd.request_id
+      WHERE rd.doc_id = %s AND rd.payment_status = TRUE
+    """, (doc_id,))
+    return [row[0] for row in cur.fetchall()]
+
+  @staticmethod
+  def refresh_revenue_day(cur, request_id=None, day=None):
+    """
+    Recompute the daily_revenue row for the day a request was made (or for
+    day, when the request is being deleted), inside the caller's transaction.
+    Recomputing the whole day keeps the rollup exact no matter which writer
+    changed payment state.
+
+    Does nothing while USE_REVENUE_ROLLUP is off; nothing reads the rollup
+    then, and migrate/reconcile_daily_revenue.py rebuilds it before enabling.
+    """
+    if not USE_REVENUE_ROLLUP:
+      return
+    if day is None:
+      day = TransactionsModel.revenue_day(cur, request_id)
+    if day is None:
+      return
+
+    # Serialize refreshes of the same day so the last one sees every commit
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"daily_revenue:{day}",))
+    cur.execute("""
+      INSERT INTO daily_revenue AS dr (day, paid_requests, paid_amount, updated_at)
+      SELECT %s::date, COUNT(*), COALESCE(SUM(COALESCE(pd.paid_docs_cost, 0) + COALESCE(r.admin_fee_amount, 0)), 0), CURRENT_TIMESTAMP
+      FROM requests r
+      LEFT JOIN LATERAL (
+        SELECT SUM(d.cost * rd.quantity) AS paid_docs_cost, COUNT(*) AS paid_docs
+        FROM request_documents rd
+        JOIN documents d ON d.doc_id = rd.doc_id
+        WHERE rd.request_id = r.request_id AND rd.payment_status = TRUE
+      ) pd ON TRUE
+      WHERE r.requested_at >= %s::date AND r.requested_at < %s::date + 1
+        AND (r.payment_status = TRUE OR pd.paid_docs > 0)
+      ON CONFLICT (day) DO UPDATE SET
+        paid_requests = EXCLUDED.paid_requests,
+        paid_amount = EXCLUDED.paid_amount,
+        updated_at = EXCLUDED.updated_at
+    """, (day, day, day))
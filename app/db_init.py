@@ -178,6 +178,27 @@ def ready_requests_table():
    """
    execute_query(alter_query_payment_type)
 
+   # Add is_assigned flag (maintained by a trigger on request_assignments)
+   alter_query_is_assigned = """
+   ALTER TABLE requests ADD COLUMN IF NOT EXISTS is_assigned BOOLEAN NOT NULL DEFAULT FALSE
+   """
+   execute_query(alter_query_is_assigned)
+
+   # Assignment queue: unassigned PENDING requests in requested_at order
+   index_query = """
+   CREATE INDEX IF NOT EXISTS idx_requests_unassigned_pending
+   ON requests(requested_at, request_id)
+   WHERE status = 'PENDING' AND is_assigned = FALSE
+   """
+   execute_query(index_query)
+
+   # Transactions keyset paging: (requested_at, request_id) in either direction
+   keyset_index_query = """
+   CREATE INDEX IF NOT EXISTS idx_requests_requested_at_request_id
+   ON requests(requested_at, request_id)
+   """
+   execute_query(keyset_index_query)
+
 
 #mapping table between requests and requested documents for each request and quantity
 
@@ -205,6 +226,14 @@ def ready_request_documents_table():
    """
    execute_query(alter_query)
 
+   # Paid documents per request, used by the transactions aggregates
+   paid_index_query = """
+   CREATE INDEX IF NOT EXISTS idx_request_documents_paid
+   ON request_documents(request_id) INCLUDE (doc_id, quantity, payment_date)
+   WHERE payment_status = TRUE
+   """
+   execute_query(paid_index_query)
+
 
 #mapping table between requests and requirements with uploaded file paths
 def ready_request_requirements_links_table():
@@ -250,6 +279,358 @@ def ready_request_assignments_table():
    """
    execute_query(query)
 
+   # Keep requests.is_assigned in step with request_assignments
+   flag_function = """
+   CREATE OR REPLACE FUNCTION request_assignment_flag() RETURNS TRIGGER AS $$
+   BEGIN
+       IF TG_OP = 'INSERT' THEN
+           UPDATE requests SET is_assigned = TRUE
+           WHERE request_id = NEW.request_id AND is_assigned = FALSE;
+       ELSIF TG_OP = 'DELETE' THEN
+           UPDATE requests SET is_assigned = FALSE
+           WHERE request_id = OLD.request_id AND is_assigned = TRUE;
+       END IF;
+       RETURN NULL;
+   END;
+   $$ LANGUAGE plpgsql
+   """
+   execute_query(flag_function)
+   execute_query("DROP TRIGGER IF EXISTS trg_request_assignment_flag ON request_assignments")
+   execute_query("""
+   CREATE TRIGGER trg_request_assignment_flag
+   AFTER INSERT OR DELETE ON request_assignments
+   FOR EACH ROW
+   EXECUTE FUNCTION request_assignment_flag()
+   """)
+
+   # Backfill the flag for rows assigned before the trigger existed
+   execute_query("""
+   UPDATE requests r
+   SET is_assigned = EXISTS (SELECT 1 FROM request_assignments ra WHERE ra.request_id = r.request_id)
+   WHERE r.is_assigned IS DISTINCT FROM EXISTS (SELECT 1 FROM request_assignments ra WHERE ra.request_id = r.request_id)
+   """)
+
+def ready_admin_workload_table():
+   """
+   Per-admin workload counters kept current by triggers on request_assignments
+   and requests, so progress widgets and capacity checks are primary-key lookups.
+   """
+   query = """
+   CREATE TABLE IF NOT EXISTS admin_workload (
+       admin_id VARCHAR(100) PRIMARY KEY,
+       assigned INTEGER NOT NULL DEFAULT 0,
+       in_progress INTEGER NOT NULL DEFAULT 0,
+       doc_ready INTEGER NOT NULL DEFAULT 0,
+       released INTEGER NOT NULL DEFAULT 0,
+       updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+   )
+   """
+   execute_query(query)
+
+   # Apply a delta to an admin's total and to the bucket for a request status
+   apply_function = """
+   CREATE OR REPLACE FUNCTION admin_workload_apply(
+       p_admin_id VARCHAR, p_assigned_delta INTEGER, p_status VARCHAR, p_status_delta INTEGER
+   ) RETURNS VOID AS $$
+   BEGIN
+       INSERT INTO admin_workload AS w (admin_id, assigned, in_progress, doc_ready, released, updated_at)
+       VALUES (
+           p_admin_id,
+           p_assigned_delta,
+           CASE WHEN p_status = 'IN-PROGRESS' THEN p_status_delta ELSE 0 END,
+           CASE WHEN p_status = 'DOC-READY' THEN p_status_delta ELSE 0 END,
+           CASE WHEN p_status = 'RELEASED' THEN p_status_delta ELSE 0 END,
+           CURRENT_TIMESTAMP
+       )
+       ON CONFLICT (admin_id) DO UPDATE SET
+           assigned = w.assigned + EXCLUDED.assigned,
+           in_progress = w.in_progress + EXCLUDED.in_progress,
+           doc_ready = w.doc_ready + EXCLUDED.doc_ready,
+           released = w.released + EXCLUDED.released,
+           updated_at = CURRENT_TIMESTAMP;
+   END;
+   $$ LANGUAGE plpgsql
+   """
+   execute_query(apply_function)
+
+   # Assignments: insert, delete and reassignment (ON CONFLICT ... DO UPDATE)
+   assignment_function = """
+   CREATE OR REPLACE FUNCTION admin_workload_on_assignment() RETURNS TRIGGER AS $$
+   DECLARE
+       v_status VARCHAR;
+   BEGIN
+       IF TG_OP = 'INSERT' THEN
+           SELECT status INTO v_status FROM requests WHERE request_id = NEW.request_id;
+           PERFORM admin_workload_apply(NEW.admin_id, 1, v_status, 1);
+       ELSIF TG_OP = 'DELETE' THEN
+           -- When the request itself is being deleted its status bucket was
+           -- already released by admin_workload_on_request_delete
+           SELECT status INTO v_status FROM requests WHERE request_id = OLD.request_id;
+           PERFORM admin_workload_apply(OLD.admin_id, -1, v_status, -1);
+       ELSIF TG_OP = 'UPDATE' THEN
+           SELECT status INTO v_status FROM requests WHERE request_id = NEW.request_id;
+           PERFORM admin_workload_apply(OLD.admin_id, -1, v_status, -1);
+           PERFORM admin_workload_apply(NEW.admin_id, 1, v_status, 1);
+       END IF;
+       RETURN NULL;
+   END;
+   $$ LANGUAGE plpgsql
+   """
+   execute_query(assignment_function)
+
+   status_function = """
+   CREATE OR REPLACE FUNCTION admin_workload_on_request_status() RETURNS TRIGGER AS $$
+   DECLARE
+       v_admin_id VARCHAR;
+   BEGIN
+       SELECT admin_id INTO v_admin_id FROM request_assignments WHERE request_id = NEW.request_id;
+       IF v_admin_id IS NOT NULL THEN
+           PERFORM admin_workload_apply(v_admin_id, 0, OLD.status, -1);
+           PERFORM admin_workload_apply(v_admin_id, 0, NEW.status, 1);
+       END IF;
+       RETURN NULL;
+   END;
+   $$ LANGUAGE plpgsql
+   """
+   execute_query(status_function)
+
+   request_delete_function = """
+   CREATE OR REPLACE FUNCTION admin_workload_on_request_delete() RETURNS TRIGGER AS $$
+   DECLARE
+       v_admin_id VARCHAR;
+   BEGIN
+       SELECT admin_id INTO v_admin_id FROM request_assignments WHERE request_id = OLD.request_id;
+       IF v_admin_id IS NOT NULL THEN
+           PERFORM admin_workload_apply(v_admin_id, 0, OLD.status, -1);
+       END IF;
+       RETURN OLD;
+   END;
+   $$ LANGUAGE plpgsql
+   """
+   execute_query(request_delete_function)
+
+   triggers = [
+       "DROP TRIGGER IF EXISTS trg_admin_workload_assignment ON request_assignments",
+       """
+       CREATE TRIGGER trg_admin_workload_assignment
+       AFTER INSERT OR DELETE OR UPDATE OF admin_id ON request_assignments
+       FOR EACH ROW
+       EXECUTE FUNCTION admin_workload_on_assignment()
+       """,
+       "DROP TRIGGER IF EXISTS trg_admin_workload_request_status ON requests",
+       """
+       CREATE TRIGGER trg_admin_workload_request_status
+       AFTER UPDATE OF status ON requests
+       FOR EACH ROW
+       WHEN (OLD.status IS DISTINCT FROM NEW.status)
+       EXECUTE FUNCTION admin_workload_on_request_status()
+       """,
+       "DROP TRIGGER IF EXISTS trg_admin_workload_request_delete ON requests",
+       """
+       CREATE TRIGGER trg_admin_workload_request_delete
+       BEFORE DELETE ON requests
+       FOR EACH ROW
+       EXECUTE FUNCTION admin_workload_on_request_delete()
+       """
+   ]
+   for trigger_query in triggers:
+       execute_query(trigger_query)
+
+   reconcile_admin_workload()
+
+
+def reconcile_admin_workload():
+   """Rebuild admin_workload from request_assignments and requests."""
+   conn = get_connection()
+   cur = conn.cursor()
+   try:
+       # Wait for in-flight assignment/status transactions and block new ones
+       # until the rebuilt counters are committed
+       cur.execute("LOCK TABLE admin_workload IN EXCLUSIVE MODE")
+       cur.execute("""
+           INSERT INTO admin_workload AS w (admin_id, assigned, in_progress, doc_ready, released, updated_at)
+           SELECT
+               ra.admin_id,
+               COUNT(*),
+               COUNT(*) FILTER (WHERE r.status = 'IN-PROGRESS'),
+               COUNT(*) FILTER (WHERE r.status = 'DOC-READY'),
+               COUNT(*) FILTER (WHERE r.status = 'RELEASED'),
+               CURRENT_TIMESTAMP
+           FROM request_assignments ra
+           JOIN requests r ON r.request_id = ra.request_id
+           GROUP BY ra.admin_id
+           ON CONFLICT (admin_id) DO UPDATE SET
+               assigned = EXCLUDED.assigned,
+               in_progress = EXCLUDED.in_progress,
+               doc_ready = EXCLUDED.doc_ready,
+               released = EXCLUDED.released,
+               updated_at = EXCLUDED.updated_at
+       """)
+       cur.execute("""
+           UPDATE admin_workload
+           SET assigned = 0, in_progress = 0, doc_ready = 0, released = 0, updated_at = CURRENT_TIMESTAMP
+           WHERE NOT EXISTS (
+               SELECT 1 FROM request_assignments ra WHERE ra.admin_id = admin_workload.admin_id
+           )
+       """)
+       conn.commit()
+       print("Admin workload counters reconciled.")
+   except Exception as e:
+       print(f"Error reconciling admin workload: {e}")
+       conn.rollback()
+   finally:
+       cur.close()
+       conn.close()
+
+
+def ready_daily_revenue_table():
+   """Per-day paid revenue rollup keyed by the request date (requested_at::date)."""
+   query = """
+   CREATE TABLE IF NOT EXISTS daily_revenue (
+       day DATE PRIMARY KEY,
+       paid_requests INTEGER NOT NULL DEFAULT 0,
+       paid_amount NUMERIC(12,2) NOT NULL DEFAULT 0.00,
+       updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+   )
+   """
+   execute_query(query)
+
+
+def reconcile_daily_revenue():
+   """Rebuild daily_revenue from requests and request_documents."""
+   conn = get_connection()
+   cur = conn.cursor()
+   try:
+       cur.execute("LOCK TABLE daily_revenue IN EXCLUSIVE MODE")
+       cur.execute("TRUNCATE daily_revenue")
+       cur.execute("""
+           INSERT INTO daily_revenue (day, paid_requests, paid_amount, updated_at)
+           SELECT
+               r.requested_at::date,
+               COUNT(*),
+               COALESCE(SUM(COALESCE(pd.paid_docs_cost, 0) + COALESCE(r.admin_fee_amount, 0)), 0),
+               CURRENT_TIMESTAMP
+           FROM requests r
+           LEFT JOIN (
+               SELECT rd.request_id, SUM(d.cost * rd.quantity) AS paid_docs_cost
+               FROM request_documents rd
+               JOIN documents d ON d.doc_id = rd.doc_id
+               WHERE rd.payment_status = TRUE
+               GROUP BY rd.request_id
+           ) pd ON pd.request_id = r.request_id
+           WHERE r.requested_at IS NOT NULL
+             AND (r.payment_status = TRUE OR pd.request_id IS NOT NULL)
+           GROUP BY r.requested_at::date
+       """)
+       conn.commit()
+       print("Daily revenue rollup reconciled.")
+   except Exception as e:
+       print(f"Error reconciling daily revenue: {e}")
+       conn.rollback()
+   finally:
+       cur.close()
+       conn.close()
+
+
+def ready_payment_events_table():
+   """Ledger of provider payment confirmations; one row per provider payment ID."""
+   query = """
+   CREATE TABLE IF NOT EXISTS payment_events (
+       id SERIAL PRIMARY KEY,
+       provider VARCHAR(50) NOT NULL DEFAULT 'maya',
+       provider_payment_id VARCHAR(255) NOT NULL,
+       request_id VARCHAR(15) REFERENCES requests(request_id) ON DELETE CASCADE,
+       amount NUMERIC(10,2),
+       source VARCHAR(50),
+       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+       UNIQUE (provider, provider_payment_id)
+   )
+   """
+   execute_query(query)
+
+   index_query = """
+   CREATE INDEX IF NOT EXISTS idx_payment_events_request_id ON payment_events(request_id)
+   """
+   execute_query(index_query)
+
+
+def ready_payment_inbox_table():
+   """Raw verified Maya webhook events awaiting background processing."""
+   query = """
+   CREATE TABLE IF NOT EXISTS payment_inbox (
+       id BIGSERIAL PRIMARY KEY,
+       tracking_number VARCHAR(15),
+       payment_id VARCHAR(255),
+       event_status VARCHAR(50),
+       payload JSONB NOT NULL,
+       status VARCHAR(20) NOT NULL DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'DONE', 'FAILED')),
+       attempts INTEGER NOT NULL DEFAULT 0,
+       last_error TEXT,
+       received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+       available_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+       processed_at TIMESTAMP
+   )
+   """
+   execute_query(query)
+
+   # Worker claim path: pending events in arrival order, per tracking number
+   index_query = """
+   CREATE INDEX IF NOT EXISTS idx_payment_inbox_pending
+   ON payment_inbox(tracking_number, id)
+   WHERE status = 'PENDING'
+   """
+   execute_query(index_query)
+
+
+def ready_sessions_table():
+   """
+   Server-side Flask sessions. UNLOGGED: no WAL on every OTP/tracking step;
+   the table is emptied after a crash, which only logs users out.
+   """
+   query = """
+   CREATE UNLOGGED TABLE IF NOT EXISTS sessions (
+       sid VARCHAR(64) PRIMARY KEY,
+       data TEXT NOT NULL,
+       expires_at TIMESTAMP NOT NULL
+   )
+   """
+   execute_query(query)
+
+   # Sweeper deletes by expiry
+   index_query = """
+   CREATE INDEX IF NOT EXISTS idx_sessions_expires_at
+   ON sessions(expires_at)
+   """
+   execute_query(index_query)
+
+
+def ready_otp_challenges_table():
+   """Replay/attempt state for stateless OTP challenge tokens, keyed by token id."""
+   query = """
+   CREATE UNLOGGED TABLE IF NOT EXISTS otp_challenges (
+       jti VARCHAR(32) PRIMARY KEY,
+       attempts SMALLINT NOT NULL DEFAULT 0,
+       consumed BOOLEAN NOT NULL DEFAULT FALSE,
+       expires_at TIMESTAMP NOT NULL
+   )
+   """
+   execute_query(query)
+
+
+def ready_rate_limits_table():
+   """Sliding-window rate limit counters: one row per key per fixed window (epoch seconds)."""
+   query = """
+   CREATE UNLOGGED TABLE IF NOT EXISTS rate_limits (
+       key VARCHAR(255) NOT NULL,
+       window_start BIGINT NOT NULL,
+       hits INTEGER NOT NULL DEFAULT 0,
+       expires_at BIGINT NOT NULL,
+       PRIMARY KEY (key, window_start)
+   )
+   """
+   execute_query(query)
+
+
 def ready_fee_table():
    query = """
    CREATE TABLE IF NOT EXISTS fee (
@@ -749,11 +1130,18 @@ def initialize_db():
    ready_request_requirements_links_table()
    ready_logs_table()
    ready_request_assignments_table()
+   ready_admin_workload_table()
    ready_admins_table()
    ready_max_request_settings_table()
    ready_admin_settings_table()
    ready_open_request_restriction_table()
    ready_fee_table()
+   ready_daily_revenue_table()
+   ready_payment_events_table()
+   ready_payment_inbox_table()
+   ready_sessions_table()
+   ready_otp_challenges_table()
+   ready_rate_limits_table()
    insert_sample_data()
    ready_others_docs_table()
    ready_changes_table()
@@ -5,25 +5,50 @@ Provides unified file upload functionality across the application.
 
 import base64
 import os
+import threading
 from datetime import datetime
-from supabase import create_client, Client
 from config import SUPABASE_URL, SUPABASE_ANON_KEY
 
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_supabase_client():
+    """
+    Shared Supabase client, created on first use. The supabase SDK is heavy to
+    import, so neither it nor the client is loaded while workers boot.
+    Raises if the client cannot be created.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from supabase import create_client
+                _client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    return _client
+
 
 class SupabaseFileService:
     """Service class for managing file uploads to Supabase Storage."""
 
     def __init__(self):
-        """Initialize Supabase client."""
-        if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-            print("WARNING: Supabase credentials not found. File uploads will fail.")
-            self.supabase = None
-        else:
-            try:
-                self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-            except Exception as e:
-                print(f"ERROR: Failed to initialize Supabase client: {e}")
-                self.supabase = None
+        """The Supabase client is created on first use (see get_supabase_client)."""
+        self._supabase = None
+        self._init_failed = False
+
+    @property
+    def supabase(self):
+        if self._supabase is None and not self._init_failed:
+            if not SUPABASE_URL or not SUPABASE_ANON_KEY:
+                print("WARNING: Supabase credentials not found. File uploads will fail.")
+                self._init_failed = True
+            else:
+                try:
+                    self._supabase = get_supabase_client()
+                except Exception as e:
+                    print(f"ERROR: Failed to initialize Supabase client: {e}")
+                    self._init_failed = True
+        return self._supabase
     
     def _check_supabase_available(self) -> bool:
         """Check if Supabase client is available."""
@@ -6,10 +6,28 @@ from flask_jwt_extended import create_access_token, set_access_cookies, jwt_requ
 from flask import jsonify, request, session
 from app.utils.decorator import jwt_required_with_role
 from werkzeug.utils import secure_filename
-from supabase import create_client, Client
-from config import SUPABASE_URL, SUPABASE_ANON_KEY 
+from app.services.supabase_file_service import get_supabase_client
+from config import OTP_CHALLENGE_MODE
+from app.utils.otp_challenge import request_challenge, read_challenge, revoke_challenge, set_challenge_cookie, clear_challenge_cookie
+from app.utils.rate_limit import otp_send_retry_after, rate_limited_response
 import random
 import hashlib
+import time
+
+# Token-mode verification failures (see verify_challenge)
+OTP_FAILURE_MESSAGES = {
+    "expired": "Session expired. Please request a new OTP.",
+    "invalid": "Invalid OTP",
+    "locked": "Too many incorrect attempts. Please request a new OTP.",
+    "used": "This OTP has already been used. Please request a new OTP."
+}
+
+
+def with_otp_challenge(response, challenge):
+    """Attach a token-mode challenge cookie; no-op in session mode."""
+    if challenge is None:
+        return response
+    return set_challenge_cookie(response, challenge)
 
 
 def send_whatsapp_otp(phone, full_name, otp_code):
@@ -58,15 +76,28 @@ def check_id():
     #         "message": "Student has outstanding liabilities"
     #     }), 200
 
-    # Generate OTP + hash it
-    otp, otp_hash = AuthenticationUser.generate_otp()
     phone = result["phone_number"] 
     full_name = result.get("full_name") if result else "Valued Customer"
 
-    # Save OTP hash and student ID in session
-    AuthenticationUser.save_otp(student_id, otp_hash, has_liability=result["has_liability"], session=session)
-    session["phone_number"] = phone
-    session ["full_name"] = full_name
+    # A repeated submit while the last OTP is still valid reuses it: no new code, no send
+    if AuthenticationUser.has_active_otp(student_id, phone, session):
+        return jsonify({
+            "status": "valid",
+            "message": "Student OK, continue",
+            "masked_phone": phone[-4:],
+            "otp_reused": True
+        }), 200
+
+    retry_after = otp_send_retry_after(student_id, phone)
+    if retry_after:
+        return rate_limited_response(retry_after)
+
+    # Generate OTP + hash it
+    otp, otp_hash = AuthenticationUser.generate_otp()
+
+    # Save OTP hash and student ID in session (or a challenge token in token mode)
+    challenge = AuthenticationUser.save_otp(student_id, otp_hash, has_liability=result["has_liability"], session=session,
+                                            phone_number=phone, full_name=full_name)
     # Send OTP via WhatsApp
     whatsapp_result = send_whatsapp_otp(phone, full_name, otp)
     
@@ -77,11 +108,12 @@ def check_id():
         }), 500
   
     # Return masked number to frontend
-    return jsonify({
+    response = jsonify({
         "status": "valid",
         "message": "Student OK, continue",
         "masked_phone": phone[-4:] 
-    }), 200
+    })
+    return with_otp_challenge(response, challenge), 200
 
 
 
@@ -113,12 +145,23 @@ def check_name():
         phone = result["phone_number"]
         current_app.logger.info(f"Sending OTP to registered student number {phone}")
 
+    # A repeated submit while the last OTP is still valid reuses it: no new code, no send
+    if AuthenticationUser.has_active_otp(result["student_id"], phone, session, is_outsider=is_outsider):
+        return jsonify({
+            "status": "name_verified",
+            "message": "Name verified successfully.",
+            "masked_phone": phone[-4:],
+            "otp_reused": True
+        }), 200
+
+    retry_after = otp_send_retry_after(result["student_id"], phone)
+    if retry_after:
+        return rate_limited_response(retry_after)
+
     otp, otp_hash = AuthenticationUser.generate_otp()
     
-    AuthenticationUser.save_otp(result["student_id"], otp_hash, has_liability=result["has_liability"], session=session)
-    session["phone_number"] = phone
-    session["full_name"] = full_name
-    session["is_outsider"] = is_outsider
+    challenge = AuthenticationUser.save_otp(result["student_id"], otp_hash, has_liability=result["has_liability"], session=session,
+                                            phone_number=phone, full_name=full_name, is_outsider=is_outsider)
 
     # Send OTP via WhatsApp 
     whatsapp_result = send_whatsapp_otp(phone, full_name, otp)
@@ -129,30 +172,68 @@ def check_name():
             "message": whatsapp_result["message"]
         }), 500
    
-    return jsonify({
+    response = jsonify({
         "status": "name_verified",
         "message": "Name verified successfully.",
         "masked_phone": phone[-4:]  
-    }), 200
+    })
+    return with_otp_challenge(response, challenge), 200
 
 @authentication_user_bp.route('/resend-otp', methods=['POST'])
 def resend_otp():
-    # Debug print
-    print(f"[DEBUG] Session at resend: {dict(session)}")
+    challenge = None
+    if OTP_CHALLENGE_MODE == "token":
+        # The previous challenge carries the context; it is revoked once superseded
+        previous = request_challenge()
+        claims = read_challenge(previous)
+        if not claims:
+            return jsonify({
+                "status": "expired",
+                "message": "No active OTP session. Please start again."
+            }), 400
+
+        student_id = claims["student_id"]
+        if claims["is_outsider"]:
+            phone = claims.get("phone_number")
+            full_name = claims.get("full_name") or "Valued Customer"
+        else:
+            student = AuthenticationUser.check_student_in_school_system(student_id)
+            phone = student.get("phone_number")
+            full_name = student.get("full_name") or "Valued Customer"
+
+        if not phone:
+            return jsonify({
+                "status": "expired",
+                "message": "No active OTP session. Please start again."
+            }), 400
+
+        retry_after = otp_send_retry_after(student_id, phone)
+        if retry_after:
+            return rate_limited_response(retry_after)
+
+        otp, otp_hash = AuthenticationUser.generate_otp()
+        challenge = AuthenticationUser.save_otp(student_id, otp_hash, has_liability=claims["has_liability"], session=session,
+                                                phone_number=phone, full_name=full_name, is_outsider=claims["is_outsider"])
+        revoke_challenge(previous)
+    else:
+        student_id = session.get("student_id")
+        phone = session.get("phone_number")
+        full_name = session.get("full_name", "Valued Customer")
 
-    student_id = session.get("student_id")
-    phone = session.get("phone_number")
-    full_name = session.get("full_name", "Valued Customer")
+        if not student_id or not phone:
+            return jsonify({
+                "status": "expired",
+                "message": "No active OTP session. Please start again."
+            }), 400
 
-    if not student_id or not phone:
-        return jsonify({
-            "status": "expired",
-            "message": "No active OTP session. Please start again."
-        }), 400
+        retry_after = otp_send_retry_after(student_id, phone)
+        if retry_after:
+            return rate_limited_response(retry_after)
 
-    # Generate new OTP
-    otp, otp_hash = AuthenticationUser.generate_otp()
-    session["otp"] = otp_hash  
+        # Generate new OTP
+        otp, otp_hash = AuthenticationUser.generate_otp()
+        session["otp"] = otp_hash  
+        session["otp_sent_at"] = time.time()
 
     # Send OTP via WhatsApp
     whatsapp_result = send_whatsapp_otp(phone, full_name, otp)
@@ -164,41 +245,48 @@ def resend_otp():
         }), 500
     
     # Success response
-    return jsonify({
+    response = jsonify({
         "status": "resent",
         "message": "New OTP sent successfully",
         "masked_phone": phone[-4:] 
-    }), 200
+    })
+    return with_otp_challenge(response, challenge), 200
 
 
 @authentication_user_bp.route('/verify-otp', methods=['POST'])
 def verify_otp():
-    print("=" * 50)
-    print("[DEBUG] Received payload:", request.json)
-    print("[DEBUG] Session contents:", dict(session))
-    print("[DEBUG] Session ID:", request.cookies.get('session'))
-    print("=" * 50)
-
     otp = request.json.get("otp")
-    student_id = session.get("student_id")
-    is_outsider = session.get("is_outsider", False)
-    
-    # Check if OTP exists in session
-    if "otp" not in session:
-        print("[ERROR] No OTP found in session!")
-        return jsonify({
-            "valid": False, 
-            "message": "Session expired. Please request a new OTP."
-        }), 400
-    
-    # Validate entered OTP
-    result = AuthenticationUser.verify_otp(otp, session)
 
-    if not result["verified"]:
-        return jsonify({
-            "valid": False,
-            "message": "Invalid OTP"
-        }), 400
+    if OTP_CHALLENGE_MODE == "token":
+        # Signed challenge: no session read or write
+        result = AuthenticationUser.verify_otp_challenge(otp, request_challenge())
+        if not result["verified"]:
+            return jsonify({
+                "valid": False,
+                "message": OTP_FAILURE_MESSAGES[result["reason"]]
+            }), 400
+        student_id = result["student_id"]
+        is_outsider = result["is_outsider"]
+    else:
+        student_id = session.get("student_id")
+        is_outsider = session.get("is_outsider", False)
+
+        # Check if OTP exists in session
+        if "otp" not in session:
+            print("[ERROR] No OTP found in session!")
+            return jsonify({
+                "valid": False, 
+                "message": "Session expired. Please request a new OTP."
+            }), 400
+
+        # Validate entered OTP
+        result = AuthenticationUser.verify_otp(otp, session)
+
+        if not result["verified"]:
+            return jsonify({
+                "valid": False,
+                "message": "Invalid OTP"
+            }), 400
 
     # Skip liability check for outsider users
     if result["has_liability"] and not is_outsider:
@@ -209,7 +297,8 @@ def verify_otp():
         }), 200
 
     # OTP correct, clear it
-    session.pop("otp", None)
+    if OTP_CHALLENGE_MODE != "token":
+        session.pop("otp", None)
 
     # Create JWT token for the session
     user = {"student_id": student_id, "role": "user"}
@@ -225,6 +314,8 @@ def verify_otp():
         "has_liability": result["has_liability"] if not is_outsider else False
     })
     set_access_cookies(response, access_token)
+    if OTP_CHALLENGE_MODE == "token":
+        clear_challenge_cookie(response)
 
     current_app.logger.info(f"User {student_id} logged in successfully.")
     print("[SUCCESS] OTP verified, JWT token created")
@@ -267,7 +358,7 @@ def upload_auth_letter():
         file_path_in_bucket = f"{firstname}_{lastname}/{filename}"
 
         # Initialize Supabase client
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+        supabase = get_supabase_client()
 
         file_content = file.read()
         supabase.storage.from_("auth_letter_odr").upload(
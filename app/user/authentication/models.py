@@ -1,8 +1,13 @@
 import hashlib
 import random
 import requests
+import time
 from ...db_init import get_connection
 from app import db_pool
+from app.admin.manage_request.models import ManageRequestModel
+from app.utils.prepared_statements import execute_prepared
+from app.utils.otp_challenge import issue_challenge, verify_challenge, challenge_active, request_challenge, OTP_CHALLENGE_TTL_SECONDS
+from config import OTP_CHALLENGE_MODE
 
 
 class AuthenticationUser:
@@ -11,17 +16,13 @@ class AuthenticationUser:
         """
         Checks the local 'students' table to confirm existence and liabilities.
         """
+        conn = db_pool.getconn()
+        cur = conn.cursor()
         try:
-            conn = get_connection()
-            cur = conn.cursor()
-
-            cur.execute(
-                "SELECT full_name, contact_number, liability_status, college_code FROM students WHERE student_id = %s",
-                (student_id,)
-            )
+            # Pooled connection + prepared lookup instead of a fresh connect per OTP call
+            execute_prepared(cur, "student_by_id", (student_id,))
             row = cur.fetchone()
-            cur.close()
-            conn.close()
+            conn.commit()
 
             if not row:
                 return {
@@ -42,6 +43,7 @@ class AuthenticationUser:
             }
 
         except Exception as e:
+            conn.rollback()
             print(f"Database error while checking student: {e}")
             return {
                 "exists": False,
@@ -49,6 +51,9 @@ class AuthenticationUser:
                 "has_liability": False,
                 "phone_number": None
             }
+        finally:
+            cur.close()
+            db_pool.putconn(conn)
 
 
     @staticmethod
@@ -122,13 +127,68 @@ class AuthenticationUser:
         return otp, otp_hash
 
     @staticmethod
-    def save_otp(student_id, otp_hash, has_liability, session):
+    def save_otp(student_id, otp_hash, has_liability, session, phone_number=None, full_name=None, is_outsider=None):
         """
-        Save OTP hash to session (temporary) or database later.
+        Start an OTP challenge.
+
+        In session mode the OTP hash and student context are saved to the
+        session and None is returned. In token mode (OTP_CHALLENGE_MODE=token)
+        nothing is stored; the signed challenge token is returned for the
+        response cookie.
         """
+        if OTP_CHALLENGE_MODE == "token":
+            return issue_challenge(otp_hash, student_id, has_liability, bool(is_outsider), phone_number, full_name)
+
         session["otp"] = otp_hash
+        session["otp_sent_at"] = time.time()
         session["student_id"] = student_id
         session["has_liability"] = has_liability
+        if phone_number is not None:
+            session["phone_number"] = phone_number
+        if full_name is not None:
+            session["full_name"] = full_name
+        if is_outsider is not None:
+            session["is_outsider"] = is_outsider
+        return None
+
+    @staticmethod
+    def has_active_otp(student_id, phone_number, session, is_outsider=False):
+        """
+        True if an unexpired OTP was already sent to this student and number,
+        so a repeated request can reuse it instead of generating and sending
+        another one.
+        """
+        if OTP_CHALLENGE_MODE == "token":
+            return challenge_active(request_challenge(), student_id, phone_number, is_outsider)
+
+        sent_at = session.get("otp_sent_at")
+        return (
+            bool(session.get("otp"))
+            and session.get("student_id") == student_id
+            and session.get("phone_number") == phone_number
+            and bool(session.get("is_outsider", False)) == bool(is_outsider)
+            and sent_at is not None
+            and time.time() - sent_at < OTP_CHALLENGE_TTL_SECONDS
+        )
+
+    @staticmethod
+    def verify_otp_challenge(otp_input, challenge):
+        """
+        Verify an OTP against a stateless challenge token (token mode).
+
+        Returns:
+            dict: verified, reason (when not verified), has_liability,
+            student_id and is_outsider.
+        """
+        result = verify_challenge(challenge, otp_input)
+        claims = result["claims"] or {}
+        return {
+            "verified": result["verified"],
+            "reason": result["reason"],
+            "has_liability": claims.get("has_liability", False) if result["verified"] else False,
+            "student_id": claims.get("student_id"),
+            "is_outsider": claims.get("is_outsider", False)
+        }
 
     @staticmethod
     def verify_otp(otp_input, session):
@@ -166,7 +226,10 @@ class AuthenticationUser:
                 DO UPDATE SET file_url = EXCLUDED.file_url
             """, (request_id, firstname, lastname, file_url, number, requester_name))
 
+            # Other workers drop their cached details when this commits
+            ManageRequestModel.notify_request_change(cur, request_id)
             conn.commit()
+            ManageRequestModel.invalidate_request_cache(request_id)
             cur.close()
             db_pool.putconn(conn)
             return True, "Authorization letter uploaded successfully."
@@ -10,9 +10,7 @@ class DocumentList:
         Fetch all available documents with their associated requirement names.
         Returns a list of dictionaries suitable for JSON serialization.
         """
-        conn = g.get("db_conn", None)
-        if conn is None:
-            raise Exception("No active database connection found in Flask 'g' context.")
+        conn = g.db_conn
 
         try:
             cur = conn.cursor(cursor_factory=extras.RealDictCursor)
@@ -5,6 +5,8 @@ from . import payment_bp
 from ...whatsapp.controller import send_whatsapp_message
 from app.user.authentication.models import AuthenticationUser
 from .models import Payment
+from .inbox import PaymentInbox, parse_maya_event
+from config import MAYA_WEBHOOK_ASYNC
 import hmac
 import hashlib
 from flask_jwt_extended import jwt_required
@@ -59,20 +61,35 @@ def maya_webhook():
             return jsonify({'error': 'Invalid signature'}), 401
         
         payload = request.get_json()
+
+        if MAYA_WEBHOOK_ASYNC:
+            # Ingestion mode: persist and acknowledge; the inbox worker applies it
+            try:
+                event_id = PaymentInbox.enqueue(payload)
+            except Exception as e:
+                current_app.logger.error(f"[MAYA] Failed to persist webhook: {e}")
+                # Not stored, so let Maya retry
+                return jsonify({'success': False}), 503
+            current_app.logger.info(f"[MAYA] Webhook queued as inbox event {event_id}")
+            return jsonify({'success': True}), 200
+
         current_app.logger.info(f"[MAYA] Payload received: {payload}")
         
-        status = payload.get('status')
-        tracking_number = payload.get('requestReferenceNumber') or payload.get('trackingNumber') or payload.get('metadata', {}).get('trackingNumber')
-        payment_id = payload.get('id')
-        amount = payload.get('totalAmount', {}).get('value')
-        student_id = payload.get('studentId') or payload.get('metadata', {}).get('studentId')
+        event = parse_maya_event(payload)
+        status = event['status']
+        tracking_number = event['tracking_number']
+        payment_id = event['payment_id']
+        amount = event['amount']
+        student_id = event['student_id']
         current_app.logger.info(f"[MAYA] Parsed fields -> status: {status}, tracking: {tracking_number}, amount: {amount}, student_id: {student_id}, payment_id: {payment_id}")
         
         if status == 'PAYMENT_SUCCESS' and tracking_number:
             # Process payment
             result = Payment.process_webhook_payment(tracking_number, amount, student_id, payment_id)
             
-            if result['success']:
+            if result.get('duplicate'):
+                current_app.logger.info(f"[MAYA] Duplicate webhook ignored: {tracking_number}, Payment ID: {payment_id}")
+            elif result['success']:
                 current_app.logger.info(
                     f"[MAYA] Payment confirmed: {tracking_number}, Payment ID: {payment_id}"
                 )
@@ -129,7 +146,7 @@ def mark_paid_manual():
         if not tracking_number or student_id is None:
             return jsonify({'success': False, 'message': 'trackingNumber and studentId are required'}), 400
 
-        result = Payment.process_webhook_payment(tracking_number, amount, student_id, payment_id)
+        result = Payment.process_webhook_payment(tracking_number, amount, student_id, payment_id, source='browser')
         
         if result.get("success"):
             if result.get("was_already_paid"):
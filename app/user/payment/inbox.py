@@ -0,0 +1,194 @@
+import threading
+from psycopg2 import extras
+from app import db_pool
+from .models import Payment
+
+# Seconds the worker sleeps when the inbox is empty (enqueue wakes it early)
+INBOX_POLL_SECONDS = 2.0
+
+# Attempts before an event is parked as FAILED for manual replay
+INBOX_MAX_ATTEMPTS = 5
+
+_wakeup = threading.Event()
+_worker = None
+
+
+def parse_maya_event(payload):
+    """Pull the fields the payment flow needs out of a Maya webhook payload."""
+    metadata = payload.get('metadata') or {}
+    return {
+        'status': payload.get('status'),
+        'tracking_number': payload.get('requestReferenceNumber') or payload.get('trackingNumber') or metadata.get('trackingNumber'),
+        'payment_id': payload.get('id'),
+        'amount': (payload.get('totalAmount') or {}).get('value'),
+        'student_id': payload.get('studentId') or metadata.get('studentId')
+    }
+
+
+class PaymentInbox:
+    @staticmethod
+    def enqueue(payload):
+        """
+        Persist a verified webhook payload for background processing.
+
+        Returns:
+            int: The inbox event id.
+        """
+        event = parse_maya_event(payload)
+        conn = db_pool.getconn()
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                INSERT INTO payment_inbox (tracking_number, payment_id, event_status, payload)
+                VALUES (%s, %s, %s, %s)
+                RETURNING id
+            """, (event['tracking_number'], event['payment_id'], event['status'], extras.Json(payload)))
+            event_id = cur.fetchone()[0]
+            conn.commit()
+            _wakeup.set()
+            return event_id
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            db_pool.putconn(conn)
+
+    @staticmethod
+    def process_next(logger=None):
+        """
+        Claim and process one pending event. Only the oldest pending event of
+        each tracking number is claimable, and it stays row-locked while it is
+        processed, so events for one request apply in arrival order even with
+        several workers.
+
+        Returns:
+            bool: True if an event was processed, False if none was ready.
+        """
+        conn = db_pool.getconn()
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                SELECT p.id, p.payload, p.attempts
+                FROM payment_inbox p
+                WHERE p.status = 'PENDING'
+                  AND p.available_at <= CURRENT_TIMESTAMP
+                  AND NOT EXISTS (
+                      SELECT 1 FROM payment_inbox q
+                      WHERE q.tracking_number IS NOT DISTINCT FROM p.tracking_number
+                        AND q.status = 'PENDING'
+                        AND q.id < p.id
+                  )
+                ORDER BY p.id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            """)
+            row = cur.fetchone()
+            if not row:
+                conn.rollback()
+                return False
+
+            event_id, payload, attempts = row
+            attempts += 1
+            event = parse_maya_event(payload)
+
+            try:
+                if event['status'] == 'PAYMENT_SUCCESS' and event['tracking_number']:
+                    result = Payment.process_webhook_payment(
+                        event['tracking_number'], event['amount'], event['student_id'], event['payment_id']
+                    )
+                    outcome = result['message']
+                    # Business rejections (mismatch, unknown order) are final; DB errors retry
+                    retry = not result['success'] and result['message'].startswith('Database error')
+                else:
+                    outcome = f"Ignored event: status={event['status']}, tracking={event['tracking_number']}"
+                    retry = False
+            except Exception as e:
+                outcome = f"Error processing event: {e}"
+                retry = True
+
+            if retry and attempts < INBOX_MAX_ATTEMPTS:
+                new_status = 'PENDING'
+            elif retry:
+                new_status = 'FAILED'
+            else:
+                new_status = 'DONE'
+
+            # Retries back off linearly; later events of the same request wait behind them
+            cur.execute("""
+                UPDATE payment_inbox
+                SET status = %s, attempts = %s, last_error = %s,
+                    available_at = CURRENT_TIMESTAMP + %s * INTERVAL '10 seconds',
+                    processed_at = CASE WHEN %s = 'PENDING' THEN NULL ELSE CURRENT_TIMESTAMP END
+                WHERE id = %s
+            """, (new_status, attempts, outcome if retry else None, attempts, new_status, event_id))
+            conn.commit()
+
+            if logger:
+                logger.info(f"[MAYA][INBOX] Event {event_id} -> {new_status}: {outcome}")
+            return True
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            db_pool.putconn(conn)
+
+    @staticmethod
+    def replay(event_ids=None, all_failed=False):
+        """
+        Put FAILED (or, by id, already DONE) events back in the queue.
+
+        Returns:
+            int: Number of events re-queued.
+        """
+        conn = db_pool.getconn()
+        cur = conn.cursor()
+        try:
+            if event_ids:
+                cur.execute("""
+                    UPDATE payment_inbox
+                    SET status = 'PENDING', attempts = 0, last_error = NULL, processed_at = NULL,
+                        available_at = CURRENT_TIMESTAMP
+                    WHERE id = ANY(%s) AND status IN ('FAILED', 'DONE')
+                """, (list(event_ids),))
+            elif all_failed:
+                cur.execute("""
+                    UPDATE payment_inbox
+                    SET status = 'PENDING', attempts = 0, last_error = NULL, processed_at = NULL,
+                        available_at = CURRENT_TIMESTAMP
+                    WHERE status = 'FAILED'
+                """)
+            else:
+                return 0
+            requeued = cur.rowcount
+            conn.commit()
+            _wakeup.set()
+            return requeued
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            db_pool.putconn(conn)
+
+
+def _run_worker(app):
+    with app.app_context():
+        while True:
+            _wakeup.clear()
+            try:
+                while PaymentInbox.process_next(app.logger):
+                    pass
+            except Exception as e:
+                app.logger.error(f"[MAYA][INBOX] Worker error: {e}")
+            _wakeup.wait(INBOX_POLL_SECONDS)
+
+
+def start_inbox_worker(app):
+    """Start the background inbox worker for this process (once)."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    _worker = threading.Thread(target=_run_worker, args=(app,), name="maya-inbox-worker", daemon=True)
+    _worker.start()
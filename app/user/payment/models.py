@@ -1,18 +1,45 @@
 from flask import has_app_context, current_app
 from app import db_pool
+from app.admin.manage_request.models import ManageRequestModel
+from app.admin.transactions.models import TransactionsModel
+from app.utils.fee_registry import get_fee
+from app.utils.status_channel import publish_status
 
 
 class Payment:
     @staticmethod
-    def process_webhook_payment(tracking_number, amount, student_id, payment_id=None):
+    def _recorded_event_result(event_request_id, tracking_number, payment_id):
+        """Result for a provider payment ID that payment_events already holds."""
+        if event_request_id != tracking_number:
+            return {
+                'success': False,
+                'message': f'Payment ID {payment_id} was already applied to another request',
+                'was_already_paid': False
+            }
+        return {
+            'success': True,
+            'message': f'Payment {payment_id} already processed for tracking number: {tracking_number}',
+            'was_already_paid': True,
+            'duplicate': True
+        }
+
+    @staticmethod
+    def process_webhook_payment(tracking_number, amount, student_id, payment_id=None, source='webhook'):
         """
         Processes a payment webhook by verifying amount and updating payment status.
 
+        Safe to call repeatedly for the same payment: webhook payment IDs are
+        recorded in payment_events (unique), the request row is locked with
+        SELECT ... FOR UPDATE, and repeats return early without writing.
+        Browser confirmations are not recorded there, since their payment ID
+        is client-supplied; they rely on the row lock and payment_status.
+
         Args:
             tracking_number (str): The request_id of the record.
             amount (float): The payment amount received.
             student_id (str): The student_id to validate ownership.
             payment_id (str): The reference number/transaction ID from the payment provider.
+            source (str): Where the confirmation came from ('webhook' or 'browser').
 
         Returns:
             dict: A dictionary with 'success' (bool) and 'message' (str) keys.
@@ -21,11 +48,27 @@ class Payment:
         conn = db_pool.getconn()
         cur = conn.cursor()
         try:
-            # 1. Fetch data
+            # Only signature-verified webhook IDs go into the ledger; a browser
+            # confirmation's paymentReference comes from the client
+            record_event = bool(payment_id) and source == 'webhook'
+
+            # 0. Fast path: this provider payment was already recorded
+            if record_event:
+                cur.execute("""
+                    SELECT request_id FROM payment_events
+                    WHERE provider = 'maya' AND provider_payment_id = %s
+                """, (payment_id,))
+                event = cur.fetchone()
+                if event:
+                    conn.rollback()
+                    return Payment._recorded_event_result(event[0], tracking_number, payment_id)
+
+            # 1. Fetch and lock the request so concurrent webhook/browser calls serialize
             cur.execute("""
                 SELECT total_cost, payment_status, student_id
                 FROM requests
                 WHERE request_id = %s
+                FOR UPDATE
             """, (tracking_number,))
             
             order = cur.fetchone()
@@ -39,34 +82,29 @@ class Payment:
                     print(f"[MAYA] Fetched order for tracking {tracking_number}: {order}")
             
             if not order:
+                conn.rollback()
                 return {
                     'success': False,
                     'message': f'Order not found for tracking number: {tracking_number}',
                     'was_already_paid': previous_payment_status 
                 }
             
-            # Fetch admin fee from DB
-            cur.execute("SELECT value FROM fee WHERE key = 'admin_fee'")
-            fee_res = cur.fetchone()
-            admin_fee = float(fee_res[0]) if fee_res else 0.0
-            
-            # Fetch docs to calculate expected amounts
+            # Admin fee from the in-process fee registry; document total in SQL
+            admin_fee = float(get_fee('admin_fee'))
             cur.execute("""
-                SELECT d.cost, rd.quantity
+                SELECT COALESCE(SUM(d.cost * rd.quantity), 0)
                 FROM request_documents rd
                 JOIN documents d ON rd.doc_id = d.doc_id
                 WHERE rd.request_id = %s
             """, (tracking_number,))
-            docs = cur.fetchall()
-
-            total_cost = sum(float(d[0]) * d[1] for d in docs)
-            expected_full = float(total_cost + admin_fee)
+            expected_full = float(cur.fetchone()[0]) + admin_fee
 
             received_amount = float(amount) if amount is not None else expected_full
             db_student_id = order[2]
             
             # Validate student_id matches
             if db_student_id != student_id:
+                conn.rollback()
                 return {
                     'success': False,
                     'message': f'Student ID mismatch for tracking number: {tracking_number}',
@@ -74,24 +112,55 @@ class Payment:
                 }
             
             if abs(received_amount - expected_full) >= 0.01:
+                conn.rollback()
                 return {
                     'success': False,
                     'message': f'Payment amount mismatch: expected {expected_full} (Full), received {received_amount}',
                     'was_already_paid': previous_payment_status
                 }
-            
-            # Update payment status
-            cur.execute("UPDATE requests SET admin_fee_amount = %s WHERE request_id = %s", (admin_fee, tracking_number))
-            
+
+            # Record the provider event; the unique key rejects replays
+            if record_event:
+                cur.execute("""
+                    INSERT INTO payment_events (provider, provider_payment_id, request_id, amount, source)
+                    VALUES ('maya', %s, %s, %s, %s)
+                    ON CONFLICT (provider, provider_payment_id) DO NOTHING
+                """, (payment_id, tracking_number, received_amount, source))
+                if cur.rowcount == 0:
+                    # A concurrent call recorded it after the fast path; its request may differ
+                    conn.rollback()
+                    cur.execute("""
+                        SELECT request_id FROM payment_events
+                        WHERE provider = 'maya' AND provider_payment_id = %s
+                    """, (payment_id,))
+                    event = cur.fetchone()
+                    conn.rollback()
+                    return Payment._recorded_event_result(event[0] if event else None, tracking_number, payment_id)
+
+            if previous_payment_status:
+                # Another call already confirmed this request; keep its payment data
+                conn.commit()
+                return {
+                    'success': True,
+                    'message': f'Payment already confirmed for tracking number: {tracking_number}',
+                    'was_already_paid': True
+                }
+
             # Update main request directly
             cur.execute("""
                 UPDATE requests
-                SET payment_status = TRUE, payment_date = (NOW() AT TIME ZONE 'UTC' + INTERVAL '8 HOURS'), payment_reference = %s
+                SET payment_status = TRUE, payment_date = (NOW() AT TIME ZONE 'UTC' + INTERVAL '8 HOURS'),
+                    payment_reference = %s, admin_fee_amount = %s
                 WHERE request_id = %s
-            """, (payment_id, tracking_number,))
+            """, (payment_id, admin_fee, tracking_number))
             
-            rows_updated = 1
+            rows_updated = cur.rowcount
+            TransactionsModel.refresh_revenue_day(cur, tracking_number)
+            publish_status(cur, tracking_number)
+            # Other workers drop their cached details when this commits
+            ManageRequestModel.notify_request_change(cur, tracking_number)
             conn.commit()
+            ManageRequestModel.invalidate_request_cache(tracking_number)
 
             message = f'Payment confirmed for tracking number: {tracking_number}, rows updated: {rows_updated}'
             
@@ -244,7 +313,12 @@ class Payment:
             
             message = f'Payment confirmed for tracking number: {tracking_number}. Request payment status updated to TRUE.'
             
+            TransactionsModel.refresh_revenue_day(cur, tracking_number)
+            publish_status(cur, tracking_number)
+            # Other workers drop their cached details when this commits
+            ManageRequestModel.notify_request_change(cur, tracking_number)
             conn.commit()
+            ManageRequestModel.invalidate_request_cache(tracking_number)
             
             return {
                 'success': True,
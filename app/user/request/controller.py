@@ -9,8 +9,7 @@ from app.user.document_list.models import DocumentList
 from app.admin.settings.models import Fee
 import os
 from werkzeug.utils import secure_filename
-from supabase import create_client, Client
-from config import SUPABASE_URL, SUPABASE_ANON_KEY
+from app.services.supabase_file_service import get_supabase_client
 
 
 def send_whatsapp_tracking(phone, full_name, request_id):
@@ -53,39 +52,41 @@ def get_public_request_status():
     No authentication required - used by landing page to show/hide request functionality.
     """
     try:
-        from app.utils.decorator import is_request_allowed
-        from app.admin.settings.models import OpenRequestRestriction, AvailableDates
-        
-        # Get current restriction status
-        allowed = is_request_allowed()
-        
-        # Get current settings for display
-        settings = OpenRequestRestriction.get_settings()
-        
-        # Get today's date restriction info
+        from app.utils.schedule import get_schedule, CALENDAR_DAYS
         import datetime
-        today = datetime.datetime.now().strftime('%Y-%m-%d')
-        today_availability = AvailableDates.is_date_available(today)
-        
-        # Get upcoming date restrictions
-        upcoming_restrictions = AvailableDates.get_upcoming_restrictions(30)
-        
-        # Return enhanced status with date information
-        return jsonify({
-            "allowed": allowed,
-            "settings": settings or {
-                "start_time": "09:00:00",
-                "end_time": "17:00:00", 
-                "available_days": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
-                "announcement": ""
-            },
-            "date_info": {
-                "today": today,
-                "today_available": today_availability,
-                "has_today_restriction": today_availability is not None,
-                "upcoming_restrictions": upcoming_restrictions
-            }
-        }), 200
+
+        # Everything below comes from the compiled in-memory schedule, so a
+        # landing page load costs no queries until settings or dates change.
+        schedule = get_schedule()
+        now = datetime.datetime.now()
+        today_date = now.date()
+        today = today_date.strftime('%Y-%m-%d')
+        allowed = schedule.is_allowed(now)
+        today_availability = schedule.date_availability(today_date)
+
+        etag = f"{schedule.version}-{today}-{int(allowed)}"
+        if etag in request.if_none_match:
+            response = current_app.response_class(status=304)
+        else:
+            # Return enhanced status with date information
+            response = jsonify({
+                "allowed": allowed,
+                "settings": schedule.settings_dict(),
+                "date_info": {
+                    "today": today,
+                    "today_available": today_availability,
+                    "has_today_restriction": today_availability is not None,
+                    "upcoming_restrictions": schedule.upcoming_restrictions(today_date, CALENDAR_DAYS)
+                },
+                "calendar": schedule.calendar(today_date, CALENDAR_DAYS),
+                "version": schedule.version
+            })
+
+        # Cache until the allowed flag could next flip, capped at a minute
+        max_age = min(60, schedule.seconds_until_change(now))
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = f"public, max-age={max_age}"
+        return response, response.status_code
         
     except Exception as e:
         print(f"Error in /api/public/request-status: {e}")
@@ -118,7 +119,8 @@ def get_request_page_data():
     """
     try:
         # step 1: Get student data from external DB
-        student_id = session.get("student_id")
+        # (token-mode OTP leaves no student_id in the session; the JWT carries it)
+        student_id = session.get("student_id") or get_jwt_identity()
         
         #Fetch student info
         student_data = Request.get_student_data(student_id)
@@ -230,7 +232,7 @@ def complete_request():
         session["request_id"] = request_id
     
 
-    student_id = session.get("student_id")
+    student_id = session.get("student_id") or get_jwt_identity()
     student_name = student_info.get("full_name")
     student_contact = student_info.get("contact_number")
     student_email = student_info.get("email")
@@ -292,8 +294,8 @@ def check_active_requests():
     Returns all requests where status != 'RELEASED'.
     """
     try:
-        # Get student ID from session
-        student_id = session.get("student_id")
+        # Get student ID from session (or the JWT in token-mode OTP)
+        student_id = session.get("student_id") or get_jwt_identity()
         
         if not student_id:
 
@@ -371,7 +373,7 @@ def upload_requirement_files_to_supabase(request_id, requirements_data):
         import json
         
         # Initialize Supabase client
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+        supabase = get_supabase_client()
         saved_files = []
         
         for req in requirements_data:
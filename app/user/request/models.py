@@ -1,5 +1,7 @@
 from flask import g
 from app import db_pool
+from app.admin.manage_request.models import ManageRequestModel
+from app.utils.fee_registry import get_fee
 import random
 from psycopg2 import extras
 import os
@@ -100,7 +102,10 @@ class Request:
                     INSERT INTO request_documents (request_id, doc_id, quantity)
                     VALUES (%s, %s, %s)
                 """, (request_id, doc_id, quantity))
+            # Other workers drop their cached details when this commits
+            ManageRequestModel.notify_request_change(cur, request_id)
             conn.commit()
+            ManageRequestModel.invalidate_request_cache(request_id)
             return True
 
         except Exception as e:
@@ -204,7 +209,10 @@ class Request:
                 DO UPDATE SET file_path = EXCLUDED.file_path, uploaded_at = NOW()
             """, insert_values)
 
+            # Other workers drop their cached details when this commits
+            ManageRequestModel.notify_request_change(cur, request_id)
             conn.commit()
+            ManageRequestModel.invalidate_request_cache(request_id)
             return True, "Requirement files submitted successfully."
 
         except Exception as e:
@@ -230,9 +238,8 @@ class Request:
 
 
         try:
-            # Use the admin_fee passed from frontend
-            admin_fee_amount = float(admin_fee) if admin_fee else 0.0
-            print(f"Using admin fee from frontend: {admin_fee_amount}")
+            # Price with the server's current admin fee; the frontend value may be stale
+            admin_fee_amount = float(get_fee('admin_fee'))
 
             # Use INSERT ... ON CONFLICT DO UPDATE for upsert behavior
             cur.execute("""
@@ -256,7 +263,10 @@ class Request:
             """, (request_id, student_id, full_name, contact_number, email, 
                   preferred_contact, payment_status, total_cost, remarks, order_type, college_code, admin_fee_amount))
             
+            # Other workers drop their cached details when this commits
+            ManageRequestModel.notify_request_change(cur, request_id)
             conn.commit()
+            ManageRequestModel.invalidate_request_cache(request_id)
 
             print(f"Request {request_id} submitted successfully with admin fee: {admin_fee_amount}")
             return True
@@ -410,7 +420,10 @@ class Request:
                 VALUES (%s, %s, %s, %s)
             """, insert_values)
 
+            # Other workers drop their cached details when this commits
+            ManageRequestModel.notify_request_change(cur, request_id)
             conn.commit()
+            ManageRequestModel.invalidate_request_cache(request_id)
             return True
 
         except Exception as e:
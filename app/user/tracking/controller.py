@@ -1,10 +1,18 @@
+import json
+import time
 from . import tracking_bp
 from ...whatsapp.controller import send_whatsapp_message 
-from flask import jsonify, request, current_app, session
+from flask import Response, jsonify, request, current_app, session
 from flask_jwt_extended import create_access_token, set_access_cookies, get_jwt_identity, verify_jwt_in_request, jwt_required
 from .models import Tracking
 from app.utils.decorator import jwt_required_with_role
 from app.user.authentication.models import AuthenticationUser
+from config import OTP_CHALLENGE_MODE
+from app.utils.otp_challenge import set_challenge_cookie
+from app.utils.rate_limit import otp_send_retry_after, rate_limited_response
+from app.utils.status_channel import (
+    StatusSubscription, SubscriberLimitReached, release_request_connection, MAX_WAIT_SECONDS, MAX_STREAM_SECONDS
+)
 
 role = 'user'
 
@@ -45,9 +53,11 @@ def get_tracking_data():
     if not tracking_number:
         return jsonify({"message": "Please provide Tracking Number."}), 400
     
-    student_id = Tracking.get_student_id_by_tracking_number(tracking_number)
-    if not student_id:
+    # One read gives both the tracking data and the owning student
+    record = Tracking.get_record_by_tracking_number(tracking_number)
+    if not record or not record["studentId"]:
         return jsonify({"message": "Invalid Tracking Number."}), 404
+    student_id = record["studentId"]
     
     is_already_authenticated = False
     try:
@@ -61,17 +71,12 @@ def get_tracking_data():
         current_app.logger.warning(f"JWT verification failed in /api/track: {e}")
         pass
 
-    if not is_already_authenticated:
+    if not is_already_authenticated and OTP_CHALLENGE_MODE != "token":
         if session.get("student_id") == student_id:
             is_already_authenticated = True
             current_app.logger.info(f"User {student_id} is authenticated via session. Skipping OTP.")
 
     try:
-        # Fetch tracking record
-        record = Tracking.get_record_by_tracking_number(tracking_number)
-        if not record:
-            return jsonify({"message": "Invalid Tracking Number or Student ID."}), 404
-
         result = AuthenticationUser.check_student_in_school_system(student_id) 
 
         # Student not found in records
@@ -85,17 +90,20 @@ def get_tracking_data():
         full_name = result.get("full_name") if result else "Valued Customer"
         masked_phone = phone_number[-4:] if phone_number else ""
 
-        if not is_already_authenticated:
+        challenge = None
+        # Reuse a still-valid OTP instead of sending another; otherwise respect the send limits
+        if not is_already_authenticated and not AuthenticationUser.has_active_otp(student_id, phone_number, session):
+            retry_after = otp_send_retry_after(student_id, phone_number)
+            if retry_after:
+                return rate_limited_response(retry_after)
+
             otp, otp_hash = AuthenticationUser.generate_otp()
             
-            #Save OTP hash in session (temp)
-            AuthenticationUser.save_otp(student_id, otp_hash,has_liability=result["has_liability"], session=session)
-            session["phone_number"] = result["phone_number"]
-            session["tracking_number"] = tracking_number 
-            session["full_name"] = full_name
-
-                # DEBUG: Print session data
-            print(f"[DEBUG] Session after saving OTP: {dict(session)}")
+            #Save OTP hash in session (temp), or issue a challenge token in token mode
+            challenge = AuthenticationUser.save_otp(student_id, otp_hash, has_liability=result["has_liability"], session=session,
+                                                    phone_number=result["phone_number"], full_name=full_name)
+            if challenge is None:
+                session["tracking_number"] = tracking_number 
 
             phone = result["phone_number"]
             send_whatsapp_otp(phone, otp, full_name)
@@ -114,6 +122,8 @@ def get_tracking_data():
         # Create and set JWT in http-only cookie
         access_token = create_access_token(identity=student_id, additional_claims={"role": role})
         set_access_cookies(response, access_token)
+        if challenge is not None:
+            set_challenge_cookie(response, challenge)
 
         return response, 200
 
@@ -135,10 +145,6 @@ def set_order_type():
         return jsonify({"message": "User session not found or invalid."}), 401
     data = request.get_json()
 
-    print(f"[DEBUG] Raw request data: {data}")
-    print(f"[DEBUG] Request headers: {request.headers}")
-    print(f"[DEBUG] Request data type: {type(data)}")
-
     tracking_number = data.get("tracking_number")
     order_type = data.get("order_type")
 
@@ -189,6 +195,160 @@ def get_tracking_status(tracking_number):
         }), 500
 
 
+# Seconds between SSE keep-alive comments (keeps proxies from closing idle streams)
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def _status_snapshot(record):
+    return (record['status'], record['paymentStatus'])
+
+
+def _sse_event(record):
+    return f"event: status\ndata: {json.dumps(record)}\n\n"
+
+
+def _subscribers_full():
+    response = jsonify({
+        "status": "unavailable",
+        "message": "Too many live status connections; poll /api/track/status instead."
+    })
+    response.headers["Retry-After"] = "30"
+    return response, 503
+
+
+def _held_requests_unsupported():
+    """
+    503 for /wait and /stream on a server without threads (e.g. gunicorn sync
+    workers), where every open request would block a whole worker; clients
+    fall back to polling /api/track/status/<tracking_number>. None otherwise.
+    """
+    if request.environ.get("wsgi.multithread"):
+        return None
+    response = jsonify({
+        "status": "unavailable",
+        "message": "Live status updates need a threaded server; poll /api/track/status instead."
+    })
+    response.headers["Retry-After"] = "30"
+    return response, 503
+
+
+@tracking_bp.route('/api/track/status/<tracking_number>/wait', methods=['GET'])
+@jwt_required()
+def wait_tracking_status(tracking_number):
+    """
+    Long-poll for a tracking status change. The client passes the status and
+    paymentStatus it currently shows; the response comes back as soon as the
+    record differs from them (immediately if it already does), or with
+    changed=False after `timeout` seconds. No DB connection is held while waiting.
+    """
+    unsupported = _held_requests_unsupported()
+    if unsupported:
+        return unsupported
+
+    student_id = get_jwt_identity()
+    if not student_id:
+        return jsonify({"message": "User session not found or invalid."}), 401
+
+    timeout = min(max(request.args.get('timeout', 25, type=float), 0), MAX_WAIT_SECONDS)
+    known_payment = request.args.get('paymentStatus')
+    known = (
+        request.args.get('status'),
+        None if known_payment is None else known_payment.lower() == 'true'
+    )
+
+    release_request_connection()
+    try:
+        # Subscribe before reading so a change committed in between still wakes us
+        with StatusSubscription(tracking_number) as subscription:
+            record = Tracking.get_record_by_tracking_number(tracking_number)
+            if not record or record['studentId'] != student_id:
+                return jsonify({"message": "Tracking record not found."}), 404
+
+            deadline = time.monotonic() + timeout
+            while _status_snapshot(record) == known:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return jsonify({"changed": False, "trackData": record}), 200
+                if subscription.wait(remaining):
+                    record = Tracking.get_record_by_tracking_number(tracking_number)
+                    if not record:
+                        return jsonify({"message": "Tracking record not found."}), 404
+
+            return jsonify({"changed": True, "trackData": record}), 200
+
+    except SubscriberLimitReached:
+        return _subscribers_full()
+    except Exception as e:
+        current_app.logger.error(f"Error in /api/track/status/<tracking_number>/wait: {e}")
+        return jsonify({
+            "status": "error",
+            "message": f"An unexpected error occurred: {str(e)}"
+        }), 500
+
+
+@tracking_bp.route('/api/track/status/<tracking_number>/stream', methods=['GET'])
+@jwt_required()
+def stream_tracking_status(tracking_number):
+    """
+    Server-Sent Events stream of tracking status. Sends the current record,
+    then a `status` event whenever the request's status or payment changes,
+    with keep-alive comments in between. The stream closes after
+    MAX_STREAM_SECONDS; EventSource reconnects on its own.
+    """
+    unsupported = _held_requests_unsupported()
+    if unsupported:
+        return unsupported
+
+    student_id = get_jwt_identity()
+    if not student_id:
+        return jsonify({"message": "User session not found or invalid."}), 401
+
+    release_request_connection()
+    try:
+        subscription = StatusSubscription(tracking_number)
+    except SubscriberLimitReached:
+        return _subscribers_full()
+    try:
+        record = Tracking.get_record_by_tracking_number(tracking_number)
+    except Exception:
+        subscription.close()
+        raise
+    if not record or record['studentId'] != student_id:
+        subscription.close()
+        return jsonify({"message": "Tracking record not found."}), 404
+
+    def generate():
+        last = record
+        try:
+            yield "retry: 5000\n\n"
+            yield _sse_event(last)
+            deadline = time.monotonic() + MAX_STREAM_SECONDS
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if not subscription.wait(min(SSE_HEARTBEAT_SECONDS, remaining)):
+                    yield ": keep-alive\n\n"
+                    continue
+                current = Tracking.get_record_by_tracking_number(tracking_number)
+                if current is None:
+                    break
+                if current != last:
+                    last = current
+                    yield _sse_event(current)
+        finally:
+            subscription.close()
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @tracking_bp.route('/api/track/document/<tracking_number>', methods=['GET'])
 @jwt_required()
 def get_requested_documents(tracking_number):
@@ -1,5 +1,8 @@
 from flask import g
 from app import db_pool
+from app.admin.manage_request.models import ManageRequestModel
+from app.utils.prepared_statements import execute_prepared
+from app.utils.fee_registry import get_fee
 
 class Tracking:
     @staticmethod
@@ -17,60 +20,35 @@ class Tracking:
         cur = conn.cursor()
 
         try:
-            # Query to get the main request details
-            cur.execute("""
-                SELECT status, total_cost, contact_number, payment_status, order_type, remarks, student_id
-                FROM requests
-                WHERE request_id = %s
-            """, (tracking_number,))
-
+            # Request row, amount due (documents + admin fee, 0 once paid), the
+            # requires_payment_first flag and the owner in a single query
+            execute_prepared(cur, "tracking_read_model", (tracking_number, get_fee('admin_fee')))
             record = cur.fetchone()
+            conn.commit()
 
             if not record:
                 return None
 
-            # Fetch admin fee from DB
-            cur.execute("SELECT value FROM fee WHERE key = 'admin_fee'")
-            fee_res = cur.fetchone()
-            admin_fee = float(fee_res[0]) if fee_res else 0.0
-
-            # Calculate total amount based on all documents
-            cur.execute("""
-                SELECT d.cost, rd.quantity, d.requires_payment_first
-                FROM request_documents rd
-                JOIN documents d ON rd.doc_id = d.doc_id
-                WHERE rd.request_id = %s
-            """, (tracking_number,))
-            
-            docs = cur.fetchall()
-            total_cost = sum(float(d[0]) * d[1] for d in docs)
-            amount_due = total_cost + admin_fee
-            
-            requires_payment_first = any(d[2] for d in docs)
-            
-            # If the main request is already paid, override amount due to 0
-            if record[3]:  # payment_status from requests table
-                amount_due = 0.0
-
-            min_amount_due = amount_due
+            amount_due = float(record[6])
 
             # Map database columns to frontend keys
             tracking_data = {
                 "status": record[0],
                 "amountDue": amount_due,
-                "minimumAmountDue": min_amount_due,
-                "contact_number": record[2],
-                "paymentStatus": record[3],
-                "orderType": record[4],
-                "remarks": record[5],
+                "minimumAmountDue": amount_due,
+                "contact_number": record[1],
+                "paymentStatus": record[2],
+                "orderType": record[3],
+                "remarks": record[4],
                 "trackingNumber": tracking_number,
-                "studentId": record[6],
-                "requiresPaymentFirst": requires_payment_first
+                "studentId": record[5],
+                "requiresPaymentFirst": bool(record[7])
             }
             
             return tracking_data
 
         except Exception as e:
+            conn.rollback()
             print(f"Error fetching tracking data: {e}")
             return None
         finally:
@@ -147,7 +125,10 @@ class Tracking:
                 SET order_type = %s
                 WHERE request_id = %s
             """, (order_type, request_id))
+            # Other workers drop their cached details when this commits
+            ManageRequestModel.notify_request_change(cur, request_id)
             conn.commit()
+            ManageRequestModel.invalidate_request_cache(request_id)
             return True
 
         except Exception as e:
@@ -168,7 +149,7 @@ class Tracking:
         conn = db_pool.getconn()
         cur = conn.cursor()
         try:
-            cur.execute("SELECT student_id FROM requests WHERE request_id = %s", (tracking_number,))
+            execute_prepared(cur, "student_id_by_tracking_number", (tracking_number,))
             row = cur.fetchone()
             return row[0] if row else None
         except Exception as e:
@@ -364,7 +345,10 @@ class Tracking:
                         print(f"Warning: Failed to update status for request {tracking_number} even though all files are uploaded")
                         # Don't return False here, as the file upload was successful
                     
+                # Other workers drop their cached details when this commits
+                ManageRequestModel.notify_request_change(cur, tracking_number)
                 conn.commit()
+                ManageRequestModel.invalidate_request_cache(tracking_number)
                 print(f"Successfully uploaded file for change {change_id} in request {tracking_number}")
                 return True
             else:
@@ -0,0 +1,28 @@
+import threading
+from psycopg2 import pool
+
+
+class BlockingConnectionPool(pool.ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool whose getconn waits for a free connection (up to
+    timeout seconds) instead of raising PoolError as soon as all maxconn
+    connections are checked out.
+    """
+
+    def __init__(self, minconn, maxconn, *args, timeout=30, **kwargs):
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._timeout = timeout
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self._timeout):
+            raise pool.PoolError(f"no connection free after {self._timeout}s")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        super().putconn(conn, key, close)
+        self._slots.release()
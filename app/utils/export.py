@@ -0,0 +1,156 @@
+import csv
+import io
+import tempfile
+import threading
+import uuid
+from flask import Response, stream_with_context
+from config import EXPORT_MAX_CONCURRENT
+from app.db_init import get_connection
+
+# Rows fetched per round trip from the server-side cursor, and per CSV chunk
+EXPORT_CHUNK_ROWS = 2000
+
+# Cells starting with these are treated as formulas by spreadsheet apps
+FORMULA_PREFIXES = ("=", "+", "-", "@")
+
+
+def _safe_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class ExportLimitReached(Exception):
+    """Raised when EXPORT_MAX_CONCURRENT exports are already running in this process."""
+
+
+_export_slots = threading.BoundedSemaphore(EXPORT_MAX_CONCURRENT)
+
+
+class ExportRows:
+    """
+    Rows from a server-side (named) cursor, so only EXPORT_CHUNK_ROWS rows are
+    held in memory at a time.
+
+    Uses a dedicated connection outside db_pool (a download can outlast any
+    request) and one of EXPORT_MAX_CONCURRENT slots; both are taken here, before
+    the response starts, and given back by close().
+    """
+
+    def __init__(self, query, params):
+        if not _export_slots.acquire(blocking=False):
+            raise ExportLimitReached()
+        try:
+            self._conn = get_connection()
+            # Exports only read
+            self._conn.set_session(readonly=True)
+            self._cur = self._conn.cursor(name=f"export_{uuid.uuid4().hex}")
+            self._cur.itersize = EXPORT_CHUNK_ROWS
+            self._cur.execute(query, tuple(params))
+        except Exception:
+            if getattr(self, "_conn", None) is not None:
+                self._conn.close()
+            _export_slots.release()
+            raise
+        self._closed = False
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def close(self):
+        """Close the cursor and connection and free the slot; safe to call twice."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._cur.close()
+        finally:
+            self._conn.close()
+            _export_slots.release()
+
+
+def csv_response(query, params, header, filename):
+    """Stream the query result as a CSV download, one chunk per EXPORT_CHUNK_ROWS rows."""
+    rows = ExportRows(query, params)
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        pending = 0
+        for row in rows:
+            writer.writerow([_safe_cell(value) for value in row])
+            pending += 1
+            if pending >= EXPORT_CHUNK_ROWS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                pending = 0
+        yield buffer.getvalue()
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.csv"',
+            "X-Accel-Buffering": "no"
+        }
+    )
+    # Runs when the server is done with the response, even if the client left early
+    response.call_on_close(rows.close)
+    return response
+
+
+def xlsx_response(query, params, header, filename):
+    """
+    Export the query result as XLSX. The workbook is written row by row in
+    openpyxl's write-only mode to a temp file (XLSX is a zip, so it cannot be
+    emitted before it is complete), then streamed out in chunks.
+    Returns None when openpyxl is not installed.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        return None
+
+    rows = ExportRows(query, params)
+    try:
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=filename[:31])
+        sheet.append(header)
+        for row in rows:
+            sheet.append([_safe_cell(value) for value in row])
+    finally:
+        rows.close()
+
+    tmp = tempfile.TemporaryFile()
+    workbook.save(tmp)
+    tmp.seek(0)
+
+    def generate():
+        try:
+            while True:
+                chunk = tmp.read(64 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            tmp.close()
+
+    return Response(
+        generate(),
+        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.xlsx"'}
+    )
+
+
+def export_response(export_format, query, params, header, filename):
+    """
+    CSV or XLSX download for the query; None if the format is unsupported here.
+    Raises ExportLimitReached when EXPORT_MAX_CONCURRENT exports are running.
+    """
+    if export_format == "csv":
+        return csv_response(query, params, header, filename)
+    if export_format == "xlsx":
+        return xlsx_response(query, params, header, filename)
+    return None
@@ -0,0 +1,68 @@
+import threading
+import time
+from app import db_pool
+from app.utils.pg_listener import subscribe
+
+# Channel Fee.update_value notifies on; every worker's listener drops its copy
+FEE_CHANNEL = "fee_changed"
+
+# Safety net while a listener is (re)connecting: never trust a copy longer than this
+MAX_FEE_AGE_SECONDS = 300
+
+_fees = None
+_loaded_at = 0.0
+# Bumped by invalidate_fees; a load that spans an invalidation is not kept
+_generation = 0
+_lock = threading.Lock()
+
+
+def _load_fees():
+    conn = db_pool.getconn()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT key, value FROM fee")
+        fees = dict(cur.fetchall())
+        conn.commit()
+        return fees
+    finally:
+        cur.close()
+        db_pool.putconn(conn)
+
+
+def get_fee(key, default=0.0):
+    """Fee value by key from the in-process registry, loading the fee table on first use."""
+    global _fees, _loaded_at
+    fees = _fees
+    if fees is None or time.monotonic() - _loaded_at >= MAX_FEE_AGE_SECONDS:
+        # Load outside the lock so invalidate_fees (the listener thread) never waits on a query
+        with _lock:
+            generation = _generation
+        fees = _load_fees()
+        with _lock:
+            # A NOTIFY during the load may mean it read the old values:
+            # answer this call with them, but do not cache them
+            if generation == _generation:
+                _fees = fees
+                _loaded_at = time.monotonic()
+    return fees.get(key, default)
+
+
+def invalidate_fees():
+    """Drop the cached fee table; the next get_fee reloads it."""
+    global _fees, _generation
+    with _lock:
+        _generation += 1
+        _fees = None
+
+
+def notify_fee_change(cur, key):
+    """Queue a NOTIFY in the caller's transaction; delivered to listeners on commit."""
+    cur.execute("SELECT pg_notify(%s, %s)", (FEE_CHANNEL, key))
+
+
+def _on_fee_notify(payload):
+    invalidate_fees()
+
+
+# Anything may have changed while the shared listener was not connected
+subscribe(FEE_CHANNEL, _on_fee_notify, on_reconnect=invalidate_fees)
@@ -0,0 +1,92 @@
+"""
+orjson-backed JSON for Flask responses.
+
+- datetime / date / time / UUID are encoded natively by orjson (ISO 8601).
+- Decimal is encoded as a string, as Flask's default provider does, so
+  amounts like total_cost keep their exact "150.00" form.
+- raw_json() wraps JSON text that Postgres already built (json_agg,
+  row_to_json, json_build_object ... ::text) so it is embedded in the
+  response as-is instead of being decoded and re-encoded in Python.
+"""
+
+import dataclasses
+import decimal
+import json
+from flask import current_app
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """JSONProvider using orjson; responses are compact (no pretty-printing)."""
+
+    mimetype = "application/json"
+
+    # Honoured by dumps() and response() like Flask's DefaultJSONProvider.sort_keys,
+    # but off by default: sorting is an extra pass orjson otherwise skips
+    sort_keys = False
+
+    def _options(self, sort_keys):
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        option = self._options(kwargs.get("sort_keys", self.sort_keys))
+        return orjson.dumps(obj, default=_default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self._options(self.sort_keys)),
+            mimetype=self.mimetype
+        )
+
+
+def raw_json(text):
+    """
+    JSON text from the database, embedded verbatim by the orjson provider.
+
+    Falls back to the decoded value when the app is on Flask's default
+    provider (orjson missing or JSON_PROVIDER=default).
+    """
+    if text is None:
+        return None
+    if isinstance(current_app.json, OrjsonProvider):
+        return orjson.Fragment(text)
+    return json.loads(text)
+
+
+def raw_json_response(text, status=200):
+    """Response whose body is JSON text from the database, sent as bytes without re-encoding."""
+    return current_app.response_class(text.encode(), status=status, mimetype="application/json")
+
+
+def init_json_provider(app, provider):
+    """Switch app.json to orjson when provider is "orjson" and orjson is installed."""
+    if provider == "default":
+        return
+    if provider != "orjson":
+        raise ValueError(f"Unknown JSON_PROVIDER: {provider}")
+    if orjson is None:
+        app.logger.warning("[JSON] orjson not installed; using Flask's default JSON provider")
+        return
+    app.json = OrjsonProvider(app)
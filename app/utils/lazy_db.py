@@ -0,0 +1,89 @@
+import threading
+import time
+from flask import g
+from flask.ctx import _AppCtxGlobals
+from app import db_pool
+from app.utils.prepared_statements import prepare_all
+
+
+class LazyDbGlobals(_AppCtxGlobals):
+    """
+    Flask `g` whose db_conn is checked out of the pool (and prepared) on
+    first access, so requests that never query the database - logout,
+    OAuth redirects, preflights - never take a connection.
+    """
+
+    def __getattr__(self, name):
+        # Only reached while db_conn is not set yet
+        if name == "db_conn":
+            conn = db_pool.getconn()
+            try:
+                prepare_all(conn)
+            except Exception:
+                # Not on g yet, so teardown would never return it
+                db_pool.putconn(conn)
+                raise
+            self.db_conn = conn
+            self.db_conn_checked_out_at = time.monotonic()
+            return conn
+        return super().__getattr__(name)
+
+
+def release_db_conn():
+    """
+    Return g.db_conn to the pool if this request checked one out, adding the
+    time it was held to g.db_conn_held_seconds.
+    """
+    conn = g.pop("db_conn", None)
+    if conn is None:
+        return
+    held = time.monotonic() - g.pop("db_conn_checked_out_at")
+    g.db_conn_held_seconds = g.get("db_conn_held_seconds", 0) + held
+    db_pool.putconn(conn)
+
+
+def db_conn_held_seconds():
+    """
+    How long this request has held a connection so far, or None if it never
+    checked one out. Long waits that release theirs early only count up to
+    the release.
+    """
+    held = g.get("db_conn_held_seconds")
+    if "db_conn" in g:
+        held = (held or 0) + time.monotonic() - g.db_conn_checked_out_at
+    return held
+
+
+class CheckoutStats:
+    """Per-process count of requests that did / did not check out a DB connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.checkouts = 0
+        self.avoided = 0
+        self.held_seconds = 0.0
+
+    def record(self, held_seconds):
+        """held_seconds: time the request held a connection, None if it took none."""
+        with self._lock:
+            if held_seconds is not None:
+                self.checkouts += 1
+                self.held_seconds += held_seconds
+            else:
+                self.avoided += 1
+
+    def snapshot(self):
+        with self._lock:
+            uptime = max(time.monotonic() - self.started, 1e-9)
+            return {
+                "requests": self.checkouts + self.avoided,
+                "checkouts": self.checkouts,
+                "avoided": self.avoided,
+                "avoided_per_second": round(self.avoided / uptime, 3),
+                "avg_held_ms": round(self.held_seconds / self.checkouts * 1000, 2) if self.checkouts else 0,
+                "uptime_seconds": round(uptime, 1)
+            }
+
+
+checkout_stats = CheckoutStats()
@@ -0,0 +1,247 @@
+"""
+Stateless OTP challenges.
+
+Instead of keeping the OTP hash in the session, the server hands out a signed,
+expiring challenge token carrying the student context and an HMAC of the OTP
+hash. Any worker can check the signature, expiry and OTP without a session
+read; the only shared state is a small per-token record (attempts, consumed)
+that stops brute forcing and replay.
+
+The token travels in an HttpOnly cookie, so browser clients need no changes;
+non-browser clients may echo the cookie value back as "challenge" in the JSON
+body instead.
+"""
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from flask import current_app, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from app.db_init import ready_otp_challenges_table
+from app.utils.sweeper import register_sweep
+
+CHALLENGE_COOKIE = "otp_challenge"
+
+# A challenge is valid this long after it is issued
+OTP_CHALLENGE_TTL_SECONDS = 300
+
+# Wrong codes accepted per challenge before it is locked
+OTP_MAX_ATTEMPTS = 5
+
+_store = None
+
+
+class MemoryChallengeStore:
+    """Per-token attempt/consumed state in this process. Only for single-process deployments."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def record_attempt(self, jti, ttl_seconds):
+        """Count one verification attempt. Returns (attempts, consumed)."""
+        with self._lock:
+            expires_at, attempts, consumed = self._entries.get(jti, (time.time() + ttl_seconds, 0, False))
+            self._entries[jti] = (expires_at, attempts + 1, consumed)
+            return attempts + 1, consumed
+
+    def consume(self, jti, ttl_seconds):
+        """Mark the token used. Returns True only for the call that consumed it."""
+        with self._lock:
+            expires_at, attempts, consumed = self._entries.get(jti, (time.time() + ttl_seconds, 0, False))
+            self._entries[jti] = (expires_at, attempts, True)
+            return not consumed
+
+    def is_active(self, jti, max_attempts):
+        """True if the token is neither consumed nor locked."""
+        with self._lock:
+            entry = self._entries.get(jti)
+            return entry is None or (not entry[2] and entry[1] < max_attempts)
+
+    def sweep(self):
+        now = time.time()
+        with self._lock:
+            expired = [jti for jti, entry in self._entries.items() if entry[0] <= now]
+            for jti in expired:
+                del self._entries[jti]
+        return len(expired)
+
+
+class PostgresChallengeStore:
+    """Per-token attempt/consumed state in the UNLOGGED otp_challenges table."""
+
+    def __init__(self, connection_pool):
+        self.pool = connection_pool
+        ready_otp_challenges_table()
+
+    def _execute(self, query, params):
+        conn = self.pool.getconn()
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params)
+            row = cur.fetchone() if cur.description else None
+            conn.commit()
+            return row, cur.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            self.pool.putconn(conn)
+
+    def record_attempt(self, jti, ttl_seconds):
+        row, _ = self._execute("""
+            INSERT INTO otp_challenges (jti, attempts, expires_at)
+            VALUES (%s, 1, NOW() + %s * INTERVAL '1 second')
+            ON CONFLICT (jti) DO UPDATE SET attempts = otp_challenges.attempts + 1
+            RETURNING attempts, consumed
+        """, (jti, ttl_seconds))
+        return row[0], row[1]
+
+    def consume(self, jti, ttl_seconds):
+        # Conditional upsert: only the first caller changes the row
+        _, changed = self._execute("""
+            INSERT INTO otp_challenges (jti, consumed, expires_at)
+            VALUES (%s, TRUE, NOW() + %s * INTERVAL '1 second')
+            ON CONFLICT (jti) DO UPDATE SET consumed = TRUE
+            WHERE NOT otp_challenges.consumed
+        """, (jti, ttl_seconds))
+        return changed == 1
+
+    def is_active(self, jti, max_attempts):
+        row, _ = self._execute(
+            "SELECT consumed, attempts FROM otp_challenges WHERE jti = %s",
+            (jti,)
+        )
+        return row is None or (not row[0] and row[1] < max_attempts)
+
+    def sweep(self):
+        _, deleted = self._execute("DELETE FROM otp_challenges WHERE expires_at <= NOW()", ())
+        return deleted
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt="otp-challenge")
+
+
+def _otp_mac(jti, otp_hash):
+    key = hashlib.sha256(f"otp-challenge:{current_app.secret_key}".encode()).digest()
+    return hmac.new(key, f"{jti}:{otp_hash}".encode(), hashlib.sha256).hexdigest()
+
+
+def issue_challenge(otp_hash, student_id, has_liability, is_outsider=False, phone_number=None, full_name=None):
+    """
+    Signed challenge token for an OTP. phone_number/full_name are only needed
+    to resend to a requester-supplied number (outsiders); registered students
+    are looked up again instead of putting their details in the token.
+    """
+    jti = secrets.token_hex(16)
+    claims = {
+        "jti": jti,
+        "student_id": student_id,
+        "has_liability": bool(has_liability),
+        "is_outsider": bool(is_outsider),
+        "mac": _otp_mac(jti, otp_hash)
+    }
+    if is_outsider:
+        claims["phone_number"] = phone_number
+        claims["full_name"] = full_name
+    return _serializer().dumps(claims)
+
+
+def read_challenge(token):
+    """Claims of a valid, unexpired token (signature check only, no I/O), else None."""
+    if not token:
+        return None
+    try:
+        return _serializer().loads(token, max_age=OTP_CHALLENGE_TTL_SECONDS)
+    except BadSignature:
+        return None
+
+
+def request_challenge():
+    """The challenge token sent with the current request (JSON body first, then cookie)."""
+    data = request.get_json(silent=True) or {}
+    return data.get("challenge") or request.cookies.get(CHALLENGE_COOKIE)
+
+
+def verify_challenge(token, otp_input):
+    """
+    Check an entered OTP against a challenge token.
+
+    Returns:
+        dict: {"verified", "reason", "claims"}; reason is one of "expired",
+        "locked", "used" or "invalid" when not verified.
+    """
+    claims = read_challenge(token)
+    if claims is None:
+        return {"verified": False, "reason": "expired", "claims": None}
+
+    attempts, consumed = _store.record_attempt(claims["jti"], OTP_CHALLENGE_TTL_SECONDS)
+    if consumed:
+        return {"verified": False, "reason": "used", "claims": claims}
+    if attempts > OTP_MAX_ATTEMPTS:
+        return {"verified": False, "reason": "locked", "claims": claims}
+
+    entered_hash = hashlib.sha256(str(otp_input).encode()).hexdigest()
+    if not hmac.compare_digest(_otp_mac(claims["jti"], entered_hash), claims["mac"]):
+        return {"verified": False, "reason": "invalid", "claims": claims}
+
+    # Single use, even if two correct submissions race
+    if not _store.consume(claims["jti"], OTP_CHALLENGE_TTL_SECONDS):
+        return {"verified": False, "reason": "used", "claims": claims}
+    return {"verified": True, "reason": None, "claims": claims}
+
+
+def challenge_active(token, student_id, phone_number=None, is_outsider=False):
+    """
+    True if token is an unexpired, unused, unlocked challenge for the same
+    student (and, for outsiders, the same requester number), i.e. the OTP it
+    was issued for can be reused instead of sending a new one.
+    """
+    claims = read_challenge(token)
+    if not claims or claims["student_id"] != student_id or claims["is_outsider"] != bool(is_outsider):
+        return False
+    if is_outsider and claims.get("phone_number") != phone_number:
+        return False
+    return _store.is_active(claims["jti"], OTP_MAX_ATTEMPTS)
+
+
+def revoke_challenge(token):
+    """Invalidate a token early (e.g. superseded by a resend)."""
+    claims = read_challenge(token)
+    if claims is not None:
+        _store.consume(claims["jti"], OTP_CHALLENGE_TTL_SECONDS)
+
+
+def set_challenge_cookie(response, token):
+    response.set_cookie(
+        CHALLENGE_COOKIE,
+        token,
+        max_age=OTP_CHALLENGE_TTL_SECONDS,
+        httponly=True,
+        secure=current_app.config.get("SESSION_COOKIE_SECURE", False),
+        samesite=current_app.config.get("SESSION_COOKIE_SAMESITE", "lax")
+    )
+    return response
+
+
+def clear_challenge_cookie(response):
+    response.delete_cookie(CHALLENGE_COOKIE)
+    return response
+
+
+def init_otp_challenges(backend):
+    """Create the replay/attempt store for backend ("postgres" or "memory")."""
+    global _store
+    if backend == "memory":
+        _store = MemoryChallengeStore()
+    elif backend == "postgres":
+        from app import db_pool
+        _store = PostgresChallengeStore(db_pool)
+    else:
+        raise ValueError(f"Unknown OTP_STORE_BACKEND: {backend}")
+    register_sweep("otp_challenges", _store.sweep)
+    return _store
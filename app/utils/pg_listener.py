@@ -0,0 +1,76 @@
+import select
+import threading
+import time
+from collections import defaultdict
+from app.db_init import get_connection
+
+# channel -> callbacks(payload); all channels share one LISTEN connection per process
+_callbacks = defaultdict(list)
+# channel -> callbacks() run after every (re)connect, when notifications may have been missed
+_reconnect_callbacks = defaultdict(list)
+_lock = threading.Lock()
+_listener = None
+_logger = None
+
+
+def subscribe(channel, callback, on_reconnect=None):
+    """Call callback(payload) for every NOTIFY on channel in this process."""
+    with _lock:
+        _callbacks[channel].append(callback)
+        if on_reconnect:
+            _reconnect_callbacks[channel].append(on_reconnect)
+
+
+def _listen_forever():
+    backoff = 1
+    while True:
+        conn = None
+        try:
+            conn = get_connection()
+            conn.autocommit = True
+            cur = conn.cursor()
+            with _lock:
+                channels = list(_callbacks)
+                reconnect_callbacks = [cb for channel in channels for cb in _reconnect_callbacks[channel]]
+            for channel in channels:
+                cur.execute(f"LISTEN {channel}")
+            for callback in reconnect_callbacks:
+                callback()
+            backoff = 1
+
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    with _lock:
+                        callbacks = list(_callbacks.get(notify.channel, ()))
+                    for callback in callbacks:
+                        try:
+                            callback(notify.payload)
+                        except Exception as e:
+                            _logger.error(f"[LISTEN] Callback error on {notify.channel}: {e}")
+        except Exception as e:
+            _logger.warning(f"[LISTEN] Listener error, reconnecting in {backoff}s: {e}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+
+def start_listener(app):
+    """
+    Start this process's LISTEN thread (once). Subscribe every channel before
+    calling this; channels added later are picked up on the next reconnect.
+    """
+    global _listener, _logger
+    if _listener is not None and _listener.is_alive():
+        return
+    _logger = app.logger
+    _listener = threading.Thread(target=_listen_forever, name="pg-listener", daemon=True)
+    _listener.start()
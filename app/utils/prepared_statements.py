@@ -0,0 +1,112 @@
+"""
+Registry of hot lookups that are PREPAREd once per pooled connection.
+
+Postgres re-parses and re-plans every plain query. The statements below run on
+nearly every tracking, OTP and request-page call, so each pooled connection
+prepares them on first checkout and later calls only send EXECUTE.
+"""
+
+import weakref
+from psycopg2 import extensions
+
+# name -> (parameter types, SQL with $n placeholders)
+HOT_STATEMENTS = {
+    # Tracking read model: $2 is the current admin fee from the fee registry
+    "tracking_read_model": (
+        ("text", "numeric"),
+        """
+        SELECT
+            r.status,
+            r.contact_number,
+            r.payment_status,
+            r.order_type,
+            r.remarks,
+            r.student_id,
+            CASE WHEN r.payment_status THEN 0 ELSE COALESCE(docs.total_cost, 0) + $2 END AS amount_due,
+            COALESCE(docs.requires_payment_first, FALSE) AS requires_payment_first
+        FROM requests r
+        LEFT JOIN LATERAL (
+            SELECT SUM(d.cost * rd.quantity) AS total_cost,
+                   bool_or(d.requires_payment_first) AS requires_payment_first
+            FROM request_documents rd
+            JOIN documents d ON rd.doc_id = d.doc_id
+            WHERE rd.request_id = r.request_id
+        ) docs ON TRUE
+        WHERE r.request_id = $1
+        """
+    ),
+    "student_id_by_tracking_number": (
+        ("text",),
+        "SELECT student_id FROM requests WHERE request_id = $1"
+    ),
+    "student_by_id": (
+        ("text",),
+        "SELECT full_name, contact_number, liability_status, college_code FROM students WHERE student_id = $1"
+    ),
+    "restriction_settings": (
+        (),
+        "SELECT start_time, end_time, available_days, announcement FROM open_request_restriction WHERE id = 1"
+    ),
+    "date_availability": (
+        ("date",),
+        "SELECT is_available FROM available_dates WHERE date = $1"
+    ),
+    "admin_max_requests": (
+        ("text",),
+        "SELECT value FROM admin_settings WHERE admin_id = $1 AND key = 'max_requests'"
+    ),
+}
+
+# Statement names already prepared on each live connection
+_prepared = weakref.WeakKeyDictionary()
+
+
+def _prepare(cur, name):
+    param_types, query = HOT_STATEMENTS[name]
+    types_sql = f" ({', '.join(param_types)})" if param_types else ""
+    cur.execute(f"PREPARE {name}{types_sql} AS {query}")
+
+
+def prepare_all(conn):
+    """
+    Prepare every hot statement on a connection that has not seen them yet.
+    Called when a connection is checked out of the pool.
+    """
+    done = _prepared.setdefault(conn, set())
+    if all(name in done for name in HOT_STATEMENTS):
+        return
+
+    was_idle = conn.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+    cur = conn.cursor()
+    try:
+        # Sync with what the server session actually holds before preparing
+        cur.execute("SELECT name FROM pg_prepared_statements")
+        done.update(row[0] for row in cur.fetchall())
+        for name in HOT_STATEMENTS:
+            if name not in done:
+                _prepare(cur, name)
+                done.add(name)
+        if was_idle:
+            conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Error preparing hot statements: {e}")
+    finally:
+        cur.close()
+
+
+def execute_prepared(cur, name, params=()):
+    """
+    EXECUTE a registered statement on cur, preparing it first if this
+    connection has not seen it (e.g. connections taken straight from db_pool).
+    """
+    done = _prepared.setdefault(cur.connection, set())
+    if name not in done:
+        _prepare(cur, name)
+        done.add(name)
+
+    if params:
+        placeholders = ", ".join(["%s"] * len(params))
+        cur.execute(f"EXECUTE {name} ({placeholders})", tuple(params))
+    else:
+        cur.execute(f"EXECUTE {name}")
@@ -0,0 +1,168 @@
+"""
+Sliding-window rate limits.
+
+Each key keeps one counter per fixed window; the sliding estimate weights the
+previous window by how much of it still overlaps the last `window` seconds:
+
+    estimate = previous * (1 - elapsed / window) + current
+
+Two counters per key, so the state stays tiny whatever the traffic. Denied
+hits are counted too, so a client that keeps retrying stays limited.
+"""
+
+import math
+import threading
+import time
+from flask import jsonify, request
+from app.db_init import ready_rate_limits_table
+from app.utils.sweeper import register_sweep
+from config import OTP_IP_RATE_LIMIT
+
+# Key kind -> (max OTP sends, window seconds)
+OTP_SEND_LIMITS = {
+    "student": (5, 900),
+    "phone": (5, 900),
+    "ip": (20, 900),
+}
+
+_limiter = None
+
+
+class MemoryRateLimitStore:
+    """Window counters in this process. Only for single-process deployments."""
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, window_start, window_seconds):
+        """Count one hit in the current window. Returns (current, previous) window counts."""
+        with self._lock:
+            current = self._counters.get((key, window_start), (0, 0))[0] + 1
+            self._counters[(key, window_start)] = (current, window_start + 2 * window_seconds)
+            previous = self._counters.get((key, window_start - window_seconds), (0, 0))[0]
+            return current, previous
+
+    def sweep(self):
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (_, expires_at) in self._counters.items() if expires_at <= now]
+            for k in expired:
+                del self._counters[k]
+        return len(expired)
+
+
+class PostgresRateLimitStore:
+    """Window counters in the UNLOGGED rate_limits table, shared by every worker and node."""
+
+    def __init__(self, connection_pool):
+        self.pool = connection_pool
+        ready_rate_limits_table()
+
+    def _execute(self, query, params):
+        conn = self.pool.getconn()
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params)
+            row = cur.fetchone() if cur.description else None
+            conn.commit()
+            return row, cur.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            self.pool.putconn(conn)
+
+    def hit(self, key, window_start, window_seconds):
+        row, _ = self._execute("""
+            WITH hit AS (
+                INSERT INTO rate_limits (key, window_start, hits, expires_at)
+                VALUES (%s, %s, 1, %s)
+                ON CONFLICT (key, window_start) DO UPDATE SET hits = rate_limits.hits + 1
+                RETURNING hits
+            )
+            SELECT hit.hits,
+                   COALESCE((SELECT hits FROM rate_limits WHERE key = %s AND window_start = %s), 0)
+            FROM hit
+        """, (key, window_start, window_start + 2 * window_seconds, key, window_start - window_seconds))
+        return row[0], row[1]
+
+    def sweep(self):
+        _, deleted = self._execute("DELETE FROM rate_limits WHERE expires_at <= EXTRACT(EPOCH FROM NOW())", ())
+        return deleted
+
+
+class SlidingWindowLimiter:
+    def __init__(self, store):
+        self.store = store
+
+    def hit(self, key, limit, window_seconds, now=None):
+        """
+        Count a hit for key.
+
+        Returns:
+            int: 0 if allowed, otherwise seconds until the estimate drops back to the limit.
+        """
+        now = time.time() if now is None else now
+        window_start = int(now // window_seconds) * window_seconds
+        current, previous = self.store.hit(key, window_start, window_seconds)
+        elapsed = now - window_start
+
+        if previous * (1 - elapsed / window_seconds) + current <= limit:
+            return 0
+        if current < limit:
+            # The previous window's share has to decay first
+            wait = window_seconds * (1 - (limit - current) / previous) - elapsed
+        else:
+            # Only the next window helps; by then this window is the "previous" one
+            wait = (window_seconds - elapsed) + window_seconds * (1 - limit / current)
+        return max(1, math.ceil(wait))
+
+
+def init_rate_limits(backend):
+    """Create the limiter for backend ("postgres" or "memory")."""
+    global _limiter
+    if backend == "memory":
+        store = MemoryRateLimitStore()
+    elif backend == "postgres":
+        from app import db_pool
+        store = PostgresRateLimitStore(db_pool)
+    else:
+        raise ValueError(f"Unknown OTP_STORE_BACKEND: {backend}")
+    _limiter = SlidingWindowLimiter(store)
+    register_sweep("rate_limits", store.sweep)
+    return _limiter
+
+
+def otp_send_retry_after(student_id, phone_number):
+    """
+    Count an OTP send against the student and phone limits, and the client
+    IP limit when OTP_IP_RATE_LIMIT is on.
+
+    Returns:
+        int: 0 if the send may go ahead, otherwise seconds to wait.
+    """
+    keys = {
+        "student": student_id,
+        "phone": phone_number,
+        # Behind a proxy without TRUSTED_PROXY_HOPS this is the proxy's address
+        "ip": request.remote_addr if OTP_IP_RATE_LIMIT else None,
+    }
+    retry_after = 0
+    for kind, value in keys.items():
+        if not value:
+            continue
+        limit, window_seconds = OTP_SEND_LIMITS[kind]
+        retry_after = max(retry_after, _limiter.hit(f"otp:{kind}:{value}", limit, window_seconds))
+    return retry_after
+
+
+def rate_limited_response(retry_after):
+    response = jsonify({
+        "status": "rate_limited",
+        "message": f"Too many OTP requests. Please try again in {retry_after} seconds.",
+        "retry_after": retry_after
+    })
+    response.headers["Retry-After"] = str(retry_after)
+    return response, 429
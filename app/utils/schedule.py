@@ -0,0 +1,218 @@
+import datetime
+import hashlib
+import json
+import threading
+import time
+from flask import g
+from app.utils.pg_listener import subscribe
+from app.utils.prepared_statements import execute_prepared
+
+DEFAULT_START_TIME = datetime.time(9, 0, 0)
+DEFAULT_END_TIME = datetime.time(17, 0, 0)
+DEFAULT_AVAILABLE_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+# Channel the settings writes notify on; every worker's listener drops its copy
+SCHEDULE_CHANNEL = "schedule_changed"
+
+# Safety net while a listener is (re)connecting: never trust a copy longer than this
+MAX_SCHEDULE_AGE_SECONDS = 300
+
+# Days covered by the precomputed public availability calendar
+CALENDAR_DAYS = 30
+
+
+def _parse_time(value, default):
+    if isinstance(value, datetime.time):
+        return value
+    try:
+        return datetime.datetime.strptime(str(value), '%H:%M:%S').time()
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_days(value):
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            return list(DEFAULT_AVAILABLE_DAYS)
+    return list(value or [])
+
+
+class CompiledSchedule:
+    """
+    Request window compiled from open_request_restriction and available_dates.
+    Answers "is this moment allowed" without touching the database.
+    Precedence order: Time → Date → Day
+    """
+
+    def __init__(self, settings_row, override_rows):
+        self.has_settings = settings_row is not None
+        if self.has_settings:
+            self.start_time = _parse_time(settings_row[0], DEFAULT_START_TIME)
+            self.end_time = _parse_time(settings_row[1], DEFAULT_END_TIME)
+            self.day_list = _parse_days(settings_row[2])
+            self.announcement = settings_row[3] or ""
+        else:
+            self.start_time = DEFAULT_START_TIME
+            self.end_time = DEFAULT_END_TIME
+            self.day_list = list(DEFAULT_AVAILABLE_DAYS)
+            self.announcement = ""
+        self.available_days = frozenset(self.day_list)
+
+        # date -> (is_available, reason)
+        self.date_overrides = {row[0]: (bool(row[1]), row[2] or "") for row in override_rows}
+        self.built_at = time.monotonic()
+        self.version = self._content_version()
+        # (start date, days) -> calendar list, filled on first use per day
+        self._calendars = {}
+
+    def _content_version(self):
+        """Stamp derived from the content, so every worker agrees on it."""
+        content = json.dumps([
+            self.has_settings,
+            str(self.start_time),
+            str(self.end_time),
+            self.day_list,
+            self.announcement,
+            sorted((str(day), override) for day, override in self.date_overrides.items()),
+        ])
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+    def settings_dict(self):
+        """Same shape as OpenRequestRestriction.get_settings()."""
+        return {
+            "start_time": str(self.start_time),
+            "end_time": str(self.end_time),
+            "available_days": list(self.day_list),
+            "announcement": self.announcement
+        }
+
+    def is_time_allowed(self, current_time):
+        if not self.has_settings:
+            return True
+        if self.start_time <= self.end_time:
+            # Same day range (e.g., 09:00 to 17:00)
+            return self.start_time <= current_time <= self.end_time
+        # Overnight range (e.g., 22:00 to 06:00)
+        return current_time >= self.start_time or current_time <= self.end_time
+
+    def date_availability(self, day):
+        """True/False for an explicit override on that date, None if there is none."""
+        override = self.date_overrides.get(day)
+        return override[0] if override else None
+
+    def is_day_allowed(self, day):
+        """Date override first, then the weekly day list."""
+        override = self.date_availability(day)
+        if override is not None:
+            return override
+        if not self.has_settings:
+            return True
+        return day.strftime('%A') in self.available_days
+
+    def is_allowed(self, now):
+        if not self.is_time_allowed(now.time()):
+            return False
+        return self.is_day_allowed(now.date())
+
+    def upcoming_restrictions(self, start_date, days_ahead=CALENDAR_DAYS):
+        """Same shape as AvailableDates.get_upcoming_restrictions()."""
+        end_date = start_date + datetime.timedelta(days=days_ahead)
+        return [
+            {
+                "date": day.strftime("%Y-%m-%d"),
+                "is_available": is_available,
+                "reason": reason
+            }
+            for day, (is_available, reason) in sorted(self.date_overrides.items())
+            if start_date <= day <= end_date
+        ]
+
+    def calendar(self, start_date, days=CALENDAR_DAYS):
+        """Day-by-day availability from start_date, computed once per schedule and day."""
+        key = (start_date, days)
+        calendar = self._calendars.get(key)
+        if calendar is None:
+            calendar = []
+            for offset in range(days):
+                day = start_date + datetime.timedelta(days=offset)
+                override = self.date_overrides.get(day)
+                calendar.append({
+                    "date": day.strftime("%Y-%m-%d"),
+                    "day": day.strftime("%A"),
+                    "available": self.is_day_allowed(day),
+                    "has_override": override is not None,
+                    "reason": override[1] if override else ""
+                })
+            # Only today's calendar is ever asked for; drop older days
+            self._calendars = {key: calendar}
+        return calendar
+
+    def seconds_until_change(self, now):
+        """Seconds until the allowed/not-allowed answer can next flip."""
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+        boundaries = [midnight]
+        if self.has_settings:
+            for boundary_time, slack in ((self.start_time, 0), (self.end_time, 1)):
+                # end_time is inclusive, so the window closes one second after it
+                boundary = datetime.datetime.combine(now.date(), boundary_time) + datetime.timedelta(seconds=slack)
+                if boundary > now:
+                    boundaries.append(boundary)
+        return max(0, int((min(boundaries) - now).total_seconds()))
+
+
+_schedule = None
+_schedule_lock = threading.Lock()
+
+
+def _load_schedule(conn):
+    cur = conn.cursor()
+    try:
+        execute_prepared(cur, "restriction_settings")
+        settings_row = cur.fetchone()
+        # Past overrides can never apply again; keep yesterday for timezone slack
+        cur.execute("""
+            SELECT date, is_available, reason
+            FROM available_dates
+            WHERE date >= CURRENT_DATE - 1
+        """)
+        override_rows = cur.fetchall()
+        return CompiledSchedule(settings_row, override_rows)
+    finally:
+        cur.close()
+
+
+def get_schedule():
+    """Return the cached schedule, compiling it from the database when missing or stale."""
+    global _schedule
+    schedule = _schedule
+    if schedule is not None and time.monotonic() - schedule.built_at < MAX_SCHEDULE_AGE_SECONDS:
+        return schedule
+
+    with _schedule_lock:
+        schedule = _schedule
+        if schedule is None or time.monotonic() - schedule.built_at >= MAX_SCHEDULE_AGE_SECONDS:
+            schedule = _load_schedule(g.db_conn)
+            _schedule = schedule
+        return schedule
+
+
+def invalidate_schedule():
+    """Drop the cached schedule; called after restriction settings or date overrides change."""
+    global _schedule
+    with _schedule_lock:
+        _schedule = None
+
+
+def notify_schedule_change(cur):
+    """Queue a NOTIFY in the caller's transaction; delivered to listeners on commit."""
+    cur.execute("SELECT pg_notify(%s, '')", (SCHEDULE_CHANNEL,))
+
+
+def _on_schedule_notify(payload):
+    invalidate_schedule()
+
+
+# Anything may have changed while the shared listener was not connected
+subscribe(SCHEDULE_CHANNEL, _on_schedule_notify, on_reconnect=invalidate_schedule)
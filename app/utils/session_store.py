@@ -0,0 +1,198 @@
+"""
+Server-side Flask sessions backed by a pluggable store.
+
+The cookie only carries a random session id; the session dict lives in the
+store, serialized with Flask's tagged JSON (same format as cookie sessions).
+Sessions are written only when modified and expire SESSION_TTL_SECONDS after
+their last use: with SESSION_REFRESH_EACH_REQUEST (Flask's default) an
+unmodified session only has its expiry pushed back, like Flask-Session's
+sliding refresh, and only once less than half the TTL is left, so a busy
+session costs one store write per half-TTL rather than one per request.
+A background sweeper deletes expired ones.
+"""
+
+import secrets
+import threading
+import time
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from app.db_init import ready_sessions_table
+from app.utils.sweeper import register_sweep
+
+
+class MemorySessionStore:
+    """Sessions in this process's memory. Only for single-process deployments and development."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        """Returns (data, seconds until expiry), or None."""
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                del self._entries[sid]
+                return None
+            return data, remaining
+
+    def save(self, sid, data, ttl_seconds):
+        with self._lock:
+            self._entries[sid] = (time.time() + ttl_seconds, data)
+
+    def touch(self, sid, ttl_seconds):
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is not None:
+                self._entries[sid] = (time.time() + ttl_seconds, entry[1])
+
+    def delete(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def sweep(self):
+        """Delete expired sessions. Returns the number removed."""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (expires_at, _) in self._entries.items() if expires_at <= now]
+            for sid in expired:
+                del self._entries[sid]
+        return len(expired)
+
+
+class PostgresSessionStore:
+    """Sessions in the UNLOGGED sessions table, shared by every worker and node."""
+
+    def __init__(self, connection_pool):
+        self.pool = connection_pool
+        ready_sessions_table()
+
+    def _execute(self, query, params):
+        conn = self.pool.getconn()
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params)
+            row = cur.fetchone() if cur.description else None
+            conn.commit()
+            return row, cur.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            self.pool.putconn(conn)
+
+    def load(self, sid):
+        """Returns (data, seconds until expiry), or None."""
+        row, _ = self._execute(
+            "SELECT data, EXTRACT(EPOCH FROM expires_at - NOW()) FROM sessions WHERE sid = %s AND expires_at > NOW()",
+            (sid,)
+        )
+        return (row[0], float(row[1])) if row else None
+
+    def save(self, sid, data, ttl_seconds):
+        self._execute("""
+            INSERT INTO sessions (sid, data, expires_at)
+            VALUES (%s, %s, NOW() + %s * INTERVAL '1 second')
+            ON CONFLICT (sid) DO UPDATE
+            SET data = EXCLUDED.data, expires_at = EXCLUDED.expires_at
+        """, (sid, data, ttl_seconds))
+
+    def touch(self, sid, ttl_seconds):
+        self._execute(
+            "UPDATE sessions SET expires_at = NOW() + %s * INTERVAL '1 second' WHERE sid = %s",
+            (ttl_seconds, sid)
+        )
+
+    def delete(self, sid):
+        self._execute("DELETE FROM sessions WHERE sid = %s", (sid,))
+
+    def sweep(self):
+        """Delete expired sessions. Returns the number removed."""
+        _, deleted = self._execute("DELETE FROM sessions WHERE expires_at <= NOW()", ())
+        return deleted
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, expires_in=None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        # Seconds the stored copy had left when it was loaded
+        self.expires_in = expires_in
+        self.modified = False
+
+
+class StoreSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store, ttl_seconds):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            loaded = self.store.load(sid)
+            if loaded is not None:
+                data, expires_in = loaded
+                return ServerSession(self.serializer.loads(data), sid=sid, expires_in=expires_in)
+        # The id is assigned on first write, so requests that never touch the
+        # session never reach the store
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified and session.sid:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not session.modified:
+            # Sliding expiry: reading an existing session keeps it alive, but the
+            # store is only written once under half the TTL remains
+            if (session.sid and app.config["SESSION_REFRESH_EACH_REQUEST"]
+                    and session.expires_in is not None
+                    and session.expires_in < self.ttl_seconds / 2):
+                self.store.touch(session.sid, self.ttl_seconds)
+            return
+
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+        self.store.save(session.sid, self.serializer.dumps(dict(session)), self.ttl_seconds)
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+
+def init_session_store(app, backend, ttl_seconds):
+    """Install the server-side session interface for backend ("postgres" or "memory")."""
+    if backend == "memory":
+        store = MemorySessionStore()
+    elif backend == "postgres":
+        from app import db_pool
+        store = PostgresSessionStore(db_pool)
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+    app.session_interface = StoreSessionInterface(store, ttl_seconds)
+    register_sweep("sessions", store.sweep)
+    return store
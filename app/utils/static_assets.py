@@ -0,0 +1,141 @@
+"""
+Static asset handler for the React build.
+
+At startup the build directory is scanned once into an in-memory manifest
+(path -> file, size, ETag, content type, precompressed variants). A WSGI
+middleware in front of Flask answers GET/HEAD for manifest paths and for the
+SPA fallback directly, so asset requests never open a session or check out a
+DB connection.
+
+- `.br` / `.gz` siblings (see migrate/precompress_static.py) are served when
+  the client accepts them.
+- Content-hashed files (main.3f2a1b9c.js) get a one-year immutable
+  Cache-Control; everything else must revalidate via its ETag.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_accept_header
+from werkzeug.routing import RequestRedirect
+from werkzeug.wsgi import wrap_file
+
+# Build output names content-hashed files like main.3f2a1b9c.js / 453.1a2b3c4d.chunk.css
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Accept-Encoding token -> precompressed file suffix, in preference order
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class StaticAsset:
+    __slots__ = ("path", "size", "etag", "content_type", "cache_control", "variants")
+
+    def __init__(self, path, content_type, cache_control):
+        self.path = path
+        self.size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            self.etag = '"' + hashlib.sha1(f.read()).hexdigest()[:20] + '"'
+        self.content_type = content_type
+        self.cache_control = cache_control
+        # encoding -> (path, size)
+        self.variants = {}
+        for encoding, suffix in ENCODINGS:
+            # Skip variants left over from an older build of the same file
+            if os.path.isfile(path + suffix) and os.path.getmtime(path + suffix) >= os.path.getmtime(path):
+                self.variants[encoding] = (path + suffix, os.path.getsize(path + suffix))
+
+
+def build_manifest(root):
+    """URL path -> StaticAsset for every file under root (compressed siblings excluded)."""
+    manifest = {}
+    if not os.path.isdir(root):
+        return manifest
+
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith((".br", ".gz")):
+                continue
+            path = os.path.join(dirpath, filename)
+            url = "/" + os.path.relpath(path, root).replace(os.sep, "/")
+            content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+                content_type += "; charset=utf-8"
+            cache_control = IMMUTABLE_CACHE if HASHED_NAME.search(filename) else REVALIDATE_CACHE
+            manifest[url] = StaticAsset(path, content_type, cache_control)
+    return manifest
+
+
+class StaticAssetsMiddleware:
+    """
+    Serve manifest files, and index.html for paths routed to the SPA
+    fallback endpoint, without entering the Flask app.
+    """
+
+    def __init__(self, wsgi_app, manifest, url_map, fallback_endpoint, html_headers=None):
+        self.wsgi_app = wsgi_app
+        self.manifest = manifest
+        self.url_map = url_map
+        self.fallback_endpoint = fallback_endpoint
+        self.html_headers = dict(html_headers or {})
+        self.index = manifest.get("/index.html")
+
+    def _fallback_asset(self, environ):
+        if self.index is None:
+            return None
+        try:
+            endpoint, _ = self.url_map.bind_to_environ(environ).match()
+        except (HTTPException, RequestRedirect):
+            return None
+        return self.index if endpoint == self.fallback_endpoint else None
+
+    def __call__(self, environ, start_response):
+        if environ["REQUEST_METHOD"] not in ("GET", "HEAD"):
+            return self.wsgi_app(environ, start_response)
+
+        asset = self.manifest.get(environ.get("PATH_INFO", ""))
+        if asset is None:
+            asset = self._fallback_asset(environ)
+            if asset is None:
+                return self.wsgi_app(environ, start_response)
+
+        headers = [
+            ("Content-Type", asset.content_type),
+            ("Cache-Control", asset.cache_control),
+            ("ETag", asset.etag),
+        ]
+        if asset.variants:
+            headers.append(("Vary", "Accept-Encoding"))
+        if asset is self.index:
+            headers.extend(self.html_headers.items())
+
+        if_none_match = environ.get("HTTP_IF_NONE_MATCH", "")
+        if asset.etag in if_none_match or if_none_match.strip() == "*":
+            start_response("304 Not Modified", headers)
+            return []
+
+        path, size = asset.path, asset.size
+        accepted = parse_accept_header(environ.get("HTTP_ACCEPT_ENCODING")) if asset.variants else None
+        for encoding, _ in ENCODINGS:
+            if encoding in asset.variants and accepted[encoding] > 0:
+                path, size = asset.variants[encoding]
+                headers.append(("Content-Encoding", encoding))
+                break
+        headers.append(("Content-Length", str(size)))
+
+        start_response("200 OK", headers)
+        if environ["REQUEST_METHOD"] == "HEAD":
+            return []
+        return wrap_file(environ, open(path, "rb"))
+
+
+def init_static_assets(app, build_root, fallback_endpoint, html_headers=None):
+    """Scan build_root and put the static handler in front of the app. Returns the manifest."""
+    manifest = build_manifest(build_root)
+    app.wsgi_app = StaticAssetsMiddleware(app.wsgi_app, manifest, app.url_map, fallback_endpoint, html_headers)
+    app.logger.info(f"[STATIC] {len(manifest)} assets from {build_root}")
+    return manifest
@@ -0,0 +1,112 @@
+import threading
+from app.utils.lazy_db import release_db_conn
+from app.utils.pg_listener import subscribe
+from config import STATUS_MAX_SUBSCRIBERS
+
+# Channel request status/payment changes are published on; payload is the tracking number
+STATUS_CHANNEL = "request_status"
+
+# Upper bounds for how long a single long-poll / SSE stream may stay open
+MAX_WAIT_SECONDS = 30
+MAX_STREAM_SECONDS = 300
+
+# Only tracking numbers somebody is waiting on have a topic; all share one lock
+_lock = threading.Lock()
+_topics = {}
+_open = 0
+
+
+class SubscriberLimitReached(Exception):
+    """STATUS_MAX_SUBSCRIBERS subscriptions are already open in this process."""
+
+
+class _Topic:
+    __slots__ = ("version", "waiters", "changed")
+
+    def __init__(self):
+        self.version = 0
+        self.waiters = 0
+        self.changed = threading.Condition(_lock)
+
+
+def publish_status(cur, tracking_number):
+    """Queue a NOTIFY in the caller's transaction; subscribers are woken on commit."""
+    cur.execute("SELECT pg_notify(%s, %s)", (STATUS_CHANNEL, tracking_number))
+
+
+def _bump(topic):
+    topic.version += 1
+    topic.changed.notify_all()
+
+
+def _on_status_notify(payload):
+    with _lock:
+        topic = _topics.get(payload)
+        if topic is not None:
+            _bump(topic)
+
+
+def _on_reconnect():
+    # Notifications may have been lost while disconnected; make every waiter re-read
+    with _lock:
+        for topic in _topics.values():
+            _bump(topic)
+
+
+subscribe(STATUS_CHANNEL, _on_status_notify, on_reconnect=_on_reconnect)
+
+
+class StatusSubscription:
+    """
+    In-process subscription to one tracking number. Open it before reading the
+    current record so a change committed in between is not missed.
+    """
+
+    def __init__(self, tracking_number):
+        global _open
+        self.tracking_number = tracking_number
+        with _lock:
+            # Every open subscription holds a worker thread; keep them from
+            # crowding out the threads that serve ordinary requests
+            if _open >= STATUS_MAX_SUBSCRIBERS:
+                raise SubscriberLimitReached()
+            _open += 1
+            self._topic = _topics.get(tracking_number)
+            if self._topic is None:
+                self._topic = _topics[tracking_number] = _Topic()
+            self._topic.waiters += 1
+            self._seen = self._topic.version
+
+    def wait(self, timeout):
+        """Block until a change is published or timeout elapses. Returns True on change."""
+        with _lock:
+            if self._topic.version == self._seen:
+                self._topic.changed.wait(timeout)
+            changed = self._topic.version != self._seen
+            self._seen = self._topic.version
+            return changed
+
+    def close(self):
+        global _open
+        with _lock:
+            _open -= 1
+            self._topic.waiters -= 1
+            if self._topic.waiters == 0 and _topics.get(self.tracking_number) is self._topic:
+                del _topics[self.tracking_number]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def subscriber_count():
+    """Number of open subscriptions in this process."""
+    with _lock:
+        return _open
+
+
+def release_request_connection():
+    """Return the request's pooled connection early, before a long wait."""
+    release_db_conn()
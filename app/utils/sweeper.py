@@ -0,0 +1,39 @@
+import threading
+import time
+
+# Seconds between sweeps
+SWEEP_SECONDS = 300
+
+# name -> callable returning the number of expired entries it removed
+_sweeps = {}
+_lock = threading.Lock()
+_sweeper = None
+
+
+def register_sweep(name, sweep):
+    """Run sweep() periodically on this process's sweeper thread (replaces any sweep of the same name)."""
+    with _lock:
+        _sweeps[name] = sweep
+
+
+def _sweep_forever(logger):
+    while True:
+        time.sleep(SWEEP_SECONDS)
+        with _lock:
+            sweeps = list(_sweeps.items())
+        for name, sweep in sweeps:
+            try:
+                removed = sweep()
+                if removed:
+                    logger.info(f"[SWEEPER] {name}: removed {removed} expired entries")
+            except Exception as e:
+                logger.warning(f"[SWEEPER] {name} failed: {e}")
+
+
+def start_sweeper(app):
+    """Start this process's sweeper thread for expired sessions, OTP challenges etc. (once)."""
+    global _sweeper
+    if _sweeper is not None and _sweeper.is_alive():
+        return
+    _sweeper = threading.Thread(target=_sweep_forever, args=(app.logger,), name="sweeper", daemon=True)
+    _sweeper.start()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: plain queries vs. the prepared hot statements.
+
+Times the tracking read model and the
+OTP student lookup both ways on one connection and prints microseconds per call.
+
+Usage:
+    python -m benchmarks.bench_prepared_statements [--iterations N] [--request-id ID] [--student-id ID]
+"""
+
+import argparse
+import time
+
+from app.db_init import get_connection
+from app.utils.prepared_statements import HOT_STATEMENTS, prepare_all, execute_prepared
+
+
+def plain_sql(name):
+    """Registered SQL with $n placeholders rewritten for psycopg2."""
+    param_types, query = HOT_STATEMENTS[name]
+    for i in range(len(param_types), 0, -1):
+        query = query.replace(f"${i}", "%s")
+    return query
+
+
+def tracking_plain(cur, request_id):
+    cur.execute(plain_sql("tracking_read_model"), (request_id, 0))
+    cur.fetchone()
+
+
+def tracking_prepared(cur, request_id):
+    execute_prepared(cur, "tracking_read_model", (request_id, 0))
+    cur.fetchone()
+
+
+def student_plain(cur, student_id):
+    cur.execute(plain_sql("student_by_id"), (student_id,))
+    cur.fetchone()
+
+
+def student_prepared(cur, student_id):
+    execute_prepared(cur, "student_by_id", (student_id,))
+    cur.fetchone()
+
+
+def time_it(fn, cur, arg, iterations):
+    # Warm up caches so both variants start from the same state
+    for _ in range(min(50, iterations)):
+        fn(cur, arg)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(cur, arg)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def pick_sample_ids(cur):
+    cur.execute("SELECT request_id FROM requests ORDER BY requested_at DESC LIMIT 1")
+    row = cur.fetchone()
+    request_id = row[0] if row else "R0000000"
+    cur.execute("SELECT student_id FROM students LIMIT 1")
+    row = cur.fetchone()
+    student_id = row[0] if row else "0000-0000"
+    return request_id, student_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--request-id")
+    parser.add_argument("--student-id")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    conn.autocommit = True
+    cur = conn.cursor()
+    try:
+        sample_request, sample_student = pick_sample_ids(cur)
+        request_id = args.request_id or sample_request
+        student_id = args.student_id or sample_student
+        prepare_all(conn)
+
+        print(f"iterations={args.iterations} request_id={request_id} student_id={student_id}")
+        cases = [
+            ("tracking lookup", tracking_plain, tracking_prepared, request_id),
+            ("otp student lookup", student_plain, student_prepared, student_id),
+        ]
+        for label, plain_fn, prepared_fn, arg in cases:
+            plain_us = time_it(plain_fn, cur, arg, args.iterations)
+            prepared_us = time_it(prepared_fn, cur, arg, args.iterations)
+            print(f"{label:<20} plain {plain_us:8.1f} us/call   prepared {prepared_us:8.1f} us/call   "
+                  f"({(1 - prepared_us / plain_us) * 100:5.1f}% faster)")
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
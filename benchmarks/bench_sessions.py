@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: session operations per second for the filesystem (Flask-Session),
+memory and Postgres session backends.
+
+Each backend is mounted on a minimal Flask app and driven through its test
+client: "write" stores an OTP-step-sized session, "read" loads it back, and
+"new" starts a fresh session per request (cookie jar cleared every time).
+
+Usage:
+    python -m benchmarks.bench_sessions [--iterations N] [--backend filesystem|memory|postgres ...]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from flask import Flask, session
+from flask_session import Session
+from psycopg2 import pool
+
+from config import DB_USERNAME, DB_PASSWORD, DB_NAME, DB_HOST, DB_PORT, SESSION_TTL_SECONDS
+from app.utils.session_store import MemorySessionStore, PostgresSessionStore, StoreSessionInterface
+
+BACKENDS = ("filesystem", "memory", "postgres")
+
+
+def build_app(backend, workdir, connection_pool):
+    app = Flask(__name__)
+    app.secret_key = "bench-secret-key"
+
+    if backend == "filesystem":
+        app.config["SESSION_TYPE"] = "filesystem"
+        app.config["SESSION_FILE_DIR"] = os.path.join(workdir, "flask_session")
+        Session(app)
+    elif backend == "memory":
+        app.session_interface = StoreSessionInterface(MemorySessionStore(), SESSION_TTL_SECONDS)
+    else:
+        app.session_interface = StoreSessionInterface(PostgresSessionStore(connection_pool), SESSION_TTL_SECONDS)
+
+    @app.route("/write")
+    def write():
+        session["student_id"] = "BENCH-00001"
+        session["phone_number"] = "+639171234567"
+        session["otp"] = "5e884898da28047151d0e56f8dc6292773603d0d6aabbdd62a11ef721d1542d8"
+        session["has_liability"] = False
+        session["counter"] = session.get("counter", 0) + 1
+        return "ok"
+
+    @app.route("/read")
+    def read():
+        return session.get("student_id") or "missing"
+
+    return app
+
+
+def ops_per_second(fn, iterations):
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--backend", action="append", choices=BACKENDS, help="default: all")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_sessions_")
+    connection_pool = None
+    try:
+        for backend in args.backend or BACKENDS:
+            if backend == "postgres" and connection_pool is None:
+                connection_pool = pool.ThreadedConnectionPool(
+                    1, 2, user=DB_USERNAME, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT, database=DB_NAME
+                )
+            app = build_app(backend, workdir, connection_pool)
+            client = app.test_client()
+            client.get("/write")
+
+            def new_session():
+                client.get("/write")
+                client.delete_cookie("session")
+
+            write_ops = ops_per_second(lambda: client.get("/write"), args.iterations)
+            read_ops = ops_per_second(lambda: client.get("/read"), args.iterations)
+            new_ops = ops_per_second(new_session, args.iterations)
+            print(f"{backend:<11} write {write_ops:9.0f}/s   read {read_ops:9.0f}/s   new {new_ops:9.0f}/s")
+    finally:
+        if connection_pool is not None:
+            conn = connection_pool.getconn()
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM sessions WHERE data LIKE %s", ("%BENCH-00001%",))
+            conn.commit()
+            connection_pool.putconn(conn)
+            connection_pool.closeall()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
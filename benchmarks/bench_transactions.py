@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark: legacy transactions query (correlated subqueries, COUNT then OFFSET
+page) vs. the single-statement pre-aggregated query with keyset paging.
+
+Builds a fixture in a throwaway schema (default 1M request_documents rows over
+250k requests), runs both versions for the first page and a deep page, and
+prints milliseconds per call.
+
+Usage:
+    python -m benchmarks.bench_transactions [--docs N] [--docs-per-request N] [--iterations N] [--keep]
+"""
+
+import argparse
+import time
+
+from app.db_init import get_connection
+from app.admin.transactions.models import TransactionsModel
+
+SCHEMA = "bench_transactions"
+
+LEGACY_BASE_QUERY = """
+    SELECT
+        r.request_id,
+        r.student_id,
+        r.full_name,
+        r.total_cost,
+        r.payment_status,
+        r.payment_date,
+        r.admin_fee_amount,
+        (SELECT MAX(payment_date) FROM request_documents WHERE request_id = r.request_id AND payment_status = TRUE) as latest_doc_date,
+        (SELECT SUM(d.cost * rd.quantity)
+         FROM request_documents rd
+         JOIN documents d ON rd.doc_id = d.doc_id
+         WHERE rd.request_id = r.request_id AND rd.payment_status = TRUE) as paid_docs_cost
+    FROM requests r
+    WHERE TRUE
+    AND (r.payment_status = TRUE OR EXISTS (SELECT 1 FROM request_documents rd WHERE rd.request_id = r.request_id AND rd.payment_status = TRUE))
+"""
+
+
+def build_fixture(cur, docs, docs_per_request):
+    requests_count = max(1, docs // docs_per_request)
+    print(f"Building fixture: {requests_count} requests, {requests_count * docs_per_request} request_documents ...")
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {SCHEMA}")
+    # LIKE ... INCLUDING ALL copies columns, defaults and indexes but not foreign keys
+    for table in ("documents", "requests", "request_documents"):
+        cur.execute(f"CREATE TABLE {SCHEMA}.{table} (LIKE public.{table} INCLUDING ALL)")
+
+    cur.execute(f"""
+        INSERT INTO {SCHEMA}.documents (doc_id, doc_name, description, logo_link, cost)
+        SELECT 'DOC' || g, 'Document ' || g, '', '', (50 + g * 10)::numeric
+        FROM generate_series(1, {docs_per_request * 4}) g
+    """)
+    cur.execute(f"""
+        INSERT INTO {SCHEMA}.requests (request_id, student_id, full_name, requested_at, payment_status, payment_date, admin_fee_amount)
+        SELECT 'R' || lpad(g::text, 9, '0'),
+               'S' || (g % 20000),
+               'Student ' || (g % 20000),
+               NOW() - (g || ' minutes')::interval,
+               g % 3 = 0,
+               CASE WHEN g % 3 = 0 THEN NOW() - (g || ' minutes')::interval END,
+               10
+        FROM generate_series(1, {requests_count}) g
+    """)
+    cur.execute(f"""
+        INSERT INTO {SCHEMA}.request_documents (request_id, doc_id, quantity, payment_status, payment_date)
+        SELECT 'R' || lpad(g::text, 9, '0'),
+               'DOC' || (((g + k) % {docs_per_request * 4}) + 1),
+               1 + (k % 2),
+               (g + k) % 4 = 0,
+               CASE WHEN (g + k) % 4 = 0 THEN NOW() - (g || ' minutes')::interval END
+        FROM generate_series(1, {requests_count}) g,
+             generate_series(1, {docs_per_request}) k
+    """)
+    cur.execute(f"""
+        CREATE INDEX ON {SCHEMA}.request_documents(request_id) INCLUDE (doc_id, quantity, payment_date)
+        WHERE payment_status = TRUE
+    """)
+    cur.execute(f"CREATE INDEX ON {SCHEMA}.requests(requested_at, request_id)")
+    cur.execute(f"ANALYZE {SCHEMA}.documents, {SCHEMA}.requests, {SCHEMA}.request_documents")
+
+
+def legacy_page(cur, page, limit):
+    cur.execute(f"SELECT COUNT(*) FROM ({LEGACY_BASE_QUERY}) as q")
+    cur.fetchone()
+    cur.execute(f"{LEGACY_BASE_QUERY} ORDER BY r.requested_at DESC LIMIT %s OFFSET %s", (limit, (page - 1) * limit))
+    return cur.fetchall()
+
+
+def single_pass_page(cur, page, limit, cursor=None):
+    query, params = TransactionsModel.build_transactions_query(page=page, limit=limit, cursor=cursor)
+    cur.execute(query, tuple(params))
+    return cur.fetchall()
+
+
+def time_ms(fn, iterations):
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--docs-per-request", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the fixture schema afterwards")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    conn.autocommit = True
+    cur = conn.cursor()
+    try:
+        build_fixture(cur, args.docs, args.docs_per_request)
+        cur.execute(f"SET search_path TO {SCHEMA}")
+
+        deep_page = 500
+        # Cursor for the deep page: last row of the page before it
+        rows = single_pass_page(cur, deep_page - 1, args.limit)
+        deep_cursor = (rows[-1][9].isoformat(), rows[-1][1]) if rows and rows[-1][1] else None
+
+        cases = [
+            ("page 1", lambda: legacy_page(cur, 1, args.limit), lambda: single_pass_page(cur, 1, args.limit)),
+            (f"page {deep_page} (offset)", lambda: legacy_page(cur, deep_page, args.limit),
+             lambda: single_pass_page(cur, deep_page, args.limit)),
+            (f"page {deep_page} (keyset)", lambda: legacy_page(cur, deep_page, args.limit),
+             lambda: single_pass_page(cur, deep_page, args.limit, deep_cursor)),
+        ]
+        for label, legacy_fn, single_fn in cases:
+            legacy_ms = time_ms(legacy_fn, args.iterations)
+            single_ms = time_ms(single_fn, args.iterations)
+            print(f"{label:<22} legacy {legacy_ms:9.1f} ms   single-pass {single_ms:9.1f} ms   "
+                  f"({legacy_ms / single_ms:5.1f}x)")
+    finally:
+        cur.execute("SET search_path TO public")
+        if not args.keep:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
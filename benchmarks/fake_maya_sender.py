@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Local fake Maya: sends signed PAYMENT_SUCCESS webhooks to a running server.
+
+Used to exercise the webhook path by hand or under load: retries of one
+payment ID, bursts across many requests, and a webhook racing the browser
+/mark-paid call. The signature uses MAYA_SECRET_KEY exactly like Maya does.
+
+Usage:
+    python -m benchmarks.fake_maya_sender --tracking R0001 --student-id 2021-0001 --amount 150
+    python -m benchmarks.fake_maya_sender --tracking R0001 --student-id 2021-0001 --repeat 20 --concurrency 10
+    python -m benchmarks.fake_maya_sender --tracking R0001 --student-id 2021-0001 --race-browser
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv('.env')
+
+
+def build_payload(tracking_number, student_id, amount, payment_id):
+    payload = {
+        "id": payment_id,
+        "status": "PAYMENT_SUCCESS",
+        "requestReferenceNumber": tracking_number,
+        "metadata": {"trackingNumber": tracking_number, "studentId": student_id}
+    }
+    if amount is not None:
+        payload["totalAmount"] = {"value": amount, "currency": "PHP"}
+    return payload
+
+
+def send_webhook(base_url, secret_key, payload):
+    body = json.dumps(payload).encode("utf-8")
+    signature = hmac.new(secret_key.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    start = time.perf_counter()
+    response = requests.post(
+        f"{base_url}/user/payment/maya/webhook",
+        data=body,
+        headers={"Content-Type": "application/json", "PayMaya-Signature": signature},
+        timeout=30
+    )
+    return "webhook", response.status_code, (time.perf_counter() - start) * 1000, response.text
+
+
+def send_browser_mark_paid(base_url, tracking_number, student_id, amount, payment_id):
+    start = time.perf_counter()
+    response = requests.post(
+        f"{base_url}/user/payment/mark-paid",
+        json={"trackingNumber": tracking_number, "studentId": student_id, "amount": amount, "paymentReference": payment_id},
+        timeout=30
+    )
+    return "mark-paid", response.status_code, (time.perf_counter() - start) * 1000, response.text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=os.getenv("FAKE_MAYA_TARGET", "http://localhost:5000"))
+    parser.add_argument("--tracking", required=True, action="append", help="tracking number (repeatable)")
+    parser.add_argument("--student-id", required=True)
+    parser.add_argument("--amount", type=float, help="defaults to the server-side expected amount")
+    parser.add_argument("--payment-id", help="provider payment ID; random per tracking number if omitted")
+    parser.add_argument("--repeat", type=int, default=1, help="deliveries of the same event (Maya retries)")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--race-browser", action="store_true", help="also call /mark-paid concurrently")
+    args = parser.parse_args()
+
+    secret_key = os.getenv("MAYA_SECRET_KEY", "")
+    if not secret_key:
+        print("MAYA_SECRET_KEY is not set; signatures will only pass with MAYA_DISABLE_SECURITY=true")
+
+    jobs = []
+    for tracking_number in args.tracking:
+        payment_id = args.payment_id or f"fake-{uuid.uuid4()}"
+        payload = build_payload(tracking_number, args.student_id, args.amount, payment_id)
+        for _ in range(args.repeat):
+            jobs.append(lambda p=payload: send_webhook(args.url, secret_key, p))
+        if args.race_browser:
+            jobs.append(lambda t=tracking_number, p=payment_id: send_browser_mark_paid(args.url, t, args.student_id, args.amount, p))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        results = list(pool.map(lambda job: job(), jobs))
+    elapsed = time.perf_counter() - start
+
+    for kind, status_code, ms, text in results:
+        print(f"{kind:<10} {status_code}  {ms:8.1f} ms  {text.strip()[:120]}")
+    latencies = sorted(r[2] for r in results)
+    print(f"\n{len(results)} calls in {elapsed:.2f}s; "
+          f"p50 {latencies[len(latencies) // 2]:.1f} ms, max {latencies[-1]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
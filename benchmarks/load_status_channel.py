@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Load test: many idle SSE subscribers on /api/track/status/<tn>/stream.
+
+Opens N streams for one tracking number against a running server, then
+changes the request's remarks (with the same NOTIFY the app publishes) a few
+times and reports how long the change takes to reach every subscriber, plus
+how many database connections the server holds while the streams are idle.
+The original remarks are restored afterwards.
+
+Run the server with threads to spare (gunicorn.conf.py already uses gthread), e.g.
+    GUNICORN_WORKERS=2 STATUS_MAX_SUBSCRIBERS=500 gunicorn run:app
+
+Usage:
+    python -m benchmarks.load_status_channel --tracking R0001 --student-id 2021-0001 [--subscribers 500] [--rounds 5]
+"""
+
+import argparse
+import os
+import threading
+import time
+
+import requests
+
+from app import create_app
+from app.db_init import get_connection
+
+
+def mint_token(student_id):
+    app = create_app()
+    with app.app_context():
+        from flask_jwt_extended import create_access_token
+        return create_access_token(identity=student_id, additional_claims={"role": "user"})
+
+
+class Subscriber(threading.Thread):
+    def __init__(self, url, token, ready):
+        super().__init__(daemon=True)
+        self.url = url
+        self.token = token
+        self.ready = ready
+        self.received = []
+        self.error = None
+
+    def run(self):
+        try:
+            with requests.get(self.url, cookies={"access_token_cookie": self.token}, stream=True, timeout=(10, 60)) as response:
+                response.raise_for_status()
+                first = True
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line.startswith("data:"):
+                        continue
+                    if first:
+                        first = False
+                        self.ready.release()
+                    else:
+                        self.received.append(time.perf_counter())
+        except Exception as e:
+            self.error = e
+            self.ready.release()
+
+
+def db_connection_count(cur):
+    cur.execute("SELECT COUNT(*) FROM pg_stat_activity WHERE datname = current_database()")
+    return cur.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=os.getenv("STATUS_LOAD_TARGET", "http://localhost:5000"))
+    parser.add_argument("--tracking", required=True)
+    parser.add_argument("--student-id", required=True)
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to wait for events after each change")
+    args = parser.parse_args()
+
+    token = mint_token(args.student_id)
+    # Imported after create_app so the module binds the initialised pool
+    from app.utils.status_channel import STATUS_CHANNEL
+    stream_url = f"{args.url}/api/track/status/{args.tracking}/stream"
+
+    conn = get_connection()
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute("SELECT remarks FROM requests WHERE request_id = %s", (args.tracking,))
+    row = cur.fetchone()
+    if not row:
+        raise SystemExit(f"Tracking number {args.tracking} not found")
+    original_remarks = row[0]
+    connections_before = db_connection_count(cur)
+
+    ready = threading.Semaphore(0)
+    subscribers = [Subscriber(stream_url, token, ready) for _ in range(args.subscribers)]
+    start = time.perf_counter()
+    for subscriber in subscribers:
+        subscriber.start()
+    for _ in subscribers:
+        ready.acquire()
+    failed = [s for s in subscribers if s.error]
+    print(f"{len(subscribers) - len(failed)} subscribers connected in {time.perf_counter() - start:.2f}s "
+          f"({len(failed)} failed{': ' + str(failed[0].error) if failed else ''})")
+    print(f"DB connections: {connections_before} before, {db_connection_count(cur)} with streams open")
+
+    try:
+        for round_number in range(1, args.rounds + 1):
+            seen = [len(s.received) for s in subscribers]
+            sent_at = time.perf_counter()
+            cur.execute("BEGIN")
+            cur.execute("UPDATE requests SET remarks = %s WHERE request_id = %s",
+                        (f"status load test {round_number}", args.tracking))
+            cur.execute("SELECT pg_notify(%s, %s)", (STATUS_CHANNEL, args.tracking))
+            cur.execute("COMMIT")
+            time.sleep(args.settle)
+
+            latencies = sorted(
+                (s.received[seen[i]] - sent_at) * 1000
+                for i, s in enumerate(subscribers) if len(s.received) > seen[i]
+            )
+            if not latencies:
+                print(f"round {round_number}: no subscriber received the change")
+                continue
+            print(f"round {round_number}: {len(latencies)}/{len(subscribers)} delivered; "
+                  f"p50 {latencies[len(latencies) // 2]:.1f} ms, "
+                  f"p99 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]:.1f} ms, "
+                  f"max {latencies[-1]:.1f} ms")
+    finally:
+        cur.execute("BEGIN")
+        cur.execute("UPDATE requests SET remarks = %s WHERE request_id = %s", (original_remarks, args.tracking))
+        cur.execute("SELECT pg_notify(%s, %s)", (STATUS_CHANNEL, args.tracking))
+        cur.execute("COMMIT")
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Profile a cold start: import `app`, run create_app(), and report where the
+time went.
+
+A fresh interpreter is started with `-X importtime`; its per-module timings
+are rolled up by top-level package, so a heavy SDK (supabase, authlib,
+google-auth, ...) shows up as one line. Peak RSS of the child is reported
+alongside, since deferred imports save memory as well as time.
+
+Usage:
+    python -m benchmarks.profile_startup [--top N] [--runs N]
+"""
+
+import argparse
+import re
+import resource
+import subprocess
+import sys
+from collections import defaultdict
+
+# Printed by the child on stdout once create_app() returns
+CHILD_SCRIPT = """
+import time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(f"BOOT {imported - started:.6f} {created - imported:.6f}")
+"""
+
+# "import time:       512 |       1830 |   supabase"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$")
+
+
+def run_child():
+    """One cold start. Returns (import_seconds, create_app_seconds, peak RSS KiB, importtime lines)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"create_app() failed with exit code {result.returncode}")
+
+    boot = next(line for line in result.stdout.splitlines() if line.startswith("BOOT "))
+    _, import_seconds, create_seconds = boot.split()
+    # Largest child so far; every run imports the same modules, so close enough
+    max_rss_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return float(import_seconds), float(create_seconds), max_rss_kb, result.stderr.splitlines()
+
+
+def aggregate(lines):
+    """
+    Roll -X importtime output up by top-level package.
+
+    Returns:
+        dict: package -> (self microseconds, cumulative microseconds of its top-level imports)
+    """
+    self_us = defaultdict(int)
+    cumulative_us = defaultdict(int)
+    for line in lines:
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        own, cumulative, indent, module = match.groups()
+        package = module.split(".")[0]
+        self_us[package] += int(own)
+        # A module at the outermost nesting level was imported by the script itself;
+        # its cumulative time already covers everything it pulled in.
+        if len(indent) <= 1:
+            cumulative_us[package] += int(cumulative)
+    return {package: (self_us[package], cumulative_us.get(package, 0)) for package in self_us}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--top", type=int, default=15, help="packages to list")
+    parser.add_argument("--runs", type=int, default=3, help="cold starts; the fastest is reported")
+    args = parser.parse_args()
+
+    runs = [run_child() for _ in range(args.runs)]
+    import_seconds, create_seconds, max_rss_kb, lines = min(runs, key=lambda r: r[0] + r[1])
+    packages = aggregate(lines)
+
+    print(f"Cold start (best of {args.runs}): import {import_seconds * 1000:.1f} ms, "
+          f"create_app {create_seconds * 1000:.1f} ms, "
+          f"total {(import_seconds + create_seconds) * 1000:.1f} ms")
+    print(f"Peak RSS: {max_rss_kb / 1024:.1f} MiB")
+    print()
+    print(f"{'package':<32} {'self ms':>10} {'cumulative ms':>14}")
+    ranked = sorted(packages.items(), key=lambda item: item[1][0], reverse=True)
+    for package, (own, cumulative) in ranked[:args.top]:
+        print(f"{package:<32} {own / 1000:>10.1f} {cumulative / 1000:>14.1f}")
@@ -8,6 +8,16 @@ DB_USERNAME = getenv("DB_USERNAME")
 DB_PASSWORD = getenv("DB_PASSWORD")
 DB_HOST = getenv("DB_HOST")
 DB_PORT = getenv("DB_PORT")
+# Connections per process. Requests, the inbox worker and the sweeper
+# share them; a checkout waits up to DB_POOL_TIMEOUT_SECONDS for a free one
+DB_POOL_MAX_CONNECTIONS = int(getenv("DB_POOL_MAX_CONNECTIONS", "20"))
+DB_POOL_TIMEOUT_SECONDS = int(getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+# Open tracking long-polls / SSE streams per process. They hold a thread but no
+# connection, so gunicorn.conf.py adds them on top of the pool-sized threads
+STATUS_MAX_SUBSCRIBERS = int(getenv("STATUS_MAX_SUBSCRIBERS", "40"))
+# CSV/XLSX exports running at once per process. Each holds its own (non-pooled)
+# connection for the whole download; further exports get a 503
+EXPORT_MAX_CONCURRENT = int(getenv("EXPORT_MAX_CONCURRENT", "2"))
 BOOTSTRAP_SERVE_LOCAL = getenv("BOOTSTRAP_SERVE_LOCAL")
 GOOGLE_CLIENT_ID = getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = getenv("GOOGLE_CLIENT_SECRET")
@@ -16,3 +26,42 @@ SUPABASE_ANON_KEY = getenv("SUPABASE_ANON_KEY")
 
 # Frontend configuration
 FRONTEND_URL = getenv("FRONTEND_URL", "http://localhost:3000")
+
+# Read transactions summaries from the daily_revenue rollup table
+# (run migrate/reconcile_daily_revenue.py once before enabling). Payment writes
+# and document cost edits/deletes refresh the affected days; after changing
+# documents or payments directly in the database, run the reconcile again
+USE_REVENUE_ROLLUP = getenv("USE_REVENUE_ROLLUP", "false").lower() == "true"
+
+# Maya webhooks: persist to payment_inbox and return 200 immediately; a
+# background worker applies the payments
+MAYA_WEBHOOK_ASYNC = getenv("MAYA_WEBHOOK_ASYNC", "false").lower() == "true"
+
+# Server-side session store: "filesystem" (Flask-Session files, the default),
+# "postgres" (UNLOGGED sessions table shared by all workers; opt-in, creates the
+# table on startup) or "memory" (single-process only)
+SESSION_BACKEND = getenv("SESSION_BACKEND", "filesystem").lower()
+SESSION_TTL_SECONDS = int(getenv("SESSION_TTL_SECONDS", "86400"))
+
+# OTP challenges: "session" keeps the OTP hash in the session; "token" issues a
+# signed, expiring challenge token (cookie) so verification needs no session.
+# Replay/attempt state for tokens lives in OTP_STORE_BACKEND ("postgres" or "memory")
+OTP_CHALLENGE_MODE = getenv("OTP_CHALLENGE_MODE", "session").lower()
+OTP_STORE_BACKEND = getenv("OTP_STORE_BACKEND", "postgres").lower()
+
+# Response JSON: "orjson" (falls back to Flask's default if orjson is not
+# installed) or "default"
+JSON_PROVIDER = getenv("JSON_PROVIDER", "orjson").lower()
+
+# Admin request list: build the whole page ({"requests": [...], "total": n}) as
+# one JSON document in Postgres and send it without decoding in Python
+ADMIN_REQUESTS_DB_JSON = getenv("ADMIN_REQUESTS_DB_JSON", "false").lower() == "true"
+
+# Reverse proxies in front of the app (nginx = 1). When set, the client address
+# and scheme are taken from that many X-Forwarded-For / X-Forwarded-Proto hops
+TRUSTED_PROXY_HOPS = int(getenv("TRUSTED_PROXY_HOPS", "0"))
+
+# Also limit OTP sends per client IP. Only meaningful when request.remote_addr
+# is the real client (no proxy, or TRUSTED_PROXY_HOPS set); behind an
+# unconfigured proxy every client shares one address
+OTP_IP_RATE_LIMIT = getenv("OTP_IP_RATE_LIMIT", "false").lower() == "true"
@@ -0,0 +1,24 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn is started from the
+project root (`gunicorn run:app`).
+
+Threaded workers: the tracking long-poll (/wait) and SSE (/stream) endpoints
+keep a request open for up to 30 s / 5 min while idle, which would use up a
+sync worker each. Idle waiters hold no DB connection; their number is capped
+separately (STATUS_MAX_SUBSCRIBERS, 503 beyond it).
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv('.env')
+
+from config import DB_POOL_MAX_CONNECTIONS, STATUS_MAX_SUBSCRIBERS
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+worker_class = "gthread"
+# One thread per pooled connection for ordinary requests, plus the open
+# /wait and /stream requests, which hold a thread but no connection
+threads = int(os.getenv("GUNICORN_THREADS", str(DB_POOL_MAX_CONNECTIONS + STATUS_MAX_SUBSCRIBERS)))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
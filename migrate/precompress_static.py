@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Write .gz (and .br, if the brotli package is installed) siblings for the
+compressible files of the React build, for the static handler to serve.
+Run after every `npm run build`; the server picks them up on restart.
+
+Usage:
+    python -m migrate.precompress_static [--root frontend/build] [--min-bytes 1024]
+"""
+
+import argparse
+import gzip
+import os
+
+COMPRESSIBLE = (".js", ".css", ".html", ".json", ".svg", ".map", ".txt", ".ico", ".xml")
+
+
+def precompress(root, min_bytes):
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("brotli not installed; writing .gz only")
+
+    written = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if not filename.endswith(COMPRESSIBLE):
+                continue
+            path = os.path.join(dirpath, filename)
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) < min_bytes:
+                continue
+
+            variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variants.append((".br", brotli.compress(data, quality=11)))
+            for suffix, compressed in variants:
+                # Not worth a variant unless it is actually smaller
+                if len(compressed) >= len(data):
+                    continue
+                with open(path + suffix, "wb") as f:
+                    f.write(compressed)
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--root", default=os.path.join("frontend", "build"))
+    parser.add_argument("--min-bytes", type=int, default=1024)
+    args = parser.parse_args()
+    print(f"Wrote {precompress(args.root, args.min_bytes)} compressed files under {args.root}")
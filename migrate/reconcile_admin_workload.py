@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Rebuild the admin_workload counters from request_assignments and requests.
+Run this if the counters ever drift (e.g. after manual SQL edits or restores).
+"""
+
+from app.db_init import reconcile_admin_workload
+
+if __name__ == "__main__":
+    reconcile_admin_workload()
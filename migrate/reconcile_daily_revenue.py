@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily_revenue rollup from requests and request_documents.
+Run once before setting USE_REVENUE_ROLLUP=true, and again if it ever drifts.
+"""
+
+from app.db_init import reconcile_daily_revenue
+
+if __name__ == "__main__":
+    reconcile_daily_revenue()
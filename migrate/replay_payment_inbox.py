@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Re-queue Maya webhook events from payment_inbox for the background worker.
+
+Usage:
+    python -m migrate.replay_payment_inbox --failed          # every FAILED event
+    python -m migrate.replay_payment_inbox --id 12 --id 15   # specific events (FAILED or DONE)
+    python -m migrate.replay_payment_inbox --failed --now    # also process them here, synchronously
+"""
+
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv('.env')
+
+from app import create_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay payment_inbox events")
+    parser.add_argument("--id", type=int, action="append", dest="ids", help="inbox event id (repeatable)")
+    parser.add_argument("--failed", action="store_true", help="replay every FAILED event")
+    parser.add_argument("--now", action="store_true", help="process the queue in this process instead of waiting for the worker")
+    args = parser.parse_args()
+
+    if not args.ids and not args.failed:
+        parser.error("pass --id and/or --failed")
+
+    # No background threads: a running inbox worker here would race --now for the same rows
+    app = create_app(start_workers=False)
+    from app.user.payment.inbox import PaymentInbox
+
+    with app.app_context():
+        requeued = PaymentInbox.replay(event_ids=args.ids, all_failed=args.failed)
+        print(f"Re-queued {requeued} event(s).")
+        if args.now:
+            processed = 0
+            while PaymentInbox.process_next(app.logger):
+                processed += 1
+            print(f"Processed {processed} event(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+PaymentInbox.process_next against the Postgres configured in .env (DB_*).
+
+Everything runs in a throwaway schema, so the app's own payment_inbox is
+never read or written, and Payment.process_webhook_payment is replaced by a
+scripted fake, so no requests rows are needed. Skipped when the database is
+not reachable.
+
+    python -m pytest tests/test_payment_inbox.py -v
+"""
+
+import os
+import uuid
+from unittest import mock
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv('.env')
+
+from config import DB_NAME, DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT
+
+SCHEMA = f"test_inbox_{uuid.uuid4().hex[:8]}"
+
+
+def _connect(**kwargs):
+    return psycopg2.connect(
+        dbname=DB_NAME, user=DB_USERNAME, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT, **kwargs
+    )
+
+
+@pytest.fixture(scope="module")
+def inbox():
+    """The inbox module, with db_pool pointed at a pool whose connections only see SCHEMA."""
+    try:
+        admin = _connect(connect_timeout=5)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Postgres not reachable: {e}")
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {SCHEMA}")
+
+    # Every connection opened from here on (the pool, db_init's helpers) resolves tables in SCHEMA
+    previous_options = os.environ.get("PGOPTIONS")
+    os.environ["PGOPTIONS"] = f"-c search_path={SCHEMA}"
+
+    import app
+    from app.db_init import ready_payment_inbox_table
+    from app.utils.blocking_pool import BlockingConnectionPool
+
+    pool = BlockingConnectionPool(
+        1, 4, user=DB_USERNAME, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT, database=DB_NAME, timeout=5
+    )
+    # Modules that do `from app import db_pool` at import time pick up this pool
+    previous_pool, app.db_pool = app.db_pool, pool
+    try:
+        ready_payment_inbox_table()
+        from app.user.payment import inbox as inbox_module
+        with mock.patch.object(inbox_module, "db_pool", pool):
+            yield inbox_module
+    finally:
+        app.db_pool = previous_pool
+        pool.closeall()
+        if previous_options is None:
+            os.environ.pop("PGOPTIONS", None)
+        else:
+            os.environ["PGOPTIONS"] = previous_options
+        with admin.cursor() as cur:
+            cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        admin.close()
+
+
+class FakePayments:
+    """
+    Stands in for Payment.process_webhook_payment. Payment IDs seen before come
+    back as duplicates, like the payment_events ledger; IDs in failing / raising
+    fail the way a database error does.
+    """
+
+    def __init__(self, failing=(), raising=()):
+        self.failing = set(failing)
+        self.raising = set(raising)
+        self.applied = set()
+        self.calls = []
+
+    def __call__(self, tracking_number, amount, student_id, payment_id=None, source='webhook'):
+        self.calls.append(payment_id)
+        if payment_id in self.raising:
+            raise RuntimeError("connection lost")
+        if payment_id in self.failing:
+            return {'success': False, 'message': 'Database error processing webhook payment: deadlock detected'}
+        if payment_id in self.applied:
+            return {'success': True, 'message': f'Payment {payment_id} already processed', 'was_already_paid': True, 'duplicate': True}
+        self.applied.add(payment_id)
+        return {'success': True, 'message': f'Payment confirmed for tracking number: {tracking_number}', 'was_already_paid': False}
+
+
+@pytest.fixture
+def payments(inbox):
+    """Empty inbox, and a FakePayments the test configures before processing."""
+    _query(inbox, "TRUNCATE payment_inbox")
+    fake = FakePayments()
+    with mock.patch.object(inbox.Payment, "process_webhook_payment", side_effect=fake):
+        yield fake
+
+
+def _query(inbox, sql, params=()):
+    conn = inbox.db_pool.getconn()
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, params)
+        row = cur.fetchone() if cur.description else None
+        conn.commit()
+        return row
+    finally:
+        cur.close()
+        inbox.db_pool.putconn(conn)
+
+
+def _enqueue(inbox, tracking_number, payment_id):
+    return inbox.PaymentInbox.enqueue({
+        'status': 'PAYMENT_SUCCESS',
+        'requestReferenceNumber': tracking_number,
+        'id': payment_id,
+        'totalAmount': {'value': 150},
+        'studentId': '2020-00001'
+    })
+
+
+def _event(inbox, event_id):
+    """(status, attempts, last_error, seconds until available)."""
+    return _query(inbox, """
+        SELECT status, attempts, last_error, EXTRACT(EPOCH FROM available_at - CURRENT_TIMESTAMP)
+        FROM payment_inbox WHERE id = %s
+    """, (event_id,))
+
+
+def _make_available(inbox, event_id):
+    _query(inbox, "UPDATE payment_inbox SET available_at = CURRENT_TIMESTAMP WHERE id = %s", (event_id,))
+
+
+def test_duplicate_event_is_done_without_retry(inbox, payments):
+    first = _enqueue(inbox, "TRK-DUP", "pay-1")
+    repeat = _enqueue(inbox, "TRK-DUP", "pay-1")
+
+    assert inbox.PaymentInbox.process_next()
+    assert inbox.PaymentInbox.process_next()
+    assert not inbox.PaymentInbox.process_next()
+
+    assert payments.calls == ["pay-1", "pay-1"]
+    assert _event(inbox, first)[:3] == ('DONE', 1, None)
+    assert _event(inbox, repeat)[:3] == ('DONE', 1, None)
+
+
+def test_failing_event_backs_off_and_holds_back_its_request(inbox, payments):
+    payments.failing.add("pay-fail")
+    failing = _enqueue(inbox, "TRK-A", "pay-fail")
+    behind = _enqueue(inbox, "TRK-A", "pay-a2")
+    other = _enqueue(inbox, "TRK-B", "pay-b1")
+
+    assert inbox.PaymentInbox.process_next()
+    status, attempts, last_error, wait = _event(inbox, failing)
+    assert (status, attempts) == ('PENDING', 1)
+    assert last_error.startswith('Database error')
+    assert 5 < wait <= 10
+
+    # TRK-A's next event waits behind the failed one; TRK-B is not held up
+    assert inbox.PaymentInbox.process_next()
+    assert payments.calls == ["pay-fail", "pay-b1"]
+    assert _event(inbox, other)[:2] == ('DONE', 1)
+    assert not inbox.PaymentInbox.process_next()
+    assert _event(inbox, behind)[:2] == ('PENDING', 0)
+
+
+def test_failing_event_is_parked_after_max_attempts(inbox, payments):
+    payments.failing.add("pay-fail")
+    failing = _enqueue(inbox, "TRK-A", "pay-fail")
+    behind = _enqueue(inbox, "TRK-A", "pay-a2")
+
+    for attempt in range(1, inbox.INBOX_MAX_ATTEMPTS):
+        _make_available(inbox, failing)
+        assert inbox.PaymentInbox.process_next()
+        status, attempts, _, wait = _event(inbox, failing)
+        assert (status, attempts) == ('PENDING', attempt)
+        # Linear backoff: 10 seconds per attempt so far
+        assert attempt * 10 - 5 < wait <= attempt * 10
+
+    _make_available(inbox, failing)
+    assert inbox.PaymentInbox.process_next()
+    status, attempts, last_error, _ = _event(inbox, failing)
+    assert (status, attempts) == ('FAILED', inbox.INBOX_MAX_ATTEMPTS)
+    assert last_error.startswith('Database error')
+
+    # Parked, so the request's next event goes ahead
+    assert inbox.PaymentInbox.process_next()
+    assert _event(inbox, behind)[:2] == ('DONE', 1)
+    assert payments.calls == ["pay-fail"] * inbox.INBOX_MAX_ATTEMPTS + ["pay-a2"]
+
+
+def test_exception_while_processing_is_retried(inbox, payments):
+    payments.raising.add("pay-raise")
+    event_id = _enqueue(inbox, "TRK-C", "pay-raise")
+
+    assert inbox.PaymentInbox.process_next()
+    status, attempts, last_error, _ = _event(inbox, event_id)
+    assert (status, attempts) == ('PENDING', 1)
+    assert last_error == "Error processing event: connection lost"